@@ -0,0 +1,78 @@
+"""Schema creation benchmark of `SqlalchemyCrud.register_crud`.
+
+Generate synthetic models with N tables x M columns, then time `register_crud` for each of them. `register_crud` builds
+the list, filter, create, read and update schemas, from the fields cloned by `TableModelParser.filter_modelfield`.
+
+Usage:
+    python -m benchmarks.bench_crud --tables 100 --columns 20 --output benchmarks/results.json
+"""
+import argparse
+import datetime
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+from benchmarks.bench_site import compare, get_environment, load_runs
+
+
+def run(tables: int, columns: int, flavor: str = "sqlalchemy", repeat: int = 3) -> Dict[str, Any]:
+    from sqlalchemy_database import AsyncDatabase
+
+    from benchmarks.models import make_models
+    from fastapi_amis_admin.crud import SqlalchemyCrud
+
+    engine = AsyncDatabase.create("sqlite+aiosqlite:///:memory:")
+    models = make_models(tables, columns, flavor)
+    timings = []
+    for _ in range(repeat):
+        cruds = [type(f"{model.__name__}Crud", (SqlalchemyCrud,), {"read_fields": []})(model, engine) for model in models]
+        start = time.perf_counter()
+        for crud in cruds:
+            crud.register_crud()
+        timings.append(time.perf_counter() - start)
+    return {
+        "register_crud_first": timings[0],
+        "register_crud_best": min(timings),
+        "register_crud_per_table": min(timings) / tables,
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=100, help="number of generated tables")
+    parser.add_argument("--columns", type=int, default=20, help="number of generated columns per table")
+    parser.add_argument("--flavor", choices=["sqlalchemy", "sqlmodel"], default="sqlalchemy")
+    parser.add_argument("--repeat", type=int, default=3, help="number of registrations of all the tables")
+    parser.add_argument("--output", help="append the results to this JSON file")
+    parser.add_argument("--compare", help="compare with the last run with the same parameters in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    params = {"tables": args.tables, "columns": args.columns, "flavor": args.flavor, "repeat": args.repeat}
+    result = {
+        "benchmark": "crud",
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "params": params,
+        "environment": get_environment(),
+        "results": run(**params),
+    }
+    print(json.dumps(result, indent=2))
+
+    exit_code = 0
+    if args.compare:
+        baselines = [r for r in load_runs(args.compare) if r.get("benchmark") == "crud" and r.get("params") == params]
+        if baselines:
+            exit_code = 1 if compare(result, baselines[-1], args.threshold, list(result["results"])) else 0
+        else:
+            print(f"No baseline with the same parameters in {args.compare}")
+    if args.output:
+        runs = load_runs(args.output)
+        runs.append(result)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(runs, f, indent=2)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Import time benchmark of the packages.
+
+Each module is imported in a fresh interpreter, and the median of the repeats is recorded. The `+exports` entries
+also access all the exports of the package, which is what importing the package used to cost before they were lazy.
+
+Usage:
+    python -m benchmarks.bench_import --output benchmarks/results.json
+    python -m benchmarks.bench_import --compare benchmarks/results.json
+"""
+import argparse
+import datetime
+import json
+import statistics
+import sys
+from typing import Dict, List
+
+from benchmarks.bench_site import compare, get_environment, load_runs, measure_import_time
+
+PACKAGES = [
+    "fastapi_amis_admin",
+    "fastapi_amis_admin.crud",
+    "fastapi_amis_admin.amis",
+    "fastapi_amis_admin.globals",
+    "fastapi_amis_admin.admin",
+]
+EXPORTS = ["fastapi_amis_admin.crud", "fastapi_amis_admin.amis", "fastapi_amis_admin.admin"]
+
+
+def run(repeat: int = 5) -> Dict[str, float]:
+    statements = {module: (module, "") for module in PACKAGES}
+    statements.update(
+        {f"{module}+exports": (module, f"[getattr({module}, name) for name in {module}.__all__]") for module in EXPORTS}
+    )
+    return {
+        name: statistics.median(measure_import_time(module, statement) for _ in range(repeat))
+        for name, (module, statement) in statements.items()
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="number of imports of each module")
+    parser.add_argument("--output", help="append the results to this JSON file")
+    parser.add_argument("--compare", help="compare with the last import benchmark in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    result = {
+        "benchmark": "import",
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "params": {"repeat": args.repeat},
+        "environment": get_environment(),
+        "results": run(args.repeat),
+    }
+    print(json.dumps(result, indent=2))
+
+    exit_code = 0
+    if args.compare:
+        baselines = [r for r in load_runs(args.compare) if r.get("benchmark") == "import"]
+        if baselines:
+            exit_code = 1 if compare(result, baselines[-1], args.threshold, list(result["results"])) else 0
+        else:
+            print(f"No import benchmark in {args.compare}")
+    if args.output:
+        runs = load_runs(args.output)
+        runs.append(result)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(runs, f, indent=2)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
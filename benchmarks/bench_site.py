@@ -0,0 +1,193 @@
+"""Startup and memory benchmark of an admin site.
+
+Generate synthetic models with N tables x M columns, register them as `ModelAdmin`s on an `AdminSite`, then measure
+the import time, the `mount_app` time, the peak RSS, the route count and the first page latency through an in-process
+ASGI client. The results are appended to a JSON file, and can be compared with a previous run to catch regressions.
+
+Usage:
+    python -m benchmarks.bench_site --tables 200 --columns 20 --output benchmarks/results.json
+    python -m benchmarks.bench_site --tables 200 --columns 20 --lazy --compare benchmarks/results.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# lower is better for all of them
+COMPARED_METRICS = [
+    "import_time",
+    "mount_time",
+    "peak_rss_mb",
+    "site_page_first",
+    "model_page_first",
+    "model_list_first",
+]
+
+
+def measure_import_time(module: str = "fastapi_amis_admin.admin", statement: str = "") -> float:
+    """Import time of the module in a fresh interpreter, in seconds.
+    The optional statement runs after the import and is included in the measure, e.g. to access lazy exports.
+    """
+    code = f"import time; t = time.perf_counter(); import {module}; {statement or 'pass'}; print(time.perf_counter() - t)"
+    output = subprocess.check_output([sys.executable, "-c", code], stderr=subprocess.DEVNULL)
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+
+def get_environment() -> Dict[str, Any]:
+    import fastapi
+    import pydantic
+    import sqlalchemy
+
+    import fastapi_amis_admin
+
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fastapi_amis_admin": fastapi_amis_admin.__version__,
+        "fastapi": fastapi.__version__,
+        "pydantic": pydantic.VERSION,
+        "sqlalchemy": sqlalchemy.__version__,
+        "commit": commit,
+    }
+
+
+async def measure_latency(client, method: str, url: str, **kwargs) -> float:
+    start = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, f"{method} {url}: {response.status_code} {response.text[:200]}"
+    return elapsed
+
+
+async def measure_requests(app, site, admin) -> Dict[str, float]:
+    from httpx import AsyncClient
+
+    results = {}
+    requests = {
+        "site_page": ("GET", site.router_path + "/"),
+        "model_page": ("POST", admin.router_path + admin.page_path),
+        "model_list": ("POST", admin.router_path + "/list"),
+    }
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        for name, (method, url) in requests.items():
+            results[f"{name}_first"] = await measure_latency(client, method, url)
+        for name, (method, url) in requests.items():
+            results[f"{name}_warm"] = await measure_latency(client, method, url)
+    return results
+
+
+def run(tables: int, columns: int, flavor: str = "sqlalchemy", lazy: bool = False) -> Dict[str, Any]:
+    from fastapi import FastAPI
+    from sqlalchemy import create_engine
+
+    from benchmarks.models import make_models
+    from fastapi_amis_admin.admin import AdminSite, ModelAdmin, Settings
+
+    results: Dict[str, Any] = {
+        "import_time": measure_import_time("fastapi_amis_admin.admin", "fastapi_amis_admin.admin.AdminSite")
+    }
+    models = make_models(tables, columns, flavor)
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{database}")
+        models[0].metadata.create_all(engine)
+        engine.dispose()
+
+        site = AdminSite(settings=Settings(site_path="/admin", database_url_async=f"sqlite+aiosqlite:///{database}"))
+        admins = [site.register_admin(type(f"{model.__name__}Admin", (ModelAdmin,), {"model": model})) for model in models]
+        app = FastAPI()
+        start = time.perf_counter()
+        site.mount_app(app, lazy=lazy)
+        results["mount_time"] = time.perf_counter() - start
+        results["route_count"] = len(site.router.routes)
+        admin = site.get_admin_or_create(admins[0])
+        results.update(asyncio.run(measure_requests(app, site, admin)))
+        results["route_count_after_requests"] = len(site.router.routes)
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def load_runs(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(run: Dict[str, Any], baseline: Dict[str, Any], threshold: float, metrics: List[str] = None) -> List[str]:
+    """Compare the run with the baseline, and return the metrics slower than the baseline by more than `threshold`."""
+    regressions = []
+    for metric in metrics or COMPARED_METRICS:
+        new, old = run["results"].get(metric), baseline["results"].get(metric)
+        if not new or not old:
+            continue
+        change = (new - old) / old
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{metric:<36} {old:>12.4f} {new:>12.4f} {change:>+8.1%} {flag}")
+        if flag:
+            regressions.append(metric)
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=100, help="number of generated tables")
+    parser.add_argument("--columns", type=int, default=20, help="number of generated columns per table")
+    parser.add_argument("--flavor", choices=["sqlalchemy", "sqlmodel"], default="sqlalchemy")
+    parser.add_argument("--lazy", action="store_true", help="mount the site in lazy mode")
+    parser.add_argument("--output", help="append the results to this JSON file")
+    parser.add_argument("--compare", help="compare with the last run with the same parameters in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    params = {"tables": args.tables, "columns": args.columns, "flavor": args.flavor, "lazy": args.lazy}
+    result = {
+        "benchmark": "site",
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "params": params,
+        "environment": get_environment(),
+        "results": run(**params),
+    }
+    print(json.dumps(result, indent=2))
+
+    exit_code = 0
+    if args.compare:
+        baselines = [r for r in load_runs(args.compare) if r.get("benchmark") == "site" and r.get("params") == params]
+        if baselines:
+            exit_code = 1 if compare(result, baselines[-1], args.threshold) else 0
+        else:
+            print(f"No baseline with the same parameters in {args.compare}")
+    if args.output:
+        runs = load_runs(args.output)
+        runs.append(result)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(runs, f, indent=2)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
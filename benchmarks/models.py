@@ -0,0 +1,55 @@
+"""Synthetic models for the benchmarks: N tables x M columns, with SQLAlchemy or SQLModel."""
+import datetime
+from typing import List, Optional, Type
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, String, Text
+from sqlalchemy.orm import declarative_base
+
+# (python type, sqlalchemy type) of the generated columns, in rotation
+COLUMN_TYPES = [
+    (str, lambda: String(100)),
+    (int, Integer),
+    (bool, Boolean),
+    (datetime.datetime, DateTime),
+    (str, Text),
+]
+
+
+def make_sqlalchemy_models(tables: int, columns: int) -> List[Type]:
+    """Create `tables` SQLAlchemy declarative models with an integer primary key and `columns` other columns."""
+    Base = declarative_base(metadata=MetaData())
+    models = []
+    for t in range(tables):
+        attrs = {"__tablename__": f"bench_{t}", "id": Column(Integer, primary_key=True)}
+        for c in range(columns):
+            _, sa_type = COLUMN_TYPES[c % len(COLUMN_TYPES)]
+            attrs[f"col_{c}"] = Column(sa_type(), nullable=True, comment=f"Column {c}")
+        models.append(type(f"Bench{t}", (Base,), attrs))
+    return models
+
+
+def make_sqlmodel_models(tables: int, columns: int) -> List[Type]:
+    """Create `tables` SQLModel table models with an integer primary key and `columns` other fields."""
+    from sqlmodel import Field, SQLModel
+
+    class BenchBase(SQLModel):
+        metadata = MetaData()
+
+    models = []
+    for t in range(tables):
+        annotations = {"id": Optional[int]}
+        attrs = {"__tablename__": f"bench_{t}", "id": Field(default=None, primary_key=True)}
+        for c in range(columns):
+            py_type, _ = COLUMN_TYPES[c % len(COLUMN_TYPES)]
+            annotations[f"col_{c}"] = Optional[py_type]
+            attrs[f"col_{c}"] = Field(default=None, title=f"Column {c}")
+        attrs["__annotations__"] = annotations
+        attrs["__module__"] = __name__
+        models.append(type(BenchBase)(f"Bench{t}", (BenchBase,), attrs, table=True))
+    return models
+
+
+def make_models(tables: int, columns: int, flavor: str = "sqlalchemy") -> List[Type]:
+    if flavor == "sqlmodel":
+        return make_sqlmodel_models(tables, columns)
+    return make_sqlalchemy_models(tables, columns)
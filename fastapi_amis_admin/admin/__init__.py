@@ -1,36 +1,84 @@
-from .admin import (
-    AdminAction,
-    AdminApp,
-    BaseAdmin,
-    BaseAdminSite,
-    FormAction,
-    FormAdmin,
-    IframeAdmin,
-    LinkAdmin,
-    LinkModelForm,
-    ModelAction,
-    ModelAdmin,
-    PageAdmin,
-    PageSchemaAdmin,
-    RouterAdmin,
-    TemplateAdmin,
+from typing import TYPE_CHECKING
+
+from fastapi_amis_admin.utils.lazy import lazy_getattr
+
+if TYPE_CHECKING:
+    from .admin import (
+        AdminAction,
+        AdminApp,
+        BaseAdmin,
+        BaseAdminSite,
+        FormAction,
+        FormAdmin,
+        IframeAdmin,
+        LinkAdmin,
+        LinkModelForm,
+        ModelAction,
+        ModelAdmin,
+        PageAdmin,
+        PageSchemaAdmin,
+        RouterAdmin,
+        TemplateAdmin,
+    )
+    from .extensions.admin import (
+        AutoTimeModelAdmin,
+        BaseAuthFieldModelAdmin,
+        BaseAuthSelectModelAdmin,
+        FootableModelAdmin,
+        ReadOnlyModelAdmin,
+        SoftDeleteModelAdmin,
+    )
+    from .extensions.schemas import (
+        FieldPermEnum,
+        FilterSelectPerm,
+        RecentTimeSelectPerm,
+        SelectPerm,
+        SimpleSelectPerm,
+        UserSelectPerm,
+    )
+    from .parser import AmisParser
+    from .settings import Settings
+    from .site import AdminSite, DocsAdmin, FileAdmin, HomeAdmin, JobAdmin, MetricsAdmin, ReDocsAdmin
+
+# The exports are imported on first access, so that importing a submodule does not load the whole admin stack.
+__getattr__ = lazy_getattr(
+    __name__,
+    {
+        "AdminAction": ".admin",
+        "AdminApp": ".admin",
+        "BaseAdmin": ".admin",
+        "BaseAdminSite": ".admin",
+        "FormAction": ".admin",
+        "FormAdmin": ".admin",
+        "IframeAdmin": ".admin",
+        "LinkAdmin": ".admin",
+        "LinkModelForm": ".admin",
+        "ModelAction": ".admin",
+        "ModelAdmin": ".admin",
+        "PageAdmin": ".admin",
+        "PageSchemaAdmin": ".admin",
+        "RouterAdmin": ".admin",
+        "TemplateAdmin": ".admin",
+        "AutoTimeModelAdmin": ".extensions.admin",
+        "BaseAuthFieldModelAdmin": ".extensions.admin",
+        "BaseAuthSelectModelAdmin": ".extensions.admin",
+        "FootableModelAdmin": ".extensions.admin",
+        "ReadOnlyModelAdmin": ".extensions.admin",
+        "SoftDeleteModelAdmin": ".extensions.admin",
+        "FieldPermEnum": ".extensions.schemas",
+        "FilterSelectPerm": ".extensions.schemas",
+        "RecentTimeSelectPerm": ".extensions.schemas",
+        "SelectPerm": ".extensions.schemas",
+        "SimpleSelectPerm": ".extensions.schemas",
+        "UserSelectPerm": ".extensions.schemas",
+        "AmisParser": ".parser",
+        "Settings": ".settings",
+        "AdminSite": ".site",
+        "DocsAdmin": ".site",
+        "FileAdmin": ".site",
+        "HomeAdmin": ".site",
+        "JobAdmin": ".site",
+        "MetricsAdmin": ".site",
+        "ReDocsAdmin": ".site",
+    },
 )
-from .extensions.admin import (
-    AutoTimeModelAdmin,
-    BaseAuthFieldModelAdmin,
-    BaseAuthSelectModelAdmin,
-    FootableModelAdmin,
-    ReadOnlyModelAdmin,
-    SoftDeleteModelAdmin,
-)
-from .extensions.schemas import (
-    FieldPermEnum,
-    FilterSelectPerm,
-    RecentTimeSelectPerm,
-    SelectPerm,
-    SimpleSelectPerm,
-    UserSelectPerm,
-)
-from .parser import AmisParser
-from .settings import Settings
-from .site import AdminSite, DocsAdmin, FileAdmin, HomeAdmin, ReDocsAdmin
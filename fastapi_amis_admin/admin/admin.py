@@ -1,17 +1,22 @@
 import asyncio
+import copy
 import datetime
+import json
 import re
-from functools import lru_cache
+from collections import defaultdict
+from contextlib import asynccontextmanager
 from typing import (
     Any,
     Awaitable,
     Callable,
     Dict,
     Generic,
+    Hashable,
     Iterable,
     Iterator,
     List,
     Optional,
+    Set,
     Tuple,
     Type,
     TypeVar,
@@ -20,19 +25,27 @@ from typing import (
 
 from fastapi import Body, Depends, FastAPI, HTTPException, Request
 from pydantic import BaseModel
-from sqlalchemy import Column, Table, delete, insert
-from sqlalchemy.orm import InstrumentedAttribute, RelationshipProperty
+from sqlalchemy import Column, Table, delete, event, insert
+from sqlalchemy.orm import InstrumentedAttribute, RelationshipProperty, Session, SessionTransaction
+from sqlalchemy.sql import Select
 from sqlalchemy.sql.elements import Label
 from sqlalchemy.util import md5_hex
 from sqlalchemy_database import AsyncDatabase, Database
 from starlette import status
+from starlette.datastructures import URLPath
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import HTMLResponse, Response
+from starlette.responses import HTMLResponse, Response, StreamingResponse
+from starlette.routing import BaseRoute, Match, NoMatchFound
 from starlette.templating import Jinja2Templates
+from starlette.types import Receive, Scope, Send
 from typing_extensions import Annotated, Literal
 
 import fastapi_amis_admin
+from fastapi_amis_admin.admin.cache import PageHTMLCache
+from fastapi_amis_admin.admin.events import EventBroker
 from fastapi_amis_admin.admin.handlers import register_exception_handlers
+from fastapi_amis_admin.admin.jobs import Job, JobManager, MemoryJobStore, SqliteJobStore, report_progress
+from fastapi_amis_admin.admin.metrics import MetricsMiddleware, MetricsRegistry
 from fastapi_amis_admin.admin.parser import AmisParser
 from fastapi_amis_admin.admin.settings import Settings
 from fastapi_amis_admin.amis.components import (
@@ -49,6 +62,7 @@ from fastapi_amis_admin.amis.components import (
     Page,
     PageSchema,
     Picker,
+    Progress,
     Remark,
     Service,
     TableColumn,
@@ -64,23 +78,41 @@ from fastapi_amis_admin.amis.types import (
     SchemaNode,
 )
 from fastapi_amis_admin.crud import RouterMixin, SqlalchemyCrud
-from fastapi_amis_admin.crud.base import SchemaCreateT, SchemaFilterT, SchemaUpdateT
+from fastapi_amis_admin.crud.base import SchemaCreateT, SchemaFilterT, SchemaReadT, SchemaUpdateT
 from fastapi_amis_admin.crud.parser import (
     SqlaField,
     TableModelParser,
+    TableModelT,
     get_python_type_parse,
 )
-from fastapi_amis_admin.crud.schema import BaseApiOut, CrudEnum, Paginator
+from fastapi_amis_admin.crud.schema import BaseApiOut, CrudEnum, ItemListSchema, Paginator
 from fastapi_amis_admin.crud.utils import (
     IdStrQuery,
     SqlalchemyDatabase,
+    get_dialect_name,
     get_engine_db,
+    in_clauses,
     parser_str_set_list,
 )
-from fastapi_amis_admin.utils.functools import cached_property
+from fastapi_amis_admin.utils.cache import CacheBackend, CacheManager
+from fastapi_amis_admin.utils.functools import (
+    SingleFlight,
+    cached_property,
+    get_scope_cache,
+    scope_cached,
+    set_scope_cached,
+)
 from fastapi_amis_admin.utils.pydantic import ModelField, annotation_outer_type, create_model_by_model, deep_update, model_fields
 from fastapi_amis_admin.utils.translation import i18n as _
 
+try:
+    from starlette._utils import get_route_path
+except ImportError:  # starlette < 0.33: the mounts strip their path from the child scope
+
+    def get_route_path(scope: Scope) -> str:
+        return scope["path"]
+
+
 BaseAdminT = TypeVar("BaseAdminT", bound="BaseAdmin")
 PageSchemaAdminT = TypeVar("PageSchemaAdminT", bound="PageSchemaAdmin")
 ActionT = Union[Action, Awaitable[Action]]
@@ -143,13 +175,15 @@ class LinkModelForm:
         ):
             if not await self.pk_admin.has_update_permission(request, item_id, None):
                 return self.pk_admin.error_no_router_permission(request)
-            stmt = (
-                delete(self.link_model)
-                .where(self.link_col.in_(list(map(get_python_type_parse(self.link_col), parser_str_set_list(link_id)))))
-                .where(self.item_col.in_(list(map(get_python_type_parse(self.item_col), item_id))))
+            stmt = delete(self.link_model).where(
+                self.link_col.in_(list(map(get_python_type_parse(self.link_col), parser_str_set_list(link_id))))
             )
-            result = await self.pk_admin.db.async_execute(stmt)
-            return BaseApiOut(data=result.rowcount)  # type: ignore
+            count = 0
+            dialect_name = get_dialect_name(self.pk_admin.db)
+            for clause in in_clauses(self.item_col, map(get_python_type_parse(self.item_col), item_id), dialect_name):
+                result = await self.pk_admin.db.async_execute(stmt.where(clause))
+                count += result.rowcount
+            return BaseApiOut(data=count)
 
         return route
 
@@ -168,13 +202,15 @@ class LinkModelForm:
                     {self.link_col.key: link, self.item_col.key: item}
                     for link in map(get_python_type_parse(self.link_col), parser_str_set_list(link_id))
                 )
-            stmt = insert(self.link_model).values(values)
+            if not values:
+                return BaseApiOut(data=0)
             try:
-                result = await self.pk_admin.db.async_execute(stmt)
+                # executemany, instead of a single multi-row VALUES statement with two parameters per row
+                await self.pk_admin.db.async_execute(insert(self.link_model), values)
             except Exception as error:
                 await self.pk_admin.db.async_rollback()
                 return self.pk_admin.error_execute_sql(request=request, error=error)
-            return BaseApiOut(data=result.rowcount)  # type: ignore
+            return BaseApiOut(data=len(values))
 
         return route
 
@@ -316,7 +352,54 @@ class PageSchemaAdmin(BaseAdmin):
             self.page_schema.url = self.page_schema.url.replace(self.site.settings.site_url, "")
 
     async def has_page_permission(self, request: Request, obj: "PageSchemaAdmin" = None, action: str = None) -> bool:
-        return self.app is self or await self.app.has_page_permission(request, obj=obj or self, action=action)
+        """Check whether the user has the permission of the action on the page.
+        The checks of a request are awaited one by one and may share the request database session,
+        so an implementation must not start concurrent queries on that session.
+        """
+        if self.app is self:
+            return True
+        if obj is None or obj is self:  # The result is memoized for the current request.
+            return await scope_cached(
+                request and request.scope,
+                (self.unique_id, "page_permission", action),
+                lambda: self.app.has_page_permission(request, obj=self, action=action),
+            )
+        return await self.app.has_page_permission(request, obj=obj, action=action)
+
+    async def has_page_permissions(
+        self, request: Request, actions: Iterable[str], obj: "PageSchemaAdmin" = None
+    ) -> Dict[str, bool]:
+        """Check the permissions of several actions at once, and return a dict of {action: bool}.
+        By default, the actions are checked one by one through `has_page_permission`.
+        Auth backends can override it on the site to check all the actions with a single query.
+        """
+        actions = list(actions)
+        if self.app is not self:
+            if obj is None or obj is self:
+                return await self._has_page_permissions_memoized(request, actions)
+            return await self.app.has_page_permissions(request, actions, obj=obj)
+        if obj is None or obj is self:
+            return {action: await self.has_page_permission(request, action=action) for action in actions}
+        return {action: await obj.app.has_page_permission(request, obj=obj, action=action) for action in actions}
+
+    async def _has_page_permissions_memoized(self, request: Request, actions: List[str]) -> Dict[str, bool]:
+        scope = request and request.scope
+        cache = get_scope_cache(scope)
+        missing = [action for action in actions if (self.unique_id, "page_permission", action) not in cache]
+        if missing:
+            results = await self.app.has_page_permissions(request, missing, obj=self)
+            for action in missing:
+                set_scope_cached(scope, (self.unique_id, "page_permission", action), bool(results.get(action, False)))
+            if scope is None:
+                return {action: bool(results.get(action, False)) for action in actions}
+        return {action: await cache[(self.unique_id, "page_permission", action)] for action in actions}
+
+    async def get_permission_cache_key(self, request: Request) -> Optional[Hashable]:
+        """Get a key identifying the permissions of the current user, such as the user id plus a role version.
+        Permission results cached across requests are keyed by it. Return None to disable these caches.
+        Auth backends should override it on the site, together with `has_page_permission`.
+        """
+        return None if self.app is self else await self.app.get_permission_cache_key(request)
 
     def get_page_schema(self) -> Optional[PageSchema]:
         if self.page_schema:
@@ -379,6 +462,8 @@ class PageAdmin(PageSchemaAdmin, RouterAdmin):
     page_parser_mode: Literal["json", "html"] = "json"
     page_route_kwargs: Dict[str, Any] = {}
     template_name: str = ""
+    page_html_alias: bool = False
+    """Whether the html page only depends on the inputs of `get_page_alias`, so that its schema is serialized once."""
     router_prefix = "/page"
 
     def __init__(self, app: "AdminApp"):
@@ -415,18 +500,33 @@ class PageAdmin(PageSchemaAdmin, RouterAdmin):
                 self.page_schema.schema_ = Iframe(src=self.page_schema.url)
         return self.page_schema
 
+    async def get_page_alias(self, request: Request) -> Optional[Hashable]:
+        """Identify the page of the request from the inputs it is built from, if `page_html_alias`: the admin,
+        the permissions identified by `get_permission_cache_key`, the language and the query parameters.
+        The html cache then serializes the page schema once per alias, until the admins are registered again.
+        Return None, the default, to key the html page on its schema only, e.g. for the pages depending on the data."""
+        if not self.page_html_alias:
+            return None
+        permission_key = await self.get_permission_cache_key(request)
+        if permission_key is None:
+            return None
+        return "page", self.unique_id, permission_key, _.get_language(), tuple(sorted(request.query_params.multi_items()))
+
     async def page_parser(self, request: Request, page: Page) -> Response:
         if request.method == "GET":
-            result = page.amis_html(
-                template_path=self.template_name,
-                locale=_.get_language(),
-                cdn=self.site.settings.amis_cdn,
-                pkg=self.site.settings.amis_pkg,
-                theme=self.site.settings.amis_theme,
-                site_title=self.site.settings.site_title,
-                site_icon=self.site.settings.site_icon,
-            )
-            result = HTMLResponse(result)
+            params = {
+                "template_path": self.template_name,
+                "locale": _.get_language(),
+                "cdn": self.site.settings.amis_cdn,
+                "pkg": self.site.settings.amis_pkg,
+                "theme": self.site.settings.amis_theme,
+                "site_title": self.site.settings.site_title,
+                "site_icon": self.site.settings.site_icon,
+            }
+            html_cache = self.site.html_cache
+            key = html_cache.get_key(page, await self.get_page_alias(request), **params)
+            html = await html_cache.get_or_render(key, lambda: page.amis_html(**params))
+            result = html_cache.response(request, html)
         else:
             data = page.amis_dict()
             if await request.body():
@@ -459,7 +559,29 @@ class PageAdmin(PageSchemaAdmin, RouterAdmin):
     @property
     def AnnotatedPage(self):
         """Annotated Page, for fastapi dependency injection"""
-        return Annotated[Page, Depends(self.get_page)]
+        return Annotated[Page, Depends(self._get_page_single_flight)]
+
+    @cached_property
+    def single_flight(self) -> SingleFlight:
+        return SingleFlight()
+
+    async def _get_page_single_flight(self, request: Request) -> Page:
+        """Build the page once for the identical concurrent requests of the users with the same permissions,
+        identified by `get_permission_cache_key`. The waiters get a deep copy of the page,
+        so that `page_parser` may change its own page."""
+        permission_key = await self.get_permission_cache_key(request)
+        if permission_key is None:
+            return await self.get_page(request)
+        key = ("page", permission_key, _.get_language(), tuple(sorted(request.query_params.multi_items())))
+        built = False
+
+        async def get_page():
+            nonlocal built
+            built = True
+            return await self.get_page(request)
+
+        page = await self.single_flight.do(key, get_page)
+        return page if built else copy.deepcopy(page)
 
     @property
     def route_page(self) -> Callable:
@@ -521,6 +643,37 @@ class BaseActionAdmin(PageAdmin):
     async def has_action_permission(self, request: Request, name: str) -> bool:
         return True
 
+    async def get_job_feedback(self, request: Request) -> Dialog:
+        """The dialog polling the background job returned by the submit, until it is finished."""
+        return Dialog(
+            title=_("Background Job"),
+            body=Service(
+                api=f"get:{self.site.router_path}/jobs/" + "${id}",
+                interval=3000,
+                silentPolling=True,
+                stopAutoRefreshWhen="${finished}",
+                body=[
+                    Progress(value="${progress}", animate=True),
+                    Tpl(tpl="${message}"),
+                    Tpl(tpl="${error}", className="text-danger", visibleOn="${error}"),
+                ],
+            ),
+            actions=[],
+        )
+
+    def get_job_database(self) -> Union[Database, AsyncDatabase]:
+        return self.app.db
+
+    async def submit_job(self, request: Request, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> BaseApiOut[Job]:
+        """Run `func(*args, **kwargs)` as a background job, with its own database session."""
+
+        async def run():
+            async with self.get_job_database()():
+                return await func(*args, **kwargs)
+
+        job = await self.site.jobs.submit(run, name=self.unique_id, owner=await self.site.get_job_owner(request))
+        return BaseApiOut(data=job)
+
     def register_router(self):
         for admin_action in self.registered_admin_actions.values():
             if isinstance(admin_action, RouterAdmin):
@@ -536,6 +689,9 @@ class FormAdmin(BaseActionAdmin, Generic[SchemaUpdateT]):
     form_init: bool = None
     form_path: str = ""
     router_prefix: str = "/form"
+    background: bool = False
+    """Run `handle` as a background job of `site.jobs`: the submit returns the job at once,
+    and its progress is displayed until it is finished. Report it with `jobs.report_progress`."""
 
     def __init__(self, app: "AdminApp"):
         super().__init__(app)
@@ -563,6 +719,8 @@ class FormAdmin(BaseActionAdmin, Generic[SchemaUpdateT]):
             formitem = await self.get_form_item(request, modelfield)
             if formitem:
                 form.body.append(formitem)
+        if self.background:
+            form.feedback = await self.get_job_feedback(request)
         return form
 
     def register_router(self):
@@ -600,6 +758,8 @@ class FormAdmin(BaseActionAdmin, Generic[SchemaUpdateT]):
     @property
     def route_submit(self):
         async def route(request: Request, data: self.schema):  # type:ignore
+            if self.background:
+                return await self.submit_job(request, self.handle, request, data)
             return await self.handle(request, data)  # type:ignore
 
         return route
@@ -611,6 +771,16 @@ class FormAdmin(BaseActionAdmin, Generic[SchemaUpdateT]):
         return await self.has_page_permission(request, action=name)
 
 
+def _publish_session_changes(session: Session) -> None:
+    for (broker, topic), actions in session.info.pop("amis_admin_changes", {}).items():
+        broker.publish(topic, {"actions": sorted(actions)})
+
+
+def _discard_session_changes(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:  # A savepoint rolled back does not discard the changes of its parent transaction
+        session.info.pop("amis_admin_changes", None)
+
+
 class ModelAdmin(SqlalchemyCrud, BaseActionAdmin):
     list_display: List[Union[SqlaField, TableColumn]] = []  # Fields to be displayed
     list_filter: List[Union[SqlaField, FormItem]] = []  # Query filterable fields
@@ -625,6 +795,9 @@ class ModelAdmin(SqlalchemyCrud, BaseActionAdmin):
     bind_model: bool = True
     admin_action_maker: List[Callable[["ModelAdmin"], "AdminAction"]] = []  # Actions
     display_item_action_as_column: bool = False  # Whether to display the item operation as a column
+    list_live_refresh: bool = False
+    """Reload the list when its data is changed, notified by the server-sent events of `{router_path}/events`,
+    instead of polling it with `interval`. The changes are published by `create_items`, `update_items` and `delete_items`."""
 
     def __init__(self, app: "AdminApp"):
         assert self.model, "model is None"
@@ -645,6 +818,8 @@ class ModelAdmin(SqlalchemyCrud, BaseActionAdmin):
         self.fields.extend([field for field in list_display_insfield if field not in self.fields])
         SqlalchemyCrud.__init__(self, self.model, self.engine)
         BaseActionAdmin.__init__(self, app)
+        if self.site.metrics is not None:
+            self.site.metrics.instrument_database(self.db)
 
     @property
     def router_prefix(self):
@@ -805,6 +980,8 @@ class ModelAdmin(SqlalchemyCrud, BaseActionAdmin):
             quickSaveItemApi=f"put:{self.router_path}/item/${self.pk_name}",
             defaultParams={k: v for k, v in request.query_params.items() if v},
         )
+        if self.list_live_refresh:
+            table.id = f"crud_{self.unique_id}"
         # Append operation column
         action_columns = await self._get_list_columns_for_actions(request)
         table.columns.extend(action_columns)
@@ -923,7 +1100,7 @@ class ModelAdmin(SqlalchemyCrud, BaseActionAdmin):
             ],
         )
 
-    async def get_update_form(self, request: Request, bulk: bool = False) -> Form:
+    async def get_update_form(self, request: Request, bulk: bool = False, by_filter: bool = False) -> Form:
         extra = {}
         if not bulk:
             api = f"put:{self.router_path}/item/${self.pk_name}"
@@ -933,10 +1110,23 @@ class ModelAdmin(SqlalchemyCrud, BaseActionAdmin):
         else:
             api = f"put:{self.router_path}/item/" + "${ids|raw}"
             fields = self.bulk_update_fields
+        body = await self._conv_modelfields_to_formitems(request, fields, CrudEnum.update)
+        if by_filter:
+            # Send the filters captured by the dialog when it was opened instead of the selected ids,
+            # and only the values of the form items. The update runs as a background job.
+            api = AmisAPI(
+                method="post",
+                url=f"{self.router_path}/item/filter/update",
+                data={
+                    "filters": "${__filters}",
+                    "data": {item.name: f"${{{item.name}}}" for item in body if getattr(item, "name", None)},
+                },
+            )
+            extra["feedback"] = await self.get_job_feedback(request)
         return Form(
             api=api,
             name=CrudEnum.update,
-            body=await self._conv_modelfields_to_formitems(request, fields, CrudEnum.update),
+            body=body,
             submitText=None,
             trimValues=True,
             **extra,
@@ -1011,6 +1201,47 @@ class ModelAdmin(SqlalchemyCrud, BaseActionAdmin):
         else:
             return None
 
+    async def get_list_filter_data(self, request: Request) -> Dict[str, Any]:
+        """The amis data mapping of the current filters of the list table, used by the filter based bulk actions.
+        Each filter is mapped by name: unlike the list api, `$$` is not used, as it would also pick the other values
+        of the scope, e.g. the values typed in the form of the action."""
+        api_data = (await self.get_list_table_api(request)).data
+        data = {}
+        for field in [*self.search_fields, *await self.get_list_filter(request)]:
+            if isinstance(field, FormItem):
+                name = field.name
+            else:
+                modelfield = self.parser.get_modelfield(field)
+                name = modelfield and modelfield.alias
+            if name:
+                data[name] = api_data.get(name, f"${name}")
+        return data
+
+    async def get_update_by_filter_action(self, request: Request) -> Optional[Action]:
+        if not self.bulk_update_fields:
+            return None
+        return ActionType.Dialog(
+            label=_("Update All Matching"),
+            dialog=Dialog(
+                title=_("Update All Matching") + " - " + _(self.page_schema.label),
+                size=SizeEnum.lg,
+                data={"__filters": await self.get_list_filter_data(request)},  # Captured in the scope of the list
+                body=await self.get_update_form(request, bulk=True, by_filter=True),
+            ),
+        )
+
+    async def get_delete_by_filter_action(self, request: Request) -> Optional[Action]:
+        return ActionType.Ajax(
+            label=_("Delete All Matching"),
+            confirmText=_("Are you sure you want to delete all the ${total} rows matching the filters?"),
+            api=AmisAPI(
+                method="post",
+                url=f"{self.router_path}/item/filter/delete",
+                data={"filters": await self.get_list_filter_data(request)},
+            ),
+            feedback=await self.get_job_feedback(request),
+        )
+
     async def _conv_modelfields_to_formitems(
         self,
         request: Request,
@@ -1069,6 +1300,14 @@ class ModelAdmin(SqlalchemyCrud, BaseActionAdmin):
                 flags=["bulk"],
             ),
         }
+        if self.enable_bulk_by_filter:
+            admin_actions["bulk_delete_by_filter"] = AdminAction(
+                admin=self,
+                name="bulk_delete_by_filter",
+                label=_("Delete All Matching"),
+                flags=["bulk"],
+                getter=lambda request: self.get_delete_by_filter_action(request),
+            )
         if self.enable_bulk_create:
             admin_actions["bulk_create"] = AdminAction(
                 admin=self,
@@ -1093,6 +1332,14 @@ class ModelAdmin(SqlalchemyCrud, BaseActionAdmin):
                 flags=["bulk"],
                 getter=lambda request: self.get_update_action(request, bulk=True),
             )
+            if self.enable_bulk_by_filter:
+                admin_actions["bulk_update_by_filter"] = AdminAction(
+                    admin=self,
+                    name="bulk_update_by_filter",
+                    label=_("Update All Matching"),
+                    flags=["bulk"],
+                    getter=lambda request: self.get_update_by_filter_action(request),
+                )
         for maker in self.admin_action_maker:
             admin_action = maker(self)
             admin_actions[admin_action.name] = admin_action
@@ -1102,12 +1349,132 @@ class ModelAdmin(SqlalchemyCrud, BaseActionAdmin):
         for form in self.link_model_forms:
             form.register_router()
         self.register_crud()
+        if self.list_live_refresh:
+            self.router.add_api_route("/events", self.route_events, methods=["GET"], include_in_schema=False)
         super(ModelAdmin, self).register_router()
         return self
 
+    async def get_request_fingerprint(self, request: Request) -> Optional[Hashable]:
+        # The list depends on the user through the permissions only, e.g. the select and field permissions.
+        return await self.get_permission_cache_key(request)
+
+    def get_job_database(self) -> Union[Database, AsyncDatabase]:
+        return self.db
+
+    async def run_bulk_action(
+        self, request: Request, action: CrudEnum, func: Callable[..., Awaitable[int]], *args: Any
+    ) -> BaseApiOut[Any]:
+        # Run the filter based bulk actions as background jobs of `site.jobs`, polled by the feedback of the actions.
+        return await self.submit_job(request, func, request, *args)
+
+    async def on_bulk_progress(self, request: Request, action: CrudEnum, done: int, total: int) -> None:
+        await report_progress(done, total)
+
+    @property
+    def change_topic(self) -> str:
+        """The broker topic of the data changes, shared by all the admins of the table."""
+        return f"change:{self.model.__table__.name}"
+
+    def _publish_change_on_commit(self, session: Session, action: CrudEnum) -> None:
+        changes: Optional[Dict[Tuple[EventBroker, str], Set[str]]] = session.info.get("amis_admin_changes")
+        if changes is None:
+            changes = session.info["amis_admin_changes"] = defaultdict(set)
+        if not session.info.get("amis_admin_changes_listened"):
+            # Listen once per session: the changes are published on commit, and dropped when the transaction is rolled back.
+            session.info["amis_admin_changes_listened"] = True
+            event.listen(session, "after_commit", _publish_session_changes)
+            event.listen(session, "after_transaction_end", _discard_session_changes)
+        changes[(self.site.broker, self.change_topic)].add(action.value)
+
+    async def publish_change(self, action: CrudEnum) -> None:
+        """Notify the subscribers of the events route that the data changed, once the current transaction is committed.
+        The changes of a transaction are sent as one event; nothing is done if nobody is subscribed in the process
+        and the broker has no channel to the other processes."""
+        broker = self.site.broker
+        if broker.has_subscribers(self.change_topic) or broker.channel is not None:
+            await self.db.async_run_sync(self._publish_change_on_commit, action)
+
+    def observe_rows(self, action: CrudEnum, rows: int) -> None:
+        """Record the number of rows returned or changed by the route, if the metrics of the site are enabled."""
+        if self.site.metrics is not None:
+            self.site.metrics.observe_rows(self.site.metrics.get_admin_label(self), action.value, rows)
+
+    async def list_items(
+        self,
+        request: Request,
+        sel: Select,
+        paginator: Paginator,
+        filters: Optional[SchemaFilterT] = None,
+        since: Optional[str] = None,
+    ) -> ItemListSchema:
+        data = await super().list_items(request, sel, paginator, filters, since)
+        self.observe_rows(CrudEnum.list, len(data.items))
+        return data
+
+    async def read_items(self, request: Request, item_id: List[str]) -> List[SchemaReadT]:
+        items = await super().read_items(request, item_id)
+        self.observe_rows(CrudEnum.read, len(items))
+        return items
+
+    async def create_items(self, request: Request, items: List[SchemaCreateT]) -> List[TableModelT]:
+        objs = await super().create_items(request, items)
+        await self.publish_change(CrudEnum.create)
+        self.observe_rows(CrudEnum.create, len(objs))
+        return objs
+
+    async def update_items(self, request: Request, item_id: List[str], values: Dict[str, Any]) -> List[TableModelT]:
+        objs = await super().update_items(request, item_id, values)
+        await self.publish_change(CrudEnum.update)
+        self.observe_rows(CrudEnum.update, len(objs))
+        return objs
+
+    async def delete_items(self, request: Request, item_id: List[str]) -> List[TableModelT]:
+        objs = await super().delete_items(request, item_id)
+        await self.publish_change(CrudEnum.delete)
+        self.observe_rows(CrudEnum.delete, len(objs))
+        return objs
+
+    @property
+    def route_events(self) -> Callable:
+        async def route(request: Request):
+            if not await self.has_list_permission(request, None, None):
+                return self.error_no_router_permission(request)
+            return StreamingResponse(
+                self.site.broker.event_stream(request, self.change_topic, event="change"),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        return route
+
+    async def get_live_refresh_event(self, request: Request) -> Dict[str, Any]:
+        """The page init event subscribing to the events route, and reloading the list when it changed.
+        The reloads are throttled, and deferred while the tab is hidden, so the idle tabs do not query the database."""
+        script = (
+            "const url = %(url)s, target = %(target)s, location = window.location.href;"
+            "const sources = window.__amisAdminEventSources = window.__amisAdminEventSources || {};"
+            "if (sources[url]) { sources[url].close(); }"
+            "const source = sources[url] = new EventSource(url);"
+            "let timer = null, pending = false;"
+            "const reload = () => {"
+            "  if (window.location.href !== location) { source.close(); return; }"
+            "  if (document.hidden) { pending = true; return; }"
+            "  pending = false;"
+            "  if (timer) { return; }"
+            "  timer = setTimeout(() => { timer = null; doAction({actionType: 'reload', componentId: target}); }, 1000);"
+            "};"
+            "source.addEventListener('change', reload);"
+            "document.addEventListener('visibilitychange', () => { if (pending && !document.hidden) { reload(); } });"
+        ) % {"url": json.dumps(f"{self.router_path}/events"), "target": json.dumps(f"crud_{self.unique_id}")}
+        return {"init": {"actions": [{"actionType": "custom", "script": script}]}}
+
     async def get_page(self, request: Request) -> Page:
+        # Check all the permissions needed to build the page at once, they are memoized for the request.
+        await self.has_page_permissions(request, [*CrudEnum, *self.registered_admin_actions])
         page = await super(ModelAdmin, self).get_page(request)
         page.body = await self.get_list_table(request)
+        if self.list_live_refresh:
+            page.onEvent = await self.get_live_refresh_event(request)
         return page
 
     async def has_list_permission(
@@ -1260,6 +1627,9 @@ class ModelAction(FormAction):
             )
         return action
 
+    def get_job_database(self) -> Union[Database, AsyncDatabase]:
+        return self.admin.db
+
     # noinspection PyMethodOverriding
     async def handle(self, request: Request, item_id: List[str], data: Optional[SchemaUpdateT], **kwargs) -> BaseApiOut[Any]:
         return BaseApiOut(data=data)
@@ -1271,44 +1641,87 @@ class ModelAction(FormAction):
             item_id: self.admin.AnnotatedItemIdList,  # type:ignore
             data: Annotated[self.schema, Body()] = None,  # type:ignore
         ):
+            if self.background:
+                return await self.submit_job(request, self.handle, request, item_id, data)
             return await self.handle(request, item_id, data)
 
         return route
 
 
 class AdminGroup(PageSchemaAdmin):
+    page_schema_cache_ttl: int = 0
+    """Seconds to cache the menu of each user, keyed by `get_permission_cache_key`. 0 disables the cache."""
+
     def __init__(self, app: "AdminApp") -> None:
         super().__init__(app)
         self._children: List[PageSchemaAdminT] = []
+        self._page_schema_cache: CacheBackend[List[PageSchema]] = self.site.cache.create(
+            f"page_schema:{self.unique_id}", maxsize=1024, ttl=self.page_schema_cache_ttl
+        )
 
     def append_child(self, child: PageSchemaAdminT) -> None:
         self._children.append(child)
+        self.clear_page_schema_cache()
 
     def remove_child(self, unique_id: str) -> None:
         self._children = [admin for admin in self._children if admin.unique_id != unique_id]
         for admin in self._children:
             if isinstance(admin, AdminGroup):
                 admin.remove_child(unique_id)
+        self.clear_page_schema_cache()
+
+    def clear_page_schema_cache(self, key: str = None) -> None:
+        """Clear the cached menu of the user identified by `key`, or of all users if key is None."""
+        self.site.html_cache.aliases.clear()  # The html pages of the aliases include the menu
+        if key is None:
+            self._page_schema_cache.clear()
+        else:
+            self._page_schema_cache.delete(key)
+        for admin in self._children:
+            if isinstance(admin, AdminGroup):
+                admin.clear_page_schema_cache(key)
 
     async def get_page_schema_children(self, request: Request) -> List[PageSchema]:
+        return await scope_cached(
+            request and request.scope,
+            (self.unique_id, "page_schema_children"),
+            lambda: self._get_page_schema_children_cached(request),
+        )
+
+    async def _get_page_schema_children_cached(self, request: Request) -> List[PageSchema]:
+        key = self.page_schema_cache_ttl and request and await self.get_permission_cache_key(request)
+        if not key:
+            return await self._get_page_schema_children(request)
+        page_schema_list = await self._page_schema_cache.aget(key)
+        if page_schema_list is None:
+            page_schema_list = await self._get_page_schema_children(request)
+            await self._page_schema_cache.aset(key, page_schema_list)
+        return page_schema_list
+
+    async def _get_page_schema_children(self, request: Request) -> List[PageSchema]:
+        # Evaluate the children one by one, the permission checks may share the request database session.
         page_schema_list = []
         for child in self._children:
-            if not child.page_schema:
-                continue
-            if (isinstance(child, AdminGroup) and not isinstance(child, AdminApp)) or (
-                isinstance(child, AdminApp) and child.page_schema.tabsMode is None
-            ):
-                sub_children = await child.get_page_schema_children(request)
-                if sub_children:  # If there are sub-nodes, show them even if the parent node has no permission.
-                    page_schema = child.page_schema.copy(deep=True)
-                    page_schema.children = sub_children
-                    page_schema_list.append(page_schema)
-            elif await child.has_page_permission(request, action="page"):
-                page_schema_list.append(child.page_schema)
+            page_schema = await self._get_child_page_schema(request, child)
+            if page_schema:
+                page_schema_list.append(page_schema)
         if page_schema_list:
             page_schema_list.sort(key=lambda p: p.sort or 0, reverse=True)
         return page_schema_list
 
+    async def _get_child_page_schema(self, request: Request, child: PageSchemaAdminT) -> Optional[PageSchema]:
+        if not child.page_schema:
+            return None
+        if (isinstance(child, AdminGroup) and not isinstance(child, AdminApp)) or (
+            isinstance(child, AdminApp) and child.page_schema.tabsMode is None
+        ):
+            sub_children = await child.get_page_schema_children(request)
+            if sub_children:  # If there are sub-nodes, show them even if the parent node has no permission.
+                return child.page_schema.copy(update={"children": sub_children})
+        elif await child.has_page_permission(request, action="page"):
+            return child.page_schema
+        return None
+
     def get_page_schema_child(self, unique_id: str) -> Union[Tuple[PageSchemaAdminT, "AdminGroup"], Tuple[None, None]]:
         for child in self._children:
             if child.unique_id == unique_id:
@@ -1323,6 +1736,120 @@ class AdminGroup(PageSchemaAdmin):
         return self._children.__iter__()
 
 
+class LazyAdminRoute(BaseRoute):
+    """Placeholder route of the admins sharing a router path prefix, used by the lazy mode of the site.
+    The admins routes and schemas are built on the first request matching the prefix,
+    then the placeholder is replaced by the built routes in the site router.
+    """
+
+    def __init__(self, site: "BaseAdminSite", path: str):
+        self.site = site
+        self.path = path
+        self.admins: List[RouterAdmin] = []
+        self.routes: Optional[List[BaseRoute]] = None
+
+    def matches(self, scope: Scope) -> Tuple[Match, Scope]:
+        if scope["type"] in {"http", "websocket"}:
+            path = get_route_path(scope)
+            if path == self.path or path.startswith(f"{self.path}/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, **path_params: Any) -> URLPath:
+        if self.routes is None:
+            return self.site.lazy_url_path_for(name, **path_params)
+        for route in self.routes:
+            try:
+                return route.url_path_for(name, **path_params)
+            except NoMatchFound:
+                pass
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.install()
+        await self.site.router(scope, receive, send)  # dispatch again, to the built routes
+
+    def build(self) -> List[BaseRoute]:
+        """Register the admins routes. The site router is left unchanged, see `install`."""
+        if self.routes is None:
+            routes = []
+            for admin in self.admins:
+                routes.extend(self.site.build_admin_routes(admin))
+            self.routes = routes
+            self.site.fastapi.openapi_schema = None
+        return self.routes
+
+    def install(self) -> None:
+        """Build the admins routes, and replace the placeholder with them in the site router.
+        Not called while the site router routes are iterated, e.g. by `url_path_for`."""
+        routes = self.build()
+        site_routes = self.site.router.routes
+        if self in site_routes:
+            index = site_routes.index(self)
+            site_routes[index : index + 1] = routes
+
+
+class AdminRegistry:
+    """Indexes of the admins registered in a site and in all its nested apps.
+    The registry is shared by all the apps of a site, and it is updated by `register_admin`/`unregister_admin`
+    and when an admin instance is created.
+    """
+
+    def __init__(self):
+        # admin class -> apps in which the class is registered
+        self.owners: Dict[Type[BaseAdmin], List["AdminApp"]] = defaultdict(list)
+        # table name -> instances of the model admins bound to the table
+        self.tables: Dict[str, List["ModelAdmin"]] = defaultdict(list)
+        # app -> number of the `ModelAdmin`/`AdminApp` classes registered in the app without instance yet
+        self.pending: Dict["AdminApp", int] = defaultdict(int)
+
+    @staticmethod
+    def is_pending_cls(admin_cls: Type[BaseAdmin]) -> bool:
+        return issubclass(admin_cls, (ModelAdmin, AdminApp))
+
+    def has_pending(self, app: "AdminApp") -> bool:
+        """Whether a class without instance yet is registered in the app or in its nested apps"""
+        return any(count and app._is_nested_app(owner) for owner, count in self.pending.items())
+
+    def add(self, app: "AdminApp", admin_cls: Type[BaseAdmin], admin: Optional[BaseAdmin] = None) -> None:
+        self.owners[admin_cls].append(app)
+        if admin is None:
+            self._add_pending(app, self.is_pending_cls(admin_cls))
+        else:
+            self._add_table(admin)
+
+    def set_instance(self, app: "AdminApp", admin: BaseAdmin) -> None:
+        self._add_pending(app, -self.is_pending_cls(type(admin)))
+        self._add_table(admin)
+
+    def remove(self, app: "AdminApp", admin_cls: Type[BaseAdmin], admin: Optional[BaseAdmin] = None) -> None:
+        owners = self.owners.get(admin_cls)
+        if owners and app in owners:
+            owners.remove(app)
+            if not owners:
+                del self.owners[admin_cls]
+        if admin is None:
+            self._add_pending(app, -self.is_pending_cls(admin_cls))
+        elif isinstance(admin, ModelAdmin) and admin.bind_model:
+            admins = self.tables.get(admin.model.__table__.name)
+            if admins and admin in admins:
+                admins.remove(admin)
+        elif isinstance(admin, AdminApp):  # the entries of the nested apps go with the app
+            for cls, nested_admin in admin._registered.items():
+                self.remove(admin, cls, nested_admin)
+            self.pending.pop(admin, None)
+
+    def _add_pending(self, app: "AdminApp", count: int) -> None:
+        if count:
+            self.pending[app] += count
+            if not self.pending[app]:
+                del self.pending[app]
+
+    def _add_table(self, admin: BaseAdmin) -> None:
+        if isinstance(admin, ModelAdmin) and admin.bind_model:
+            self.tables[admin.model.__table__.name].append(admin)
+
+
 class AdminApp(PageAdmin, AdminGroup):
     """Manage applications"""
 
@@ -1334,7 +1861,10 @@ class AdminApp(PageAdmin, AdminGroup):
         AdminGroup.__init__(self, app)
         self.engine = self.engine or self.app.engine
         self.db = get_engine_db(self.engine)
+        if self.site.metrics is not None:
+            self.site.metrics.instrument_database(self.db)
         self._registered: Dict[Type[BaseAdminT], Optional[BaseAdminT]] = {}
+        self._registry: AdminRegistry = AdminRegistry() if self.app is self else self.app._registry
         self.__register_lock = False
 
     @property
@@ -1359,6 +1889,10 @@ class AdminApp(PageAdmin, AdminGroup):
             return admin
         # create admin instance
         admin = admin_cls(self)
+        if admin_cls in self._registered:
+            self._registry.set_instance(self, admin)
+        else:
+            self._registry.add(self, admin_cls, admin)
         self._registered[admin_cls] = admin
         if isinstance(admin, PageSchemaAdmin):
             self.append_child(admin)
@@ -1369,19 +1903,39 @@ class AdminApp(PageAdmin, AdminGroup):
         admin_cls: Type[BaseAdminT],
     ) -> Optional[BaseAdminT]:
         """Get or create admin instance in nested app"""
-        if admin_cls in self._registered:
-            return self.get_admin_or_create(admin_cls, register=False, nested=False)
-        for app_cls, app in self._registered.items():
-            if not issubclass(app_cls, AdminApp):
-                continue
-            app = self.get_admin_or_create(app_cls, register=False, nested=False)
-            if app is None:
-                continue
-            admin = app._get_admin_or_create_nested(admin_cls)
-            if admin:
-                return admin
+        app = self._find_registered_app(admin_cls)
+        if app is None and self._registry.has_pending(self):
+            # The class may be registered by a nested app which is not instantiated yet.
+            self._create_nested_admins()
+            app = self._find_registered_app(admin_cls)
+        return app and app.get_admin_or_create(admin_cls, register=False, nested=False)
+
+    def _find_registered_app(self, admin_cls: Type[BaseAdmin]) -> Optional["AdminApp"]:
+        """Find the app, nested in the current app, in which `admin_cls` is registered"""
+        for app in self._registry.owners.get(admin_cls, ()):
+            if self._is_nested_app(app):
+                return app
         return None
 
+    def _is_nested_app(self, app: "AdminApp", same_engine: bool = False) -> bool:
+        """Whether `app` is the current app, or an app registered in it at any depth"""
+        while app is not self:
+            parent = app.app
+            if parent is app or parent._registered.get(type(app)) is not app:
+                return False
+            if same_engine and app.engine is not parent.engine:
+                return False
+            app = parent
+        return True
+
+    def _create_nested_admins(self, model_admin: bool = False) -> None:
+        """Create the instances of the nested apps, and optionally of the model admins, at any depth"""
+        for admin_cls in list(self._registered.keys()):
+            if issubclass(admin_cls, AdminApp) or (model_admin and issubclass(admin_cls, ModelAdmin)):
+                admin = self.get_admin_or_create(admin_cls, register=False, nested=False)
+                if isinstance(admin, AdminApp):
+                    admin._create_nested_admins(model_admin)
+
     def _create_admin_instance_all(self) -> None:
         [self.get_admin_or_create(admin_cls) for admin_cls in self._registered.keys()]
 
@@ -1391,7 +1945,12 @@ class AdminApp(PageAdmin, AdminGroup):
     def _register_admin_router_all(self):
         for admin in self._registered.values():
             if isinstance(admin, RouterAdmin):  # register route
+                if self.site.lazy_router and not isinstance(admin, AdminApp) and admin.router is not self.router:
+                    self.site.add_lazy_admin(admin)
+                    continue
                 admin.register_router()
+                if self.site.metrics is not None:
+                    self.site.metrics.bind_routes(admin)
                 self.router.include_router(admin.router)
 
     def register_router(self):
@@ -1400,31 +1959,40 @@ class AdminApp(PageAdmin, AdminGroup):
             self._create_admin_instance_all()
             self._register_admin_router_all_pre()
             self._register_admin_router_all()
+            if self.site.metrics is not None:
+                self.site.metrics.bind_routes(self)
             self.__register_lock = True
         return self
 
-    @lru_cache()  # noqa: B019
     def get_model_admin(self, table_name: str) -> Optional[ModelAdmin]:
-        for admin_cls, admin in self._registered.items():
-            if not issubclass(admin_cls, (ModelAdmin, AdminApp)):
-                continue
-            admin = self.get_admin_or_create(admin_cls, register=False)
-            if admin is None:
-                continue
-            if issubclass(admin_cls, ModelAdmin) and admin.bind_model and admin.model.__table__.name == table_name:
+        """Get the model admin bound to the table, in the current app or in its nested apps using the same engine"""
+        admin = self._find_model_admin(table_name)
+        if admin is None and self._registry.has_pending(self):
+            self._create_nested_admins(model_admin=True)
+            admin = self._find_model_admin(table_name)
+        return admin
+
+    def _find_model_admin(self, table_name: str) -> Optional[ModelAdmin]:
+        for admin in self._registry.tables.get(table_name, ()):
+            if admin.app._registered.get(type(admin)) is admin and self._is_nested_app(admin.app, same_engine=True):
                 return admin
-            elif isinstance(admin, AdminApp) and self.engine is admin.engine:
-                admin = admin.get_model_admin(table_name)
-                if admin:
-                    return admin
         return None
 
     def register_admin(self, *admin_cls: Type[BaseAdminT]) -> Type[BaseAdminT]:
-        [self._registered.update({cls: None}) for cls in admin_cls if cls]
+        for cls in admin_cls:
+            if cls:
+                if cls in self._registered:  # registering again drops the existing instance
+                    self._registry.remove(self, cls, self._registered[cls])
+                self._registered[cls] = None
+                self._registry.add(self, cls)
+        self.site.html_cache.aliases.clear()
         return admin_cls[0]
 
     def unregister_admin(self, *admin_cls: Type[BaseAdmin]):
-        [self._registered.pop(cls) for cls in admin_cls if cls in self._registered]
+        for cls in admin_cls:
+            if cls in self._registered:
+                self._registry.remove(self, cls, self._registered.pop(cls))
+        self.site.html_cache.aliases.clear()
 
     def get_page_schema(self) -> Optional[PageSchema]:
         if super().get_page_schema():
@@ -1487,6 +2055,20 @@ class BaseAdminSite(AdminApp):
         self.amis_parser = AmisParser(
             image_receiver=self.settings.amis_image_receiver,
             file_receiver=self.settings.amis_file_receiver,
+            file_chunk_receiver=self.settings.amis_file_chunk_receiver,
+            image_thumbnail=self.settings.amis_image_thumbnail,
+        )
+        self.cache = CacheManager(self.settings.cache_path)
+        self.html_cache = PageHTMLCache(
+            maxsize=self.settings.amis_html_cache_size,
+            cache=self.cache.create("amis_html", maxsize=self.settings.amis_html_cache_size),
+        )
+        self.broker = EventBroker(channel=self.cache.channel)
+        self.metrics: Optional[MetricsRegistry] = MetricsRegistry() if self.settings.metrics_enabled else None
+        self.jobs = JobManager(
+            SqliteJobStore(self.settings.job_store_path) if self.settings.job_store_path else MemoryJobStore(),
+            max_workers=self.settings.job_max_workers,
+            logger=self.settings.logger,
         )
         kwargs = (
             {
@@ -1501,6 +2083,8 @@ class BaseAdminSite(AdminApp):
         )
 
         self.fastapi = fastapi or FastAPI(**kwargs)
+        if self.metrics is not None:
+            self.fastapi.add_middleware(MetricsMiddleware, metrics=self.metrics)
         self.router = self.fastapi.router
         if engine:
             self.engine = engine
@@ -1509,11 +2093,120 @@ class BaseAdminSite(AdminApp):
         elif settings.database_url:
             self.engine = Database.create(settings.database_url, echo=settings.debug)
         super().__init__(self)
+        self.lazy_router: bool = False
+        self.lazy_warmup: bool = False
+        self._lazy_routes: Dict[str, LazyAdminRoute] = {}
+        self._warmup_task: Optional[asyncio.Future] = None
 
     @cached_property
     def router_path(self) -> str:
         return self.settings.site_url + self.settings.site_path + self.router.prefix
 
+    async def get_job_owner(self, request: Request) -> Optional[str]:
+        """The owner of the background jobs submitted by the request: only the owner can read them through `JobAdmin`.
+        By default, the identity of the authenticated `request.user`, or None to let anyone holding the job id read it.
+        Auth backends not setting `request.user` should override it.
+        """
+        user = request.scope.get("user")
+        if user is None or not getattr(user, "is_authenticated", False):
+            return None
+        try:
+            return str(user.identity)
+        except NotImplementedError:
+            return user.display_name
+
+    async def on_startup(self) -> None:
+        """Run on the startup of the application the site is mounted on: start the warmup of the lazy routes."""
+        if self.lazy_router and self.lazy_warmup:
+            self._warmup_task = asyncio.ensure_future(self.warmup_lazy_routes())
+
+    async def on_shutdown(self) -> None:
+        """Run on the shutdown of the application the site is mounted on: cancel the background jobs."""
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            self._warmup_task = None
+        await self.jobs.shutdown()
+        self.broker.close()
+
+    def _wrap_lifespan(self, fastapi: FastAPI) -> None:
+        # The mounted applications get no lifespan events, so hook the site into the lifespan of the parent application.
+        # Wrapping the lifespan context works both with a `lifespan` and with the startup/shutdown event handlers.
+        lifespan_context = fastapi.router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(app):
+            async with lifespan_context(app) as state:
+                await self.on_startup()
+                try:
+                    yield state
+                finally:
+                    await self.on_shutdown()
+
+        fastapi.router.lifespan_context = lifespan
+
+    def add_lazy_admin(self, admin: RouterAdmin) -> None:
+        """Defer the routes registration of the admin, until the first request to its router path prefix."""
+        path = admin.router.prefix
+        app = admin.app
+        while app is not self:
+            path = app.router.prefix + path
+            app = app.app
+        path = self.router.prefix + path
+        route = self._lazy_routes.get(path)
+        if route is None:
+            route = self._lazy_routes[path] = LazyAdminRoute(self, path)
+            self.router.routes.append(route)
+        route.admins.append(admin)
+
+    def build_admin_routes(self, admin: RouterAdmin) -> List[BaseRoute]:
+        """Register the routes of the admin, and return them as they would be included in the site router."""
+        admin.register_router()
+        if self.metrics is not None:
+            self.metrics.bind_routes(admin)
+        router, app = admin.router, admin.app
+        while True:  # include the router through the routers of the parent apps, for their prefixes and dependencies
+            parent = copy.copy(app.router)
+            parent.routes = []
+            parent.include_router(router)
+            router = parent
+            if app is self:
+                break
+            app = app.app
+        return router.routes
+
+    def build_lazy_routes(self) -> None:
+        """Build all the routes deferred by the lazy mode."""
+        for route in list(self._lazy_routes.values()):
+            route.install()
+
+    async def warmup_lazy_routes(self) -> None:
+        """Build the routes deferred by the lazy mode in background, one router path prefix at a time."""
+        for route in list(self._lazy_routes.values()):
+            route.install()
+            await asyncio.sleep(0)
+
+    def lazy_url_path_for(self, name: str, **path_params: Any) -> URLPath:
+        """Resolve a route name for the placeholders of the lazy mode. The routes already built are searched first,
+        then the deferred routes are built one router path prefix at a time, until one of them has the name."""
+        built = [route for route in self.router.routes if not isinstance(route, LazyAdminRoute)]
+        for lazy_route in self._lazy_routes.values():
+            if lazy_route.routes is not None:
+                built.extend(lazy_route.routes)
+        for route in built:
+            try:
+                return route.url_path_for(name, **path_params)
+            except NoMatchFound:
+                pass
+        for lazy_route in list(self._lazy_routes.values()):
+            if lazy_route.routes is not None:
+                continue
+            for route in lazy_route.build():  # installed by the next request to the prefix
+                try:
+                    return route.url_path_for(name, **path_params)
+                except NoMatchFound:
+                    pass
+        raise NoMatchFound(name, path_params)
+
     def mount_app(
         self,
         fastapi: FastAPI,
@@ -1521,6 +2214,8 @@ class BaseAdminSite(AdminApp):
         name: str = "admin",
         enable_exception_handlers: bool = True,
         enable_db_middleware: bool = True,
+        lazy: bool = False,
+        warmup: bool = False,
     ) -> None:
         """
         Mount app to fastapi, the path is: site.settings.site_path.
@@ -1531,9 +2226,16 @@ class BaseAdminSite(AdminApp):
             name (str, optional): The name of the app. Defaults to "admin".
             enable_exception_handlers (bool, optional): Whether to enable exception handlers. Defaults to True.
             enable_db_middleware (bool, optional): Whether to enable database middleware. Defaults to True.
+            lazy (bool, optional): Whether to defer the routes and schemas of the admins until the first request
+                to their router path prefix. The OpenAPI docs only list the routes already built. Defaults to False.
+            warmup (bool, optional): In lazy mode, whether to build the deferred routes in background on startup.
+                Defaults to False.
         """
         self.application = fastapi
+        self.lazy_router = lazy
+        self.lazy_warmup = warmup
         self.register_router()
+        self._wrap_lifespan(fastapi)
         fastapi.mount(self.settings.site_path, self.fastapi, name=name)
         if enable_exception_handlers:
             register_exception_handlers(self.fastapi)
@@ -0,0 +1,111 @@
+import gzip
+import hashlib
+from typing import Callable, Dict, Hashable, Optional
+
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, Response
+
+from fastapi_amis_admin.amis.types import AmisNode
+from fastapi_amis_admin.utils.cache import CacheBackend, LRUCache
+from fastapi_amis_admin.utils.http import get_accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+
+class RenderedHTML:
+    """A rendered html page, with its precompressed variants and strong ETag."""
+
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+        self._variants: Dict[str, bytes] = {"identity": body}
+
+    def get_variant(self, encoding: str) -> bytes:
+        """Get the body compressed with `encoding`; the compressed variant is built once and then reused."""
+        variant = self._variants.get(encoding)
+        if variant is None:
+            if encoding == "br":
+                variant = brotli.compress(self.body)
+            elif encoding == "gzip":
+                variant = gzip.compress(self.body, mtime=0)
+            else:
+                raise ValueError(f"Unsupported content encoding: {encoding}")
+            self._variants[encoding] = variant
+        return variant
+
+    def get_etag(self, encoding: str) -> str:
+        # Each encoding is a different representation, so it gets its own strong validator.
+        return f'"{self.etag}"' if encoding == "identity" else f'"{self.etag}-{encoding}"'
+
+
+class PageHTMLCache:
+    """Render cache for the html shell of amis pages.
+    The html page is keyed by the template, the site settings and the hash of the page schema,
+    so it is only rendered and compressed once for a given admin, language and permission set.
+    The pages identified by an alias, i.e. the inputs they are built from, are only serialized to hash their schema
+    once per process.
+    """
+
+    minimum_size: int = 500  # Do not compress smaller pages
+
+    def __init__(self, maxsize: int = 256, cache: CacheBackend[RenderedHTML] = None):
+        # The compressed variants are added to the pages kept in the process, so a shared cache is only a second level.
+        self.local: LRUCache[RenderedHTML] = LRUCache(maxsize=maxsize)
+        self.cache: CacheBackend[RenderedHTML] = cache if cache is not None else self.local
+        # alias -> key of the page. Kept in the process: the shared cache stays keyed by the schema, e.g. across deploys.
+        self.aliases: LRUCache[str] = LRUCache(maxsize=maxsize)
+
+    @staticmethod
+    def make_key(schema_json: str, **params: Optional[str]) -> str:
+        digest = hashlib.sha1(schema_json.encode("utf-8"))
+        for name in sorted(params):
+            digest.update(f"\0{name}={params[name]}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_key(self, page: AmisNode, alias: Optional[Hashable] = None, **params: Optional[str]) -> str:
+        """The key of the page rendered with `params`. With an `alias`, the schema is only serialized the first time."""
+        if alias is None:
+            return self.make_key(page.amis_json(), **params)
+        alias = (alias, tuple(sorted(params.items())))
+        key = self.aliases.get(alias)
+        if key is None:
+            key = self.make_key(page.amis_json(), **params)
+            self.aliases.set(alias, key)
+        return key
+
+    async def get_or_render(self, key: str, render: Callable[[], str]) -> RenderedHTML:
+        html = self.local.get(key)
+        if html is None:
+            html = None if self.cache is self.local else await self.cache.aget(key)
+            if html is None:
+                html = RenderedHTML(render().encode("utf-8"), etag=key)
+                await self.cache.aset(key, html)
+            self.local.set(key, html)
+        return html
+
+    def select_encoding(self, request: Request, html: RenderedHTML) -> str:
+        if len(html.body) < self.minimum_size:
+            return "identity"
+        encodings = ["br", "gzip"] if brotli is not None else ["gzip"]
+        accepted = get_accepted_encodings(request.headers.get("accept-encoding", ""), encodings)
+        return accepted[0] if accepted else "identity"
+
+    def response(self, request: Request, html: RenderedHTML) -> Response:
+        """Build the response for `html`. Return `304 Not Modified` if the client already has it."""
+        encoding = self.select_encoding(request, html)
+        etag = html.get_etag(encoding)
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            # The page depends on the user's permissions, so it must be revalidated and never shared.
+            "Cache-Control": "private, no-cache",
+        }
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return HTMLResponse(html.get_variant(encoding), headers=headers)
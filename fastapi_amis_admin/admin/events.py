@@ -0,0 +1,130 @@
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from fastapi_amis_admin.utils.cache import InvalidationChannel
+from fastapi_amis_admin.utils.functools import cached_property
+
+
+class Subscription:
+    """The events of a topic received by one subscriber. The queue is bounded: when the subscriber is too slow,
+    the oldest events are dropped, as a change notification only matters until the next one."""
+
+    def __init__(self, broker: "EventBroker", topic: str, maxsize: int = 100):
+        self.broker = broker
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize)
+
+    def put(self, data: Any) -> None:
+        # May be called from another thread, e.g. by a sync session committed in the threadpool.
+        self.loop.call_soon_threadsafe(self._put, data)
+
+    def _put(self, data: Any) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(data)
+
+    async def get(self) -> Any:
+        return await self.queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """Publish/subscribe of the events of the admin site, e.g. the data changes of the models.
+    With a `channel`, e.g. the `InvalidationChannel` of `site.cache`, the events are also sent to the subscribers
+    of the other worker processes, which poll the channel while they have subscribers.
+    """
+
+    namespace: str = "amis_admin_events"  # The namespace of the events in the channel
+
+    def __init__(self, maxsize: int = 100, channel: InvalidationChannel = None):
+        self.maxsize = maxsize
+        self.channel = channel
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+        if channel is not None:
+            channel.register(self.namespace, self._receive)
+
+    @cached_property
+    def _sender(self) -> ThreadPoolExecutor:
+        # A single thread, so that the events are sent in order, without blocking the event loop on the sqlite writes.
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="faa-events")
+
+    def has_subscribers(self, topic: str) -> bool:
+        return bool(self._subscriptions.get(topic))
+
+    def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(self, topic, maxsize=self.maxsize)
+        with self._lock:
+            self._subscriptions[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.topic)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.topic]
+
+    def publish(self, topic: str, data: Any) -> int:
+        """Send the event to the subscribers of the topic, and to the other processes through the channel.
+        Return the number of subscribers of the current process."""
+        if self.channel is not None:
+            self._sender.submit(self.channel.send, self.namespace, json.dumps([topic, data]))
+        return self._publish_local(topic, data)
+
+    def _publish_local(self, topic: str, data: Any) -> int:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.put(data)
+        return len(subscriptions)
+
+    def _receive(self, message: Optional[str]) -> None:
+        topic, data = json.loads(message)
+        self._publish_local(topic, data)
+
+    async def poll(self) -> None:
+        """Receive the events of the other processes, at most every `poll_interval` seconds of the channel."""
+        if self.channel is not None and self.channel.poll_due():
+            await run_in_threadpool(self.channel.poll)
+
+    def close(self) -> None:
+        if "_sender" in self.__dict__:
+            self._sender.shutdown(wait=True)
+
+    async def event_stream(
+        self, request: Request, topic: str, event: str = "message", heartbeat: float = 15
+    ) -> AsyncIterator[str]:
+        """Server-sent events stream of the topic, until the client disconnects.
+        A comment is sent every `heartbeat` seconds without events, so that the proxies keep the connection open.
+        """
+        subscription = self.subscribe(topic)
+        timeout = heartbeat if self.channel is None else min(heartbeat, self.channel.poll_interval or heartbeat)
+        try:
+            yield "retry: 3000\n\n"
+            sent = time.monotonic()
+            while not await request.is_disconnected():
+                await self.poll()
+                try:
+                    data = await asyncio.wait_for(subscription.get(), timeout)
+                except asyncio.TimeoutError:
+                    if time.monotonic() - sent >= heartbeat:
+                        sent = time.monotonic()
+                        yield ": ping\n\n"
+                    continue
+                sent = time.monotonic()
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            subscription.close()
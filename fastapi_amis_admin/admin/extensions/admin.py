@@ -1,9 +1,11 @@
 import asyncio
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Sequence, Set, Union
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Optional, Sequence, Set, Union
 
+from sqlalchemy import select
 from sqlalchemy.engine import Result
 from sqlalchemy.sql import Select
+from sqlalchemy.sql.visitors import replacement_traverse
 from starlette.requests import Request
 
 from fastapi_amis_admin.admin.admin import AdminAction, AdminApp, FormAdmin, ModelAdmin
@@ -13,7 +15,8 @@ from fastapi_amis_admin.amis import FormItem, SchemaNode, TableColumn, TableCRUD
 from fastapi_amis_admin.crud.base import ItemListSchema, SchemaCreateT, SchemaFilterT, SchemaModelT, SchemaReadT, SchemaUpdateT
 from fastapi_amis_admin.crud.parser import TableModelT
 from fastapi_amis_admin.crud.schema import CrudEnum
-from fastapi_amis_admin.utils.functools import cached_property
+from fastapi_amis_admin.utils.cache import CacheBackend
+from fastapi_amis_admin.utils.functools import cached_property, scope_cached
 from fastapi_amis_admin.utils.pydantic import ModelField
 from fastapi_amis_admin.utils.translation import i18n as _
 
@@ -49,7 +52,9 @@ class ReadOnlyModelAdmin(ModelAdmin):
 
 
 class AutoTimeModelAdmin(ModelAdmin):
-    """禁止修改模型管理时间字段.没有Id,创建时间,更新时间,删除时间等字段的创建和更新"""
+    """禁止修改模型管理时间字段.没有Id,创建时间,更新时间,删除时间等字段的创建和更新
+    - 模型定义了update_time字段时,默认作为列表增量查询(`?since=`)的水位字段`delta_field`.
+    """
 
     create_exclude = {
         "id",
@@ -64,6 +69,11 @@ class AutoTimeModelAdmin(ModelAdmin):
         "delete_time",
     }
 
+    def __init__(self, app: "AdminApp"):
+        if self.delta_field is None and hasattr(self.model, "update_time"):
+            self.delta_field = "update_time"
+        super().__init__(app)
+
 
 class SoftDeleteModelAdmin(AutoTimeModelAdmin):
     """软删除模型管理Mixin.
@@ -73,14 +83,32 @@ class SoftDeleteModelAdmin(AutoTimeModelAdmin):
     def __init__(self, app: "AdminApp"):
         super().__init__(app)
         assert hasattr(self.model, "delete_time"), "SoftDeleteModelAdmin需要在模型中定义delete_time字段"
+        # 未删除条件使用同一个对象,以便get_deleted_select在列表查询中找到并替换它
+        self._not_deleted_clause = self.model.delete_time.is_(None)
 
     async def get_select(self, request: Request):
         sel = await super().get_select(request)
-        return sel.where(self.model.delete_time == None)  # noqa E711
+        return sel.where(self._not_deleted_clause)
 
     def delete_item(self, obj: SchemaModelT) -> None:
         obj.delete_time = datetime.now()
 
+    async def get_deleted_select(self, request: Request, sel: Select) -> Optional[Select]:
+        """列表增量查询的删除标记: 将列表查询中的未删除条件替换为已删除条件,
+        保留筛选条件和数据集权限,避免返回用户无权查看的数据主键."""
+        replaced = []
+
+        def replace(element):
+            if element is self._not_deleted_clause:
+                replaced.append(element)
+                return self.model.delete_time.is_not(None)
+            return None
+
+        sel = replacement_traverse(sel, {}, replace)
+        if not replaced:  # 列表查询中没有未删除条件,无法确定删除标记
+            return None
+        return sel.with_only_columns(self.pk, self.model.delete_time, maintain_column_froms=True)
+
 
 class FootableModelAdmin(ModelAdmin):
     """为模型管理Amis表格添加底部展示(Footable)属性"""
@@ -117,9 +145,16 @@ class BaseAuthFieldModelAdmin(ModelAdmin):
     """指定的字段,进行权限验证."""
     perm_fields_exclude: Dict[Union[FieldPermEnum, int], Sequence[str]] = None
     """exclude指定的字段,不进行权限验证."""
+    field_permission_cache_ttl: float = 60
+    """没有权限字段的跨请求缓存时间(秒),需要同时实现`get_permission_cache_key`.为0时不缓存."""
+    field_permission_cache_size: int = 1024
+    """没有权限字段的跨请求缓存最大数量"""
 
     def __init__(self, app: "AdminApp"):
         super().__init__(app)
+        self.field_permission_cache: CacheBackend[FrozenSet[str]] = self.site.cache.create(
+            f"field_permission:{self.unique_id}", maxsize=self.field_permission_cache_size, ttl=self.field_permission_cache_ttl
+        )
 
     def get_permission_fields(self, action: str) -> Dict[str, str]:
         """获取权限字段"""
@@ -174,6 +209,18 @@ class BaseAuthFieldModelAdmin(ModelAdmin):
         """判断用户是否有字段权限"""
         return True
 
+    async def get_field_permissions(self, request: Request, fields: Iterable[str], action: str = "") -> Set[str]:
+        """批量判断用户的字段权限,返回没有权限的字段.
+        默认逐个调用`has_field_permission`,如果权限数据需要查询数据库,建议覆盖此方法,一次查询所有字段的权限.
+        """
+        return {field for field in fields if not await self.has_field_permission(request, field, action)}
+
+    async def get_permission_cache_key(self, request: Request) -> Optional[Hashable]:
+        """获取字段权限跨请求缓存的键,例如: (用户id, 角色版本号).
+        用户或角色的权限发生变化时,需要改变返回的键使缓存失效.默认使用站点的`get_permission_cache_key`,返回None时不进行跨请求缓存.
+        """
+        return await super().get_permission_cache_key(request)
+
     async def get_deny_fields(self, request: Request, action: str = None) -> Set[str]:
         """获取没有权限的字段"""
         cache_key = f"{self.unique_id}_exclude_fields"
@@ -193,15 +240,40 @@ class BaseAuthFieldModelAdmin(ModelAdmin):
             check_fields = self.read_permission_fields.keys()
         else:
             pass
-        fields = {field for field in check_fields if not await self.has_field_permission(request, field, action)}
+        fields = set()
+        if check_fields:
+            permission_key = await self.get_permission_cache_key(request) if self.field_permission_cache.ttl else None
+            if permission_key is None:
+                fields = await self.get_field_permissions(request, check_fields, action)
+            else:  # 跨请求缓存
+                cached = await self.field_permission_cache.aget((permission_key, action))
+                if cached is None:
+                    cached = frozenset(await self.get_field_permissions(request, check_fields, action))
+                    await self.field_permission_cache.aset((permission_key, action), cached)
+                fields = set(cached)
         request_cache[action] = fields
         if cache_key not in request.scope:
             request.scope[cache_key] = request_cache
         return fields
 
+    async def get_select(self, request: Request) -> Select:
+        """从查询列中移除没有权限的字段,避免查询和解析用户无法查看的数据"""
+        sel = await super().get_select(request)
+        exclude = await self.get_deny_fields(request, "list")
+        if not exclude:
+            return sel
+        keys = self.parser.get_select_keys(sel)
+        columns = [column for key, column in zip(keys, sel.exported_columns) if key not in exclude]
+        if not columns:  # 至少需要保留一个查询列,交由on_list_after过滤
+            return sel
+        return sel.with_only_columns(*columns, maintain_column_froms=True)
+
     async def on_list_after(self, request: Request, result: Result, data: ItemListSchema, **kwargs) -> ItemListSchema:
         """Parse the database data query result dictionary into schema_list."""
-        exclude = await self.get_deny_fields(request, "list")  # 过滤没有权限的字段
+        exclude = await self.get_deny_fields(request, "list")
+        if not exclude.issuperset(self._select_entities):
+            # 没有权限的字段已经在get_select中移除,无需再逐行过滤
+            return await super().on_list_after(request, result, data, **kwargs)
         data = await super().on_list_after(request, result, data, **kwargs)
         data.items = [item.dict(exclude=exclude) for item in data.items]  # 过滤没有权限的字段
         return data
@@ -266,26 +338,83 @@ class BaseAuthSelectModelAdmin(ModelAdmin):
 
     select_permissions: List[SelectPerm] = []
     """需要进行权限控制的数据集列表"""
+    select_clause_cache_ttl: float = 60
+    """可缓存权限(`SelectPerm.cacheable`)生成的where子句的跨请求缓存时间(秒),需要同时实现`get_permission_cache_key`.为0时不缓存."""
+    select_clause_cache_size: int = 1024
+    """where子句跨请求缓存的最大数量"""
+
+    def __init__(self, app: "AdminApp"):
+        super().__init__(app)
+        # The sqlalchemy clauses can not be shared by the processes, they are only cached in the process.
+        self.select_clause_cache: CacheBackend[tuple] = self.site.cache.create(
+            f"select_clause:{self.unique_id}",
+            maxsize=self.select_clause_cache_size,
+            ttl=self.select_clause_cache_ttl,
+            shared=False,
+        )
 
     async def has_select_permission(self, request: Request, name: str) -> bool:
         """判断用户是否有数据集权限"""
         return True
 
+    async def get_permission_cache_key(self, request: Request) -> Optional[Hashable]:
+        """获取where子句跨请求缓存的键,例如: (用户id, 角色版本号).
+        用户或角色的权限发生变化时,需要改变返回的键使缓存失效.默认使用站点的`get_permission_cache_key`,返回None时不进行跨请求缓存.
+        """
+        return await super().get_permission_cache_key(request)
+
+    async def get_select_permissions(self, request: Request) -> List[SelectPerm]:
+        """获取对当前用户生效的数据集权限列表.所有权限逐个判断(可能共用请求的数据库会话),并且在同一个请求中只判断一次."""
+
+        async def get_permissions():
+            permissions = []
+            for permission in self.select_permissions:
+                if not isinstance(permission, SelectPerm):
+                    continue
+                effect = await self.has_select_permission(request, permission.name)
+                # 如果权限为反向权限,则判断用户是否没有权限
+                if permission.reverse ^ effect:
+                    permissions.append(permission)
+            return permissions
+
+        return await scope_cached(request and request.scope, (self.unique_id, "select_permissions"), get_permissions)
+
     async def get_select(self, request: Request) -> Select:
         sel = await super().get_select(request)
         return await self.filter_select(request, sel)
 
     async def filter_select(self, request: Request, sel: Select) -> Select:
         """在sel中添加权限过滤条件"""
-        for permission in self.select_permissions:
-            if not isinstance(permission, SelectPerm):
-                continue
-            effect = await self.has_select_permission(request, permission.name)
-            # 如果权限为反向权限,则判断用户是否没有权限
-            if permission.reverse ^ effect:
-                sel = permission.call(self, request, sel)
-                if asyncio.iscoroutine(sel):
-                    sel = await sel
+        permissions = await self.get_select_permissions(request)
+        cacheable = [permission for permission in permissions if permission.cacheable]
+        key = await self.get_permission_cache_key(request) if cacheable and self.select_clause_cache.ttl else None
+        if key is None:
+            return await self.apply_select_permissions(request, sel, permissions)
+        # 可缓存的权限生成的where子句,按照用户和生效的权限缓存
+        cache_key = (key, tuple(permission.name for permission in cacheable))
+        cached = await self.select_clause_cache.aget(cache_key)
+        if cached is None:
+            base = select(self.pk)
+            applied = await self.apply_select_permissions(request, base, cacheable)
+            clause = applied.whereclause
+            # 权限还添加了join等其他查询条件时,仅缓存where子句会丢失这些条件,因此不缓存
+            only_where = str(applied) == str(base.where(clause))
+            cached = (clause, only_where)
+            await self.select_clause_cache.aset(cache_key, cached)
+        clause, only_where = cached
+        if not only_where:
+            return await self.apply_select_permissions(request, sel, permissions)
+        if clause is not None:
+            sel = sel.where(clause)
+        others = [permission for permission in permissions if not permission.cacheable]
+        return await self.apply_select_permissions(request, sel, others)
+
+    async def apply_select_permissions(self, request: Request, sel: Select, permissions: List[SelectPerm]) -> Select:
+        """依次在sel中添加权限过滤条件"""
+        for permission in permissions:
+            sel = permission.call(self, request, sel)
+            if asyncio.iscoroutine(sel):
+                sel = await sel
         return sel
 
 
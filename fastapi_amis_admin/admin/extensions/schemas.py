@@ -29,6 +29,8 @@ class SelectPerm:
     label: str
     reverse: bool = False
     call: SelectPermCallable = None
+    cacheable: bool = False
+    """是否可以缓存该权限生成的where子句.只有生成的子句仅依赖于用户(见`get_permission_cache_key`)时,才可以设置为True."""
 
     def __post_init__(self):
         if self.call is None and hasattr(self, "_call"):
@@ -59,6 +61,7 @@ class UserSelectPerm(SelectPerm):
 
     user_column: str = "user_id"
     user_attr: str = "id"
+    cacheable: bool = True
 
     async def _call(self, admin: ModelAdmin, request: Request, sel: Select) -> Select:
         user = await admin.site.auth.get_current_user(request)
@@ -74,6 +77,7 @@ class SimpleSelectPerm(SelectPerm):
 
     values: Union[List[str], List[int]] = None
     column: str = "status"
+    cacheable: bool = True
 
     async def _call(self, admin: ModelAdmin, request: Request, sel: Select) -> Select:
         if not self.values:
@@ -89,6 +93,7 @@ class FilterSelectPerm(SelectPerm):
     """filter(where)子句选择数据集"""
 
     filters: list = None
+    cacheable: bool = True
 
     async def _call(self, admin: ModelAdmin, request: Request, sel: Select) -> Select:
         if not self.filters:
@@ -0,0 +1,231 @@
+import asyncio
+import functools
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextvars import ContextVar
+from enum import Enum
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple, Union
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from fastapi_amis_admin.crud.schema import BaseApiOut
+from fastapi_amis_admin.utils.functools import cached_property
+
+
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    success = "success"
+    failed = "failed"
+
+
+class Job(BaseModel):
+    """The state of a background job, polled by the clients through `/jobs/{job_id}`."""
+
+    id: str
+    name: str = ""
+    owner: Optional[str] = None  # The user who submitted the job; only the owner can read it
+    status: JobStatus = JobStatus.pending
+    done: int = 0
+    total: Optional[int] = None
+    progress: int = 0  # Percentage, for the amis `Progress` component
+    finished: bool = False  # The amis `asyncApi` convention
+    message: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = 0
+    updated_at: float = 0
+
+
+class JobStore:
+    """Storage of the jobs state. The methods are called by the `JobManager` on the event loop."""
+
+    async def save(self, job: Job) -> None:
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+    async def list(self, limit: int = 100) -> List[Job]:
+        """The most recent jobs first."""
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    """Keep the jobs in the process memory; the oldest jobs are dropped beyond `maxsize`. Lost on restart."""
+
+    def __init__(self, maxsize: int = 1000):
+        self.maxsize = maxsize
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    async def save(self, job: Job) -> None:
+        self._jobs[job.id] = job.copy()
+        while self.maxsize and len(self._jobs) > self.maxsize:
+            self._jobs.popitem(last=False)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        return job and job.copy()
+
+    async def list(self, limit: int = 100) -> List[Job]:
+        return [job.copy() for job in reversed(self._jobs.values())][:limit]
+
+
+class SqliteJobStore(JobStore):
+    """Keep the jobs in a sqlite database, so that they can be queried after a restart.
+    The jobs that were still pending or running when the process stopped are marked as failed.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL, data TEXT)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at)")
+        for job in self._list(-1):
+            if not job.finished:
+                job.status, job.finished, job.error = JobStatus.failed, True, "Interrupted"
+                self._save(job)
+
+    def _save(self, job: Job) -> None:
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, created_at, data) VALUES (?, ?, ?, ?)",
+                (job.id, job.status.value, job.created_at, json.dumps(jsonable_encoder(job))),
+            )
+
+    def _get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.parse_obj(json.loads(row[0])) if row else None
+
+    def _list(self, limit: int) -> List[Job]:
+        with self._lock:
+            rows = self._connection.execute("SELECT data FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [Job.parse_obj(json.loads(row[0])) for row in rows]
+
+    async def save(self, job: Job) -> None:
+        await run_in_threadpool(self._save, job)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await run_in_threadpool(self._get, job_id)
+
+    async def list(self, limit: int = 100) -> List[Job]:
+        return await run_in_threadpool(self._list, limit)
+
+
+_current_job: ContextVar[Optional[Tuple["JobManager", Job]]] = ContextVar("_current_job", default=None)
+
+
+async def report_progress(done: int, total: int = None, message: str = None) -> None:
+    """Report the progress of the current background job. Does nothing outside a job,
+    so the same code can run either in the request or in the background."""
+    current = _current_job.get()
+    if current is not None:
+        manager, job = current
+        await manager.update(job, done=done, total=total, message=message)
+
+
+class JobManager:
+    """Run coroutines as background jobs, at most `max_workers` at the same time, and store their progress.
+    Blocking or CPU bound work inside a job should go through `run_in_executor`, which uses a thread pool by default,
+    or the given executor, e.g. a `ProcessPoolExecutor`.
+    """
+
+    def __init__(
+        self,
+        store: JobStore = None,
+        *,
+        max_workers: int = 4,
+        executor: Executor = None,
+        logger: logging.Logger = None,
+    ):
+        self.store = store or MemoryJobStore()
+        self.max_workers = max_workers
+        self._executor = executor
+        self.logger = logger or logging.getLogger("fastapi_amis_admin")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @cached_property
+    def executor(self) -> Executor:
+        return self._executor or ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="faa-job")
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created on first use, so that it is bound to the running event loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+
+    async def submit(self, func: Callable[[], Awaitable[Any]], name: str = "", owner: str = None) -> Job:
+        """Schedule `func()` as a background job, and return the job immediately."""
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, name=name, owner=owner, created_at=now, updated_at=now)
+        await self.store.save(job)
+        task = asyncio.ensure_future(self._run(job, func))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: Job, func: Callable[[], Awaitable[Any]]) -> None:
+        token = _current_job.set((self, job))
+        try:
+            async with self.semaphore:
+                await self.update(job, status=JobStatus.running)
+                result = await func()
+        except asyncio.CancelledError:  # e.g. on shutdown; record the job as finished, then let the task be cancelled
+            self.logger.warning(f"Background job {job.name or job.id} cancelled")
+            await self.update(job, status=JobStatus.failed, error="Cancelled")
+            raise
+        except Exception as error:
+            self.logger.exception(f"Background job {job.name or job.id} failed")
+            await self.update(job, status=JobStatus.failed, error=str(error))
+        else:
+            if isinstance(result, BaseApiOut) and result.status != 0:  # The error responses of the handlers
+                await self.update(job, status=JobStatus.failed, error=result.msg, result=jsonable_encoder(result))
+            else:
+                await self.update(job, status=JobStatus.success, result=jsonable_encoder(result))
+        finally:
+            _current_job.reset(token)
+
+    async def update(self, job: Job, **values: Any) -> Job:
+        for key, value in values.items():
+            if value is not None:
+                setattr(job, key, value)
+        job.finished = job.status in (JobStatus.success, JobStatus.failed)
+        if job.total:
+            job.progress = min(100, job.done * 100 // job.total)
+        if job.status == JobStatus.success:
+            job.progress = 100
+        job.updated_at = time.time()
+        await self.store.save(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self.store.get(job_id)
+
+    async def run_in_executor(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking function in the executor of the jobs."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def shutdown(self) -> None:
+        """Cancel the running jobs and shutdown the executor."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if "executor" in self.__dict__:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,297 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+from fastapi.routing import APIRoute
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import Pool
+from sqlalchemy_database import AsyncDatabase, Database
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from fastapi_amis_admin.crud.schema import CrudEnum
+
+if TYPE_CHECKING:
+    from fastapi_amis_admin.admin.admin import RouterAdmin
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ROWS_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class Histogram:
+    """Cumulative histogram of the observed values, in the Prometheus convention: `le` upper bounds, plus `+Inf`."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimate the quantile by linear interpolation inside its bucket, as `histogram_quantile` of Prometheus.
+        The values beyond the last bucket are reported as its upper bound."""
+        if not self.count:
+            return 0.0
+        rank, cumulative = q * self.count, 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PoolStats:
+    """Checkout wait time and occupation of the connection pool of an engine.
+    The wait time is measured around `Pool._do_get`, so it includes the time to open a new connection.
+    `_do_get` is private to SQLAlchemy: the pools without it only report their occupation.
+    """
+
+    def __init__(self, engine: Union[Engine, AsyncEngine], histogram: Histogram):
+        self.engine: Engine = getattr(engine, "sync_engine", engine)
+        self.name = self.engine.url.render_as_string(hide_password=True)
+        self.wait = histogram
+        self.pool: Optional[Pool] = None
+        self._lock = threading.Lock()
+        self.instrument()
+
+    def instrument(self) -> None:
+        """Time the checkouts of the pool of the engine; called again when the pool is replaced, e.g. by `dispose`."""
+        pool = self.engine.pool
+        if pool is self.pool:
+            return
+        self.pool = pool
+        do_get = getattr(pool, "_do_get", None)
+        if not callable(do_get) or getattr(do_get, "pool_stats", None) is self:
+            return
+
+        def _do_get():
+            start = time.perf_counter()
+            try:
+                return do_get()
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.wait.observe(elapsed)
+
+        _do_get.pool_stats = self  # type: ignore
+        pool._do_get = _do_get
+
+    def status(self) -> Dict[str, Optional[float]]:
+        """The occupation of the pool. The pools without a queue, e.g. `NullPool` or `StaticPool`, only report the wait."""
+        self.instrument()
+        pool = self.pool
+        size, checkedout, overflow = (
+            getattr(pool, name)() if callable(getattr(pool, name, None)) else None for name in ("size", "checkedout", "overflow")
+        )  # E.g. the `size` of `SingletonThreadPool` is not a method
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        capacity = size + max_overflow if size is not None and max_overflow >= 0 else None
+        with self._lock:
+            wait_avg, wait_p95, checkouts = self.wait.mean, self.wait.quantile(0.95), self.wait.count
+        return {
+            "size": size,
+            "checkedout": checkedout,
+            "overflow": overflow,
+            "capacity": capacity,
+            "saturation": checkedout / capacity if capacity and checkedout is not None else None,
+            "wait_avg": wait_avg,
+            "wait_p95": wait_p95,
+            "checkouts": checkouts,
+        }
+
+
+class MetricsRegistry:
+    """The metrics of an admin site, kept in the process memory:
+    - the count and latency of the requests to the routes of the admins, by admin, route name and status;
+    - the number of rows returned or changed by the `ModelAdmin` routes;
+    - the checkout wait time and occupation of the connection pools of the databases of the admins.
+    Each worker process has its own registry; Prometheus aggregates the processes by their instance label.
+    """
+
+    route_names: FrozenSet[str] = frozenset(
+        [CrudEnum.list.value, CrudEnum.read.value, CrudEnum.create.value, CrudEnum.update.value, CrudEnum.delete.value, "page"]
+    )  # The routes measured, by name; the page route of the `PageAdmin`s is named `page`
+    prefix: str = "amis_admin"
+
+    def __init__(
+        self,
+        latency_buckets: Sequence[float] = LATENCY_BUCKETS,
+        rows_buckets: Sequence[float] = ROWS_BUCKETS,
+    ):
+        self.latency_buckets = latency_buckets
+        self.rows_buckets = rows_buckets
+        self._requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self._rows: Dict[Tuple[str, str], Histogram] = {}
+        self._pools: Dict[int, PoolStats] = {}
+        self._routes: Dict[Callable, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_admin_label(admin: "RouterAdmin") -> str:
+        """The `admin` label of the metrics: the router path of the admin, unique in the site unlike its class name."""
+        return admin.router_path or "/"
+
+    def bind_routes(self, admin: "RouterAdmin") -> None:
+        """Attribute the registered routes of the admin to it. The routes already bound to a nested admin are kept."""
+        page_path = getattr(admin, "page_path", None)
+        page_path = None if page_path is None else admin.router.prefix + page_path
+        for route in admin.router.routes:
+            if not isinstance(route, APIRoute):
+                continue
+            name = "page" if route.path == page_path else getattr(route.name, "value", route.name)  # CrudEnum names
+            if name in self.route_names:
+                self._routes.setdefault(route.endpoint, (self.get_admin_label(admin), name))
+
+    def instrument_database(self, db: Union[Database, AsyncDatabase]) -> None:
+        """Measure the connection pool of the database; the databases sharing an engine are measured once."""
+        engine = getattr(db.engine, "sync_engine", db.engine)
+        if id(engine) not in self._pools:
+            self._pools[id(engine)] = PoolStats(engine, Histogram(self.latency_buckets))
+
+    def get_route_labels(self, scope: Scope) -> Optional[Tuple[str, str]]:
+        """The admin and the route name of the request, once it was routed; None for the routes not measured."""
+        route = scope.get("route")
+        endpoint = getattr(route, "endpoint", None)
+        return self._routes.get(endpoint) if endpoint is not None else None
+
+    def observe_request(self, admin: str, route: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self._requests[(admin, route, status)] += 1
+            histogram = self._latency.get((admin, route))
+            if histogram is None:
+                histogram = self._latency[(admin, route)] = Histogram(self.latency_buckets)
+            histogram.observe(seconds)
+
+    def observe_rows(self, admin: str, route: str, rows: int) -> None:
+        with self._lock:
+            histogram = self._rows.get((admin, route))
+            if histogram is None:
+                histogram = self._rows[(admin, route)] = Histogram(self.rows_buckets)
+            histogram.observe(rows)
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """The summary of the metrics, by admin route and by database, e.g. for the charts of `MetricsAdmin`."""
+        with self._lock:
+            requests, errors = defaultdict(int), defaultdict(int)
+            for (admin, route, status), count in self._requests.items():
+                requests[(admin, route)] += count
+                if status >= 500:
+                    errors[(admin, route)] += count
+            routes = [
+                {
+                    "admin": admin,
+                    "route": route,
+                    "requests": requests[(admin, route)],
+                    "errors": errors[(admin, route)],
+                    "latency_avg": histogram.mean,
+                    "latency_p95": histogram.quantile(0.95),
+                    "rows_avg": self._rows[(admin, route)].mean if (admin, route) in self._rows else None,
+                }
+                for (admin, route), histogram in sorted(self._latency.items())
+            ]
+        pools = [{"database": stats.name, **stats.status()} for stats in self._pools.values()]
+        return {"routes": routes, "pools": pools}
+
+    def _render_histogram(self, lines: List[str], name: str, histogram: Histogram, **labels: Any) -> None:
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{{{_labels(**labels, le=bound)}}} {cumulative}")
+        lines.append(f"{name}_sum{{{_labels(**labels)}}} {_format(histogram.sum)}")
+        lines.append(f"{name}_count{{{_labels(**labels)}}} {histogram.count}")
+
+    def render_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format, version 0.0.4."""
+        prefix, lines = self.prefix, []
+        with self._lock:
+            lines += [
+                f"# HELP {prefix}_requests_total Requests to the admin routes.",
+                f"# TYPE {prefix}_requests_total counter",
+            ]
+            for (admin, route, status), count in sorted(self._requests.items()):
+                lines.append(f"{prefix}_requests_total{{{_labels(admin=admin, route=route, status=status)}}} {count}")
+            lines += [
+                f"# HELP {prefix}_request_duration_seconds Latency of the requests to the admin routes.",
+                f"# TYPE {prefix}_request_duration_seconds histogram",
+            ]
+            for (admin, route), histogram in sorted(self._latency.items()):
+                self._render_histogram(lines, f"{prefix}_request_duration_seconds", histogram, admin=admin, route=route)
+            lines += [
+                f"# HELP {prefix}_rows Rows returned or changed by the admin routes.",
+                f"# TYPE {prefix}_rows histogram",
+            ]
+            for (admin, route), histogram in sorted(self._rows.items()):
+                self._render_histogram(lines, f"{prefix}_rows", histogram, admin=admin, route=route)
+        pools = [(stats, stats.status()) for stats in self._pools.values()]
+        lines += [
+            f"# HELP {prefix}_db_pool_checkout_wait_seconds Time to check out a connection from the pool.",
+            f"# TYPE {prefix}_db_pool_checkout_wait_seconds histogram",
+        ]
+        for stats, _ in pools:
+            with stats._lock:
+                self._render_histogram(lines, f"{prefix}_db_pool_checkout_wait_seconds", stats.wait, database=stats.name)
+        for key, help_ in (
+            ("size", "Connections kept open by the pool."),
+            ("checkedout", "Connections checked out from the pool."),
+            ("overflow", "Connections opened beyond the pool size."),
+            ("saturation", "Checked out connections over the pool size plus its max overflow."),
+        ):
+            lines += [f"# HELP {prefix}_db_pool_{key} {help_}", f"# TYPE {prefix}_db_pool_{key} gauge"]
+            for stats, status in pools:
+                if status[key] is not None:
+                    lines.append(f"{prefix}_db_pool_{key}{{{_labels(database=stats.name)}}} {_format(status[key])}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware measuring the requests to the routes of the admins, added to `site.fastapi`."""
+
+    def __init__(self, app: ASGIApp, metrics: MetricsRegistry):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            labels = self.metrics.get_route_labels(scope)  # The router sets the matched route in the shared scope
+            if labels is not None:
+                self.metrics.observe_request(*labels, status, time.perf_counter() - start)
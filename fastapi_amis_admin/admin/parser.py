@@ -1,6 +1,7 @@
+import copy
 import datetime
 from enum import Enum
-from typing import Any, Generator, Iterable, Type, TypeVar, Union
+from typing import Any, Callable, Generator, Hashable, Iterable, List, Sequence, Tuple, Type, TypeVar, Union
 
 from fastapi._compat import Undefined, field_annotation_is_scalar_sequence, field_annotation_is_sequence
 from pydantic import BaseModel, Json
@@ -16,7 +17,9 @@ from fastapi_amis_admin.amis.components import (
     Validation,
 )
 from fastapi_amis_admin.amis.constants import LabelEnum
+from fastapi_amis_admin.crud.parser import ModelFieldProxy
 from fastapi_amis_admin.models import Choices
+from fastapi_amis_admin.utils.cache import LRUCache
 from fastapi_amis_admin.utils.pydantic import (
     PYDANTIC_V2,
     ModelField,
@@ -30,28 +33,74 @@ from fastapi_amis_admin.utils.pydantic import (
     scalar_sequence_inner_type,
     smart_deepcopy,
 )
+from fastapi_amis_admin.utils.translation import i18n
 from fastapi_amis_admin.utils.translation import i18n as _
 
 _T = TypeVar("_T")
+_ItemT = TypeVar("_ItemT", bound=AmisNode)
 
 
 class AmisParser:
     """AmisParser,used to parse pydantic fields to amis form item or table column.
     AmisParser can set the default image and file upload receiver.
+    The parsed form items and table columns are cached by field, see `as_form_item` and `as_table_column`.
     """
 
+    cache_maxsize: int = 4096  # Maximum number of cached form items and table columns. 0 means unbounded.
+
     def __init__(
         self,
         image_receiver: amis.API = None,
         file_receiver: amis.API = None,
+        file_chunk_receiver: str = None,
+        image_thumbnail: bool = False,
+        image_thumbnail_prefixes: Sequence[str] = (),
     ):
         """
         Args:
             image_receiver: Image upload receiver, used to upload images to a specified location and return the image address
             file_receiver: File upload receiver, used to upload files to a specified location and return the file address
+            file_chunk_receiver: Chunked file upload url prefix, used for the `startChunkApi`, `chunkApi` and
+                `finishChunkApi` of the files uploaded with the default file receiver
+            image_thumbnail: Display the thumbnails of the uploaded images in the image columns, i.e. `{src}?thumb`,
+                and the original images when they are enlarged
+            image_thumbnail_prefixes: The url prefixes of the uploaded images, e.g. the `static_path` of the FileAdmin.
+                The other images, e.g. from another origin, are displayed as they are
         """
         self.image_receiver = image_receiver
         self.file_receiver = file_receiver
+        self.file_chunk_receiver = file_chunk_receiver
+        self.image_thumbnail = image_thumbnail
+        self.image_thumbnail_prefixes: List[str] = list(image_thumbnail_prefixes)
+        self._cache: LRUCache[Tuple[Any, AmisNode]] = LRUCache(maxsize=self.cache_maxsize)
+
+    def clear_cache(self) -> None:
+        """Clear the cached form items and table columns, e.g. after modifying a field in place."""
+        self._cache.clear()
+
+    def _get_cached(self, modelfield: ModelField, params: Tuple[Hashable, ...], build: Callable[[], _ItemT]) -> _ItemT:
+        """Get the item built for the field and params from the cache, or build it.
+        The cached item is a template: a shallow copy is returned, so the callers can set its attributes,
+        but its nested nodes are shared and must not be modified in place.
+        """
+        if isinstance(modelfield, ModelFieldProxy):
+            field, update = modelfield.__dict__["_modelfield"], modelfield.__dict__["_update"]
+        else:
+            field, update = modelfield, {}
+        extra = field_json_schema_extra(field)
+        if any(callable(extra.get(name)) for name in ("amis_form_item", "amis_filter_item", "amis_table_column")):
+            return build()  # dynamic amis extra, never cached
+        try:
+            key = (id(field), tuple(sorted(update.items())), params, i18n.get_language())
+            hash(key)
+        except TypeError:
+            return build()
+        cached = self._cache.get(key)
+        # The field is kept in the cache with the item, so its id is not reused while the key exists.
+        if cached is None or cached[0] is not field:
+            cached = (field, build())
+            self._cache.set(key, cached)
+        return copy.copy(cached[1])
 
     def _wrap_form_item(self, formitem: FormItem) -> FormItem:
         """Wrap formitem, add image and file upload receiver."""
@@ -59,6 +108,10 @@ class AmisParser:
             formitem.receiver = self.image_receiver
         elif formitem.type == "input-file" and not getattr(formitem, "receiver", None):
             formitem.receiver = self.file_receiver
+            if self.file_chunk_receiver and not getattr(formitem, "startChunkApi", None):
+                formitem.startChunkApi = f"post:{self.file_chunk_receiver}/start"
+                formitem.chunkApi = f"post:{self.file_chunk_receiver}"
+                formitem.finishChunkApi = f"post:{self.file_chunk_receiver}/finish"
         elif formitem.type == "input-rich-text":
             formitem.receiver = getattr(formitem, "receiver", None) or self.image_receiver
             formitem.videoReceiver = getattr(formitem, "videoReceiver", None) or self.file_receiver
@@ -69,7 +122,7 @@ class AmisParser:
                 body=[
                     formitem,
                     formitem.copy(
-                        exclude={"maxLength", "receiver"},
+                        exclude={"maxLength", "receiver", "startChunkApi", "chunkApi", "finishChunkApi"},
                         update={"type": "textarea"},
                     ),
                 ],
@@ -85,18 +138,42 @@ class AmisParser:
             is_filter: Is filter form
 
         Returns:
-
+            amis.FormItem, cached by field: see `_get_cached`.
         """
+        return self._get_cached(
+            modelfield,
+            ("form_item", set_default, is_filter),
+            lambda: self._as_form_item(modelfield, set_default=set_default, is_filter=is_filter),
+        )
+
+    def _as_form_item(self, modelfield: ModelField, set_default: bool = False, is_filter: bool = False) -> FormItem:
         formitem = self._get_form_item_from_kwargs(modelfield, is_filter=is_filter)
         formitem = self.update_common_attrs(modelfield, formitem, set_default=set_default, is_filter=is_filter)
         return self._wrap_form_item(formitem)
 
     def as_table_column(self, modelfield: ModelField, quick_edit: bool = False) -> TableColumn:
+        """Get amis table column from pydantic field, cached by field: see `_get_cached`."""
+        return self._get_cached(
+            modelfield,
+            ("table_column", quick_edit),
+            lambda: self._as_table_column(modelfield, quick_edit=quick_edit),
+        )
+
+    def _as_table_column(self, modelfield: ModelField, quick_edit: bool = False) -> TableColumn:
         column = self._get_table_column_from_kwargs(modelfield)
         column = self.update_common_attrs(modelfield, column, set_default=False, is_filter=False)
         column.sortable = True
         if column.type in ["switch", "mapping"]:
             column.sortable = False
+        if (
+            self.image_thumbnail
+            and self.image_thumbnail_prefixes
+            and column.type in ["image", "static-image"]
+            and not getattr(column, "src", None)
+        ):
+            column.src = self._get_thumbnail_src(column.name)
+            column.originalSrc = f"${{{column.name}}}"
+            column.enlargeAble = True
         if quick_edit:
             column.quickEdit = self.as_form_item(modelfield, set_default=True).dict(
                 exclude_none=True, by_alias=True, exclude={"name", "label"}
@@ -107,6 +184,11 @@ class AmisParser:
                 column.quickEdit.update({"mode": "inline"})
         return column
 
+    def _get_thumbnail_src(self, name: str) -> str:
+        """The thumbnail url of the uploaded images, with `thumb` appended to their query string."""
+        uploaded = " || ".join(f"STARTSWITH({name}, '{prefix}')" for prefix in self.image_thumbnail_prefixes)
+        return f"${{{name} && ({uploaded}) ? {name} + (CONTAINS({name}, '?') ? '&' : '?') + 'thumb' : {name}}}"
+
     def as_amis_form(self, model: Type[BaseModel], set_default: bool = False, is_filter: bool = False) -> Form:
         """Get amis form from pydantic model.
         Args:
@@ -26,6 +26,14 @@ class Settings(BaseSettings):
     amis_theme: Literal["cxd", "antd", "dark", "ang"] = "cxd"
     amis_image_receiver: API = None  # Image upload interface
     amis_file_receiver: API = None  # File upload interface
+    amis_file_chunk_receiver: str = None  # Chunked file upload interface prefix, used for large files
+    amis_image_thumbnail: bool = False  # Generate thumbnails of the uploaded images, and display them in the image columns
+    amis_html_cache_size: int = 256  # Maximum number of rendered amis html pages kept in the render cache
+    cache_path: str = ""  # Sqlite file of the caches shared by the worker processes, empty to keep them in each process
+    job_store_path: str = ""  # Sqlite file of the background jobs state, empty to keep it in memory
+    job_max_workers: int = 4  # Maximum number of background jobs running at the same time
+    metrics_enabled: bool = False  # Measure the admin routes and the database pools, served by `MetricsAdmin`
+    metrics_token: str = ""  # Bearer token of the Prometheus scrapers on `{site_path}/metrics`, besides the page permission
     logger: Union[logging.Logger, Any] = logging.getLogger("fastapi_amis_admin")
 
     @classmethod
@@ -38,6 +46,7 @@ class Settings(BaseSettings):
         file_upload_api = f"post:{values.get('site_path', '')}/file/upload"
         values.setdefault("amis_image_receiver", file_upload_api)
         values.setdefault("amis_file_receiver", file_upload_api)
+        values.setdefault("amis_file_chunk_receiver", f"{values.get('site_path', '')}/file/upload/chunk")
         # set default database url.
         if not values.get("database_url") and not values.get("database_url_async"):
             values.setdefault(
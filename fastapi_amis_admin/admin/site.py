@@ -1,24 +1,45 @@
+import hashlib
+import io
+import json
+import mimetypes
 import os.path
 import platform
+import secrets
+import shutil
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, List, Optional, Tuple, Type
 
 import aiofiles
 import pydantic
 import sqlalchemy
-from fastapi import FastAPI, File, UploadFile
+from fastapi import Body, Depends, FastAPI, File, Form, UploadFile
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
-from starlette.staticfiles import StaticFiles
+from starlette.responses import PlainTextResponse
 
 import fastapi_amis_admin
 from fastapi_amis_admin import amis
 from fastapi_amis_admin.admin import AdminApp, admin
+from fastapi_amis_admin.admin.jobs import Job
 from fastapi_amis_admin.admin.settings import Settings
+from fastapi_amis_admin.admin.storage import (
+    THUMBNAIL_TYPES,
+    FileStorage,
+    Image,
+    LocalFileStorage,
+    UploadStaticFiles,
+    generate_thumbnail,
+    is_compressible,
+    precompress_file,
+)
 from fastapi_amis_admin.amis.components import Page, PageSchema, Property
 from fastapi_amis_admin.crud.schema import BaseApiOut
 from fastapi_amis_admin.crud.utils import SqlalchemyDatabase
+from fastapi_amis_admin.utils.functools import cached_property
 from fastapi_amis_admin.utils.translation import i18n as _
 
 
@@ -86,18 +107,74 @@ class HomeAdmin(admin.PageAdmin):
         return page
 
 
+class ChunkStartSchema(BaseModel):
+    filename: str
+
+
+class ChunkStartOutSchema(BaseModel):
+    key: str
+    uploadId: str
+
+
+class ChunkPartSchema(BaseModel):
+    partNumber: int
+    eTag: str
+
+
+class ChunkFinishSchema(BaseModel):
+    uploadId: str
+    partList: List[ChunkPartSchema] = []
+
+
+class FileLookupSchema(BaseModel):
+    hash: str
+    filename: str
+
+
+class FileNameSchema(BaseModel):
+    filename: str
+
+
 class FileAdmin(admin.RouterAdmin):
     # todo perfect: Limit file size/suffixes/content_type
     file_directory: str = "upload"
     file_path: str = "/upload"
     file_max_size: int = 2 * 1024 * 1024
+    file_chunk_size: int = 64 * 1024  # The upload is streamed to disk in chunks of this size
+    file_hash_algorithm: str = "sha256"
+    file_chunk_directory: str = ".chunks"  # The state of the chunked uploads, relative to `file_directory`; not served
+    file_chunk_ttl: int = 24 * 3600  # The unfinished uploads are removed after this time without a chunk, in seconds
+    storage_class: Type[FileStorage] = LocalFileStorage  # E.g. HashFileStorage, to store identical files once
+    file_precompress_max_size: int = 16 * 1024 * 1024  # Write gzip/br variants of the compressible files up to this size
+    file_thumbnail_size: Tuple[int, int] = (320, 320)  # Thumbnails of the images, if `settings.amis_image_thumbnail`
+    file_thumbnail_workers: int = 2  # Number of threads generating the thumbnails in the background
     router_prefix = "/file"
 
     def __init__(self, app: "AdminApp"):
         super().__init__(app)
         self.file_directory = self.file_directory or self.file_path
-        os.makedirs(self.file_directory, exist_ok=True)
+        # Created on first use. Under the served directory, so that the uploads are moved within the same filesystem:
+        # UploadStaticFiles does not serve the hidden paths.
+        self.file_chunk_directory = os.path.join(self.file_directory, self.file_chunk_directory)
+        self._chunk_swept_at = 0.0
+        self.storage = self.get_storage()
         self.static_path = self.mount_staticfile()
+        if self.thumbnail_enabled:  # The image columns display the thumbnails of the uploaded images only
+            parser, prefix = self.site.amis_parser, f"{self.static_path}/"
+            if prefix not in parser.image_thumbnail_prefixes:
+                parser.image_thumbnail_prefixes.append(prefix)
+                parser.clear_cache()
+
+    async def router_permission_depend(self, request: Request) -> bool:
+        """The upload permission, required by all the routes of the FileAdmin. The stored files are served without it."""
+        return await self.app.has_page_permission(request, obj=self, action="upload") or self.error_no_router_permission(request)
+
+    async def file_delete_permission_depend(self, request: Request) -> bool:
+        return await self.app.has_page_permission(request, obj=self, action="delete") or self.error_no_router_permission(request)
+
+    def get_storage(self) -> FileStorage:
+        # The temporary files are moved into the storage, so they are written next to the chunked uploads.
+        return self.storage_class(self.file_directory, temp_directory=self.file_chunk_directory)
 
     def get_filename(self, file: UploadFile):
         filename = str(uuid.uuid4()).replace("-", "") + os.path.splitext(file.filename)[1]
@@ -106,33 +183,389 @@ class FileAdmin(admin.RouterAdmin):
     def mount_staticfile(self) -> str:
         self.site.fastapi.mount(
             self.file_path,
-            StaticFiles(directory=self.file_directory),
+            UploadStaticFiles(directory=self.file_directory, immutable=self.storage.immutable),
             self.file_directory,
         )
         return self.site.router_path + self.file_path
 
+    async def save_file(self, file: UploadFile, file_path: Path) -> Optional[str]:
+        """Stream the upload to `file_path` chunk by chunk, so that the memory usage does not depend on the file size.
+        Return the hex digest of the content, or None if the file exceeds `file_max_size`; the partial file is removed.
+        """
+        digest = hashlib.new(self.file_hash_algorithm)
+        size = 0
+        try:
+            async with aiofiles.open(file_path, "wb") as f:
+                while True:
+                    chunk = await file.read(self.file_chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if self.file_max_size and size > self.file_max_size:
+                        break
+                    digest.update(chunk)
+                    await f.write(chunk)
+        except BaseException:
+            os.remove(file_path)
+            raise
+        if self.file_max_size and size > self.file_max_size:
+            os.remove(file_path)
+            return None
+        return digest.hexdigest()
+
+    async def precompress_file(self, filename: str) -> None:
+        """Write the precompressed variants of a stored file, served by UploadStaticFiles to the clients accepting them."""
+        path = Path(self.file_directory) / filename
+        if (
+            not self.file_precompress_max_size
+            or not is_compressible(filename)
+            or path.stat().st_size > self.file_precompress_max_size
+        ):
+            return
+        await run_in_threadpool(precompress_file, path)
+
+    @property
+    def thumbnail_enabled(self) -> bool:
+        """Whether the thumbnails of the uploaded images are generated, if `settings.amis_image_thumbnail` and Pillow."""
+        return bool(self.site.settings.amis_image_thumbnail and self.file_thumbnail_size and Image is not None)
+
+    @cached_property
+    def thumbnail_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.file_thumbnail_workers, thread_name_prefix="faa-thumbnail")
+
+    def shutdown(self) -> None:
+        """Stop the threads generating the thumbnails, called on the shutdown of the site."""
+        executor = self.__dict__.pop("thumbnail_executor", None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _generate_thumbnail(self, path: Path) -> None:
+        try:
+            generate_thumbnail(path, self.file_thumbnail_size)
+        except Exception as e:  # The original image is served instead
+            self.site.settings.logger.warning(f"Failed to generate the thumbnail of {path}: {e}")
+
+    def schedule_thumbnail(self, filename: str) -> None:
+        """Generate the thumbnail of an uploaded image in the background, served by UploadStaticFiles with `?thumb`."""
+        if not self.thumbnail_enabled:
+            return
+        if mimetypes.guess_type(filename)[0] in THUMBNAIL_TYPES:
+            self.thumbnail_executor.submit(self._generate_thumbnail, Path(self.file_directory) / filename)
+
     def register_router(self):
         @self.router.post(self.file_path, response_model=BaseApiOut[self.UploadOutSchema])
         async def file_upload(file: UploadFile = File(...)):
+            size = getattr(file, "size", None)  # Only known for starlette>=0.24
+            if self.file_max_size and size and size > self.file_max_size:
+                return BaseApiOut(status=-2, msg="The file size exceeds the limit")
             filename = self.get_filename(file)
-            file_path = Path(self.file_directory) / filename
-            os.makedirs(file_path.parent, exist_ok=True)
+            temp_path = self.storage.get_temp_path()
             try:
-                res = await file.read()
-                if self.file_max_size and len(res) > self.file_max_size:
+                file_hash = await self.save_file(file, temp_path)
+                if file_hash is None:
                     return BaseApiOut(status=-2, msg="The file size exceeds the limit")
-                async with aiofiles.open(file_path, "wb") as f:
-                    await f.write(res)
+                filename = await self.storage.save(temp_path, filename, file_hash)
+                await self.precompress_file(filename)
+                self.schedule_thumbnail(filename)
                 return BaseApiOut(
-                    data=self.UploadOutSchema(filename=filename, url=f"{self.static_path}/{filename}"),
+                    data=self.UploadOutSchema(filename=filename, url=f"{self.static_path}/{filename}", hash=file_hash),
                 )
 
             except Exception as e:
                 return BaseApiOut(status=-1, msg=str(e))
 
+        @self.router.post(self.file_path + "/lookup", response_model=BaseApiOut[Optional[self.UploadOutSchema]])
+        async def file_lookup(data: FileLookupSchema):
+            """Get the uploaded file with the same content hash, so that the client can skip the upload.
+            Only supported by content-addressed storages, e.g. HashFileStorage. The client attaches the file
+            through `/attach` once it is actually used.
+            """
+            try:
+                filename = await self.storage.lookup(data.hash, data.filename)
+            except ValueError as e:
+                return BaseApiOut(status=-1, msg=str(e))
+            if filename is None:
+                return BaseApiOut(data=None)
+            return BaseApiOut(data=self.UploadOutSchema(filename=filename, url=f"{self.static_path}/{filename}", hash=data.hash))
+
+        @self.router.post(self.file_path + "/attach", response_model=BaseApiOut[self.UploadOutSchema])
+        async def file_attach(data: FileNameSchema):
+            """Add a reference to a stored file, e.g. found by `/lookup`, so that it is kept until it is deleted."""
+            try:
+                if not await self.storage.attach(data.filename):
+                    return BaseApiOut(status=-1, msg="The file does not exist")
+            except ValueError as e:
+                return BaseApiOut(status=-1, msg=str(e))
+            return BaseApiOut(data=self.UploadOutSchema(filename=data.filename, url=f"{self.static_path}/{data.filename}"))
+
+        @self.router.post(
+            self.file_path + "/delete",
+            response_model=BaseApiOut[Any],
+            dependencies=[Depends(self.file_delete_permission_depend)],
+        )
+        async def file_delete(data: FileNameSchema):
+            """Remove a reference to a stored file, e.g. when it is detached from an item.
+            The file is deleted with its last reference."""
+            try:
+                await self.storage.delete(data.filename)
+            except ValueError as e:
+                return BaseApiOut(status=-1, msg=str(e))
+            return BaseApiOut(msg="success")
+
+        @self.router.post(self.file_path + "/chunk/start", response_model=BaseApiOut[ChunkStartOutSchema])
+        async def file_chunk_start(data: ChunkStartSchema):
+            """Start a chunked upload, compatible with the amis InputFile `startChunkApi`."""
+            upload_id = uuid.uuid4().hex
+            filename = self.get_filename(UploadFile(io.BytesIO(), filename=data.filename))
+            await self.sweep_chunk_uploads()
+            await run_in_threadpool(self._start_chunk_upload, self.get_chunk_path(upload_id), filename)
+            return BaseApiOut(data=ChunkStartOutSchema(key=filename, uploadId=upload_id))
+
+        @self.router.post(self.file_path + "/chunk", response_model=BaseApiOut[ChunkPartSchema])
+        async def file_chunk(
+            uploadId: str = Form(...),
+            partNumber: int = Form(..., ge=1),
+            partSize: int = Form(..., gt=0),
+            file: UploadFile = File(...),
+        ):
+            """Upload a chunk at the offset `(partNumber - 1) * partSize`, compatible with the amis InputFile `chunkApi`.
+            A chunk can be uploaded again, e.g. to resume an interrupted upload.
+            """
+            upload_path = self.get_chunk_path(uploadId)
+            if upload_path is None or not upload_path.exists():
+                return BaseApiOut(status=-1, msg="The upload does not exist")
+            offset = (partNumber - 1) * partSize
+            digest = hashlib.md5()
+            size = 0
+            async with aiofiles.open(upload_path / "data", "r+b") as f:
+                await f.seek(offset)
+                while True:
+                    chunk = await file.read(self.file_chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if self.file_max_size and offset + size > self.file_max_size:
+                        break
+                    digest.update(chunk)
+                    await f.write(chunk)
+            if self.file_max_size and offset + size > self.file_max_size:
+                await run_in_threadpool(shutil.rmtree, upload_path, True)
+                return BaseApiOut(status=-2, msg="The file size exceeds the limit")
+            part = {"partNumber": partNumber, "eTag": digest.hexdigest(), "offset": offset, "size": size}
+            await run_in_threadpool((upload_path / "parts" / f"{partNumber}.json").write_text, json.dumps(part))
+            return BaseApiOut(data=ChunkPartSchema(**part))
+
+        @self.router.get(self.file_path + "/chunk/{upload_id}", response_model=BaseApiOut[List[ChunkPartSchema]])
+        async def file_chunk_parts(upload_id: str):
+            """Get the uploaded chunks, so that an interrupted upload can be resumed from the missing chunks."""
+            upload_path = self.get_chunk_path(upload_id)
+            if upload_path is None or not upload_path.exists():
+                return BaseApiOut(status=-1, msg="The upload does not exist")
+            parts = await run_in_threadpool(self.get_chunk_parts, upload_path)
+            return BaseApiOut(data=[ChunkPartSchema(**part) for part in parts])
+
+        @self.router.post(self.file_path + "/chunk/finish", response_model=BaseApiOut[self.UploadOutSchema])
+        async def file_chunk_finish(data: ChunkFinishSchema = Body(...)):
+            """Check the chunks and move the file to the upload directory, compatible with the amis `finishChunkApi`."""
+            upload_path = self.get_chunk_path(data.uploadId)
+            if upload_path is None or not upload_path.exists():
+                return BaseApiOut(status=-1, msg="The upload does not exist")
+            parts = {part["partNumber"]: part for part in await run_in_threadpool(self.get_chunk_parts, upload_path)}
+            if not parts or any(parts.get(part.partNumber, {}).get("eTag") != part.eTag for part in data.partList):
+                return BaseApiOut(status=-1, msg="The uploaded chunks do not match")
+            if len(parts) != max(parts):
+                return BaseApiOut(status=-1, msg="The upload is incomplete")
+            last = parts[max(parts)]
+            filename = json.loads(await run_in_threadpool((upload_path / "upload.json").read_text))["filename"]
+            digest = hashlib.new(self.file_hash_algorithm)
+            async with aiofiles.open(upload_path / "data", "r+b") as f:
+                await f.truncate(last["offset"] + last["size"])  # Remove the data of a larger chunk uploaded before
+                await f.seek(0)
+                while True:
+                    chunk = await f.read(self.file_chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+            file_hash = digest.hexdigest()
+            filename = await self.storage.save(upload_path / "data", filename, file_hash)
+            await self.precompress_file(filename)
+            self.schedule_thumbnail(filename)
+            await run_in_threadpool(shutil.rmtree, upload_path, True)
+            return BaseApiOut(
+                data=self.UploadOutSchema(filename=filename, url=f"{self.static_path}/{filename}", hash=file_hash),
+            )
+
+    def get_chunk_path(self, upload_id: str) -> Optional[Path]:
+        """Get the directory of the chunked upload state, or None if the upload id is invalid."""
+        try:
+            if uuid.UUID(upload_id).hex != upload_id:
+                return None
+        except ValueError:
+            return None
+        return Path(self.file_chunk_directory) / upload_id
+
+    @staticmethod
+    def _start_chunk_upload(upload_path: Path, filename: str) -> None:
+        os.makedirs(upload_path / "parts")
+        (upload_path / "data").touch()
+        (upload_path / "upload.json").write_text(json.dumps({"filename": filename}))
+
+    def _sweep_chunk_uploads(self, expires: float) -> None:
+        try:
+            entries = list(os.scandir(self.file_chunk_directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if os.stat(os.path.join(entry.path, "data")).st_mtime < expires:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                elif entry.name.endswith(".tmp") and entry.stat().st_mtime < expires:  # Left by an interrupted upload
+                    os.remove(entry.path)
+            except FileNotFoundError:  # Finished or removed meanwhile
+                continue
+
+    async def sweep_chunk_uploads(self) -> None:
+        """Remove the chunked uploads without a new chunk for `file_chunk_ttl` seconds, and the temporary files
+        left as long by the interrupted uploads. Run on the start of the chunked uploads, at most every ttl / 24."""
+        now = time.time()
+        if not self.file_chunk_ttl or now - self._chunk_swept_at < self.file_chunk_ttl / 24:
+            return
+        self._chunk_swept_at = now
+        await run_in_threadpool(self._sweep_chunk_uploads, now - self.file_chunk_ttl)
+
+    @staticmethod
+    def get_chunk_parts(upload_path: Path) -> List[dict]:
+        parts = [json.loads(path.read_text()) for path in (upload_path / "parts").glob("*.json")]
+        return sorted(parts, key=lambda part: part["partNumber"])
+
     class UploadOutSchema(BaseModel):
         filename: str = None
         url: str = None
+        hash: str = None
+
+
+class JobAdmin(admin.RouterAdmin):
+    """Query the state of the background jobs of `site.jobs`, e.g. polled by the amis `Progress` of a background form."""
+
+    router_prefix = "/jobs"
+
+    async def has_job_permission(self, request: Request, job: Job) -> bool:
+        """Only the owner of the job can read it, see `site.get_job_owner`."""
+        return job.owner is None or job.owner == await self.site.get_job_owner(request)
+
+    def register_router(self):
+        @self.router.get("/{job_id}", response_model=BaseApiOut[Job])
+        async def job_read(request: Request, job_id: str):
+            job = await self.site.jobs.get(job_id)
+            if job is None or not await self.has_job_permission(request, job):
+                return BaseApiOut(status=-1, msg="Job not found")
+            return BaseApiOut(data=job)
+
+        return self
+
+
+class MetricsAdmin(admin.PageAdmin):
+    """Charts of `site.metrics`, and the metrics in the Prometheus text format on `{router_path}`.
+    Registered by `AdminSite` when `settings.metrics_enabled`."""
+
+    page_schema = PageSchema(label=_("Metrics"), icon="fa fa-line-chart", url="/metrics", sort=-90)
+    page_path = "/page"
+    router_prefix = "/metrics"
+    chart_interval: int = 10000  # Refresh time of the charts, in milliseconds
+
+    async def get_page(self, request: Request) -> Page:
+        page = await super().get_page(request)
+        page.body = [
+            amis.Chart(
+                api=f"get:{self.router_path}/charts/{name}", interval=self.chart_interval, height="360px", replaceChartOption=True
+            )
+            for name in ("requests", "latency", "rows", "pools")
+        ]
+        return page
+
+    def get_chart_config(self, name: str) -> Optional[dict]:
+        """The echarts configuration of the chart, from the snapshot of `site.metrics`."""
+        snapshot = self.site.metrics.snapshot()
+        if name == "pools":
+            pools = snapshot["pools"]
+            categories = [pool["database"] for pool in pools]
+            series = [
+                ("bar", _("Checked out"), [pool["checkedout"] for pool in pools], 0),
+                ("bar", _("Capacity"), [pool["capacity"] for pool in pools], 0),
+                ("line", _("Checkout wait p95 (ms)"), [round(pool["wait_p95"] * 1000, 2) for pool in pools], 1),
+            ]
+            title = _("Database pools")
+        else:
+            routes = snapshot["routes"]
+            categories = [f"{route['admin']}.{route['route']}" for route in routes]
+            if name == "requests":
+                series = [
+                    ("bar", _("Requests"), [route["requests"] for route in routes], 0),
+                    ("bar", _("Errors"), [route["errors"] for route in routes], 0),
+                ]
+                title = _("Requests")
+            elif name == "latency":
+                series = [
+                    ("bar", _("Average (ms)"), [round(route["latency_avg"] * 1000, 2) for route in routes], 0),
+                    ("bar", "p95 (ms)", [round(route["latency_p95"] * 1000, 2) for route in routes], 0),
+                ]
+                title = _("Latency")
+            elif name == "rows":
+                rows = [route for route in routes if route["rows_avg"] is not None]
+                categories = [f"{route['admin']}.{route['route']}" for route in rows]
+                series = [("bar", _("Average rows"), [round(route["rows_avg"], 2) for route in rows], 0)]
+                title = _("Rows")
+            else:
+                return None
+        return {
+            "title": {"text": title},
+            "tooltip": {"trigger": "axis"},
+            "legend": {"top": 30},
+            "grid": {"top": 70, "containLabel": True},
+            "xAxis": {"type": "category", "data": categories, "axisLabel": {"rotate": 30}},
+            "yAxis": [{"type": "value"}, {"type": "value"}],
+            "series": [{"type": type_, "name": label, "data": data, "yAxisIndex": axis} for type_, label, data, axis in series],
+        }
+
+    async def prometheus_permission_depend(self, request: Request) -> bool:
+        """The Prometheus scrapers authenticate with `Authorization: Bearer {settings.metrics_token}`, if it is set;
+        the other requests require the page permission."""
+        token = self.site.settings.metrics_token
+        if token:
+            scheme, _sep, credentials = request.headers.get("authorization", "").partition(" ")
+            if scheme.lower() == "bearer" and secrets.compare_digest(credentials.encode(), token.encode()):
+                return True
+        return await self.page_permission_depend(request)
+
+    def register_router(self):
+        super().register_router()
+
+        @self.router.get(
+            "",
+            dependencies=[Depends(self.prometheus_permission_depend)],
+            response_class=PlainTextResponse,
+            include_in_schema=False,
+        )
+        async def metrics_prometheus():
+            return PlainTextResponse(
+                self.site.metrics.render_prometheus(),
+                media_type="text/plain; version=0.0.4; charset=utf-8",
+            )
+
+        @self.router.get(
+            "/charts/{name}",
+            dependencies=[Depends(self.page_permission_depend)],
+            response_model=BaseApiOut[dict],
+            include_in_schema=False,
+        )
+        async def metrics_chart(name: str):
+            config = self.get_chart_config(name)
+            if config is None:
+                return BaseApiOut(status=-1, msg="Chart not found")
+            return BaseApiOut(data=config)
+
+        return self
 
 
 class AdminSite(admin.BaseAdminSite):
@@ -148,4 +581,13 @@ class AdminSite(admin.BaseAdminSite):
             HomeAdmin,
             APIDocsApp,
             FileAdmin,
+            JobAdmin,
         )
+        if settings.metrics_enabled:
+            self.register_admin(MetricsAdmin)
+
+    async def on_shutdown(self) -> None:
+        await super().on_shutdown()
+        for registered in self._registered.values():
+            if isinstance(registered, FileAdmin):
+                registered.shutdown()
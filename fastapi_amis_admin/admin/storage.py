@@ -0,0 +1,456 @@
+import errno
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import sqlite3
+import stat
+import threading
+import uuid
+import weakref
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import anyio
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from fastapi_amis_admin.utils.http import get_accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, used to generate the thumbnails
+    Image = None
+
+PathType = Union[str, Path]
+_hash_pattern = re.compile(r"^[0-9a-f]{16,128}$")
+_range_pattern = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Precompressed variants of the files, in order of preference: (content encoding, file suffix)
+PRECOMPRESSED_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+
+def is_compressible(filename: str) -> bool:
+    media_type = mimetypes.guess_type(filename)[0] or ""
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES
+
+
+def precompress_file(path: PathType) -> List[str]:
+    """Write the gzip (and brotli, if installed) variants next to the file. Return the written encodings."""
+    path = Path(path)
+    encodings = []
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        variant = path.with_name(path.name + suffix)
+        if encoding == "br" and brotli is None:
+            continue
+        if not variant.exists():
+            temp = variant.with_name(f"{variant.name}.{uuid.uuid4().hex}.tmp")
+            if encoding == "br":
+                temp.write_bytes(brotli.compress(path.read_bytes()))
+            else:
+                with open(path, "rb") as src, gzip.GzipFile(temp, "wb", mtime=0) as dst:
+                    shutil.copyfileobj(src, dst)
+            os.replace(temp, variant)
+        encodings.append(encoding)
+    return encodings
+
+
+THUMBNAIL_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif", "image/bmp"}
+
+
+def get_thumbnail_path(path: PathType) -> Path:
+    """The thumbnail is stored next to the image, e.g. `abc.png` -> `abc.thumb.png`."""
+    path = Path(path)
+    return path.with_name(f"{path.stem}.thumb{path.suffix}")
+
+
+def generate_thumbnail(path: PathType, size: Tuple[int, int]) -> Optional[Path]:
+    """Write a thumbnail of the image that fits in `size`, keeping the aspect ratio and the format.
+    The image already small enough is its own thumbnail: it is linked, so that the thumbnail can be cached as well.
+    Return None if Pillow is not installed.
+    """
+    if Image is None:
+        return None
+    thumbnail_path = get_thumbnail_path(path)
+    if thumbnail_path.exists():  # Content-addressed files are only processed once
+        return thumbnail_path
+    with Image.open(path) as image:
+        if image.width <= size[0] and image.height <= size[1]:
+            link_file(path, thumbnail_path)
+            return thumbnail_path
+        image_format = image.format
+        image.thumbnail(size)
+        if image_format == "JPEG" and image.mode not in {"RGB", "L"}:
+            image = image.convert("RGB")
+        temp = thumbnail_path.with_name(f"{thumbnail_path.name}.{uuid.uuid4().hex}.tmp")
+        image.save(temp, format=image_format)
+    os.replace(temp, thumbnail_path)
+    return thumbnail_path
+
+
+def link_file(src: PathType, dst: PathType) -> None:
+    """Hard link `dst` to `src`, or copy it if the filesystem does not support the links."""
+    dst = Path(dst)
+    temp = dst.with_name(f"{dst.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        os.link(src, temp)
+    except OSError:
+        shutil.copyfile(src, temp)
+    os.replace(temp, dst)
+
+
+def move_file(src: PathType, dst: PathType) -> None:
+    """Move the file atomically: across filesystems, it is first copied next to `dst`, then renamed."""
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        dst = Path(dst)
+        temp = dst.with_name(f"{dst.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            shutil.copyfile(src, temp)
+            os.replace(temp, dst)
+        except BaseException:
+            if temp.exists():
+                os.remove(temp)
+            raise
+        os.remove(src)
+
+
+def remove_file(path: PathType) -> None:
+    """Remove the file, its precompressed variants and its thumbnail."""
+    path = Path(path)
+    variants = [path.with_name(path.name + suffix) for _, suffix in PRECOMPRESSED_ENCODINGS]
+    for variant in [path, *variants, get_thumbnail_path(path)]:
+        if variant.is_file():
+            os.remove(variant)
+
+
+class FileStorage:
+    """Storage of the uploaded files.
+    The uploads are first written to a temporary file in `temp_directory`, then moved into `directory` by `save`,
+    so a stored file is never partially written. The move is a rename if `temp_directory` is on the same filesystem
+    as `directory`, and a copy otherwise.
+    """
+
+    immutable: bool = False  # Whether a stored filename always refers to the same content, i.e. can be cached forever
+
+    def __init__(self, directory: PathType, temp_directory: PathType = None):
+        self.directory = Path(directory)
+        self.temp_directory = Path(temp_directory or directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_path(self, filename: str) -> Path:
+        """The path of the stored file. Raise ValueError if the filename is outside the storage directory."""
+        directory = self.directory.resolve()
+        path = (directory / filename).resolve()
+        if path == directory or directory not in path.parents:
+            raise ValueError(f"Invalid filename: {filename!r}")
+        return path
+
+    def get_temp_path(self) -> Path:
+        """Get a new temporary file path for an upload. The temporary directory is created on first use."""
+        os.makedirs(self.temp_directory, exist_ok=True)
+        return self.temp_directory / f"{uuid.uuid4().hex}.tmp"
+
+    async def save(self, temp_path: PathType, filename: str, file_hash: str) -> str:
+        """Move the temporary file into the storage.
+        Args:
+            temp_path: The temporary file, removed or moved after the call.
+            filename: The filename suggested by the FileAdmin, relative to the storage directory.
+            file_hash: The hex digest of the content.
+
+        Returns: The stored filename, relative to the storage directory.
+        """
+        raise NotImplementedError
+
+    async def lookup(self, file_hash: str, filename: str) -> Optional[str]:
+        """Get the stored filename of known content, or None if the content is unknown. No reference is added."""
+        return None
+
+    async def attach(self, filename: str) -> bool:
+        """Add a reference to the stored file, e.g. when a looked up file is used instead of a new upload.
+        Return False if the file does not exist."""
+        return False
+
+    async def delete(self, filename: str) -> None:
+        """Remove a reference to the stored file, the file is deleted when it is no longer referenced."""
+        raise NotImplementedError
+
+
+class LocalFileStorage(FileStorage):
+    """Store each upload under the filename suggested by the FileAdmin, e.g. `202401/{uuid}.png`."""
+
+    async def save(self, temp_path: PathType, filename: str, file_hash: str) -> str:
+        path = self.directory / filename
+        os.makedirs(path.parent, exist_ok=True)
+        await run_in_threadpool(move_file, temp_path, path)
+        return filename
+
+    async def delete(self, filename: str) -> None:
+        await run_in_threadpool(remove_file, self.get_path(filename))
+
+
+class HashFileStorage(FileStorage):
+    """Content-addressed storage: the files are named by the hash of their content, e.g. `ab/cd/abcd....png`,
+    so identical uploads are stored once on disk. The upload itself is still transferred: only the clients that
+    call `/lookup` and `/attach` before uploading skip it, the amis upload controls do not.
+    The references are counted in a sqlite index (outside the served directory), and a file is deleted
+    when its last reference is removed through `/delete`. Deleting the model items that use a file does not
+    remove their references, so such files are kept.
+    """
+
+    immutable = True
+    _instances: "weakref.WeakSet[HashFileStorage]" = weakref.WeakSet()
+
+    def __init__(self, directory: PathType, temp_directory: PathType = None, index_path: PathType = None):
+        super().__init__(directory, temp_directory)
+        self.index_path = Path(index_path or f"{self.temp_directory}/hash_storage.sqlite3")
+        os.makedirs(self.index_path.parent, exist_ok=True)
+        self.connect()
+        self._instances.add(self)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, refcount INTEGER NOT NULL)")
+
+    def connect(self) -> None:
+        """Open the index connection, again in the child processes after a fork."""
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.index_path, timeout=10, check_same_thread=False, isolation_level=None)
+
+    @staticmethod
+    def get_name(file_hash: str, filename: str) -> str:
+        """Sharded name of the content, keeping the extension so that the static files are served with their type."""
+        if not _hash_pattern.match(file_hash):
+            raise ValueError(f"Invalid file hash: {file_hash!r}")
+        return f"{file_hash[:2]}/{file_hash[2:4]}/{file_hash}{os.path.splitext(filename)[1].lower()}"
+
+    def get_refcount(self, name: str) -> int:
+        row = self._connection.execute("SELECT refcount FROM files WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def _add_reference(self, name: str) -> None:
+        self._connection.execute(
+            "INSERT INTO files (name, refcount) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET refcount = refcount + 1",
+            (name,),
+        )
+
+    def _save(self, temp_path: PathType, name: str) -> str:
+        path = self.directory / name
+        with self._lock:
+            if path.is_file():  # Known content, the upload is discarded
+                os.remove(temp_path)
+            else:
+                os.makedirs(path.parent, exist_ok=True)
+                move_file(temp_path, path)
+            self._add_reference(name)
+        return name
+
+    def _attach(self, name: str) -> bool:
+        with self._lock:
+            if not (self.directory / name).is_file():
+                return False
+            self._add_reference(name)
+        return True
+
+    def _delete(self, name: str) -> None:
+        with self._lock:
+            refcount = self.get_refcount(name) - 1
+            if refcount > 0:
+                self._connection.execute("UPDATE files SET refcount = ? WHERE name = ?", (refcount, name))
+                return
+            self._connection.execute("DELETE FROM files WHERE name = ?", (name,))
+            remove_file(self.directory / name)
+
+    async def save(self, temp_path: PathType, filename: str, file_hash: str) -> str:
+        return await run_in_threadpool(self._save, temp_path, self.get_name(file_hash, filename))
+
+    async def lookup(self, file_hash: str, filename: str) -> Optional[str]:
+        name = self.get_name(file_hash, filename)
+        return name if await run_in_threadpool((self.directory / name).is_file) else None
+
+    def check_name(self, filename: str) -> str:
+        """Check that the filename is the name of a stored content, see `get_name`. Raise ValueError otherwise."""
+        if self.get_name(Path(filename).name.split(".")[0], filename) != filename:
+            raise ValueError(f"Invalid filename: {filename!r}")
+        return filename
+
+    async def attach(self, filename: str) -> bool:
+        return await run_in_threadpool(self._attach, self.check_name(filename))
+
+    async def delete(self, filename: str) -> None:
+        await run_in_threadpool(self._delete, self.check_name(filename))
+
+
+def _reinit_after_fork() -> None:
+    for storage in list(HashFileStorage._instances):
+        storage.connect()
+
+
+if hasattr(os, "register_at_fork"):  # Not on Windows, which does not fork
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+class UploadFileResponse(FileResponse):
+    """FileResponse of a byte range of the file, sent with the zero-copy ASGI extensions when the server supports them."""
+
+    def __init__(self, path: PathType, *, start: int = 0, end: int = None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.start = start
+        self.end = end  # Inclusive, None means the end of the file
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        count = None if self.end is None else self.end - self.start + 1
+        zerocopy = "http.response.zerocopysend" in extensions or (count is None and "http.response.pathsend" in extensions)
+        if self.send_header_only or (count is None and not zerocopy):
+            return await super().__call__(scope, receive, send)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if "http.response.pathsend" in extensions and count is None:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        elif "http.response.zerocopysend" in extensions:
+            message = {"type": "http.response.zerocopysend", "offset": self.start}
+            if count is not None:
+                message["count"] = count
+            with open(self.path, "rb") as file:
+                await send({**message, "file": file})
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.start)
+                remaining = count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+class UploadStaticFiles(StaticFiles):
+    """StaticFiles for the uploaded files.
+    - Strong ETags, and `Cache-Control: public, max-age=31536000, immutable` if the filenames are content-addressed.
+        Otherwise the files are revalidated with the ETag, and a `304 Not Modified` is returned if they did not change.
+    - Single `Range` requests, e.g. to resume a download or to seek in a video.
+    - Precompressed `.br`/`.gz` variants written next to the files, see `precompress_file`.
+    - Zero-copy `http.response.pathsend`/`http.response.zerocopysend` ASGI extensions, if the server supports them.
+    - Thumbnails with the `?thumb` query parameter, see `generate_thumbnail`. The original image is served
+        (and revalidated) while the thumbnail is not generated yet.
+    - The hidden paths, e.g. the chunked uploads of the FileAdmin in `.chunks`, are not served.
+    """
+
+    immutable_cache_control = "public, max-age=31536000, immutable"
+    cache_control = "no-cache"
+
+    def __init__(self, *, immutable: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.immutable = immutable
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        if any(part.startswith(".") for part in re.split(r"[/\\]", path)):
+            return "", None
+        return super().lookup_path(path)
+
+    def get_variant(self, full_path: PathType, request_headers: Headers) -> Tuple[PathType, Optional[str], os.stat_result]:
+        suffixes = dict(PRECOMPRESSED_ENCODINGS)
+        for encoding in get_accepted_encodings(request_headers.get("accept-encoding", ""), suffixes):
+            suffix = suffixes[encoding]
+            try:
+                stat_result = os.stat(f"{full_path}{suffix}")
+            except OSError:
+                continue
+            if stat.S_ISREG(stat_result.st_mode):
+                return f"{full_path}{suffix}", encoding, stat_result
+        return full_path, None, None
+
+    @staticmethod
+    def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+        """Parse a single `bytes=start-end` range. Return None for unsupported or invalid ranges, which are ignored,
+        and (size, size) if unsatisfiable."""
+        match = _range_pattern.match(range_header.strip())
+        if not match or match.groups() == ("", ""):
+            return None
+        start, end = match.groups()
+        if not start:  # The last bytes
+            start, end = max(size - int(end), 0), size - 1
+        elif end and int(end) < int(start):  # Syntactically invalid, the whole file is served
+            return None
+        else:
+            start, end = int(start), min(int(end), size - 1) if end else size - 1
+        if start >= size or start > end:
+            return size, size
+        return start, end
+
+    def file_response(self, full_path: PathType, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        method = scope["method"]
+        request_headers = Headers(scope=scope)
+        immutable = self.immutable
+        if "thumb" in QueryParams(scope.get("query_string", b"")):
+            try:
+                thumbnail_path = get_thumbnail_path(full_path)
+                full_path, stat_result = thumbnail_path, os.stat(thumbnail_path)
+            except OSError:  # Not generated yet
+                immutable = False
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+        range_header = request_headers.get("range") if status_code == 200 else None
+        path, encoding, variant_stat = full_path, None, None
+        if not range_header:
+            path, encoding, variant_stat = self.get_variant(full_path, request_headers)
+        etag = hashlib.md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode()).hexdigest()
+        etag = f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+        headers = {
+            "etag": etag,
+            "cache-control": self.immutable_cache_control if immutable else self.cache_control,
+            "accept-ranges": "bytes",
+        }
+        if is_compressible(str(full_path)):
+            headers["vary"] = "Accept-Encoding"
+        if encoding:
+            headers["content-encoding"] = encoding
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and etag in {tag.strip().lstrip("W/") for tag in if_none_match.split(",")}:
+            return NotModifiedResponse(Headers(headers))
+        if range_header and request_headers.get("if-range", etag) == etag:
+            byte_range = self.parse_range(range_header, stat_result.st_size)
+            if byte_range == (stat_result.st_size, stat_result.st_size):
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{stat_result.st_size}"})
+            if byte_range is not None:
+                start, end = byte_range
+                headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+                headers["content-length"] = str(end - start + 1)
+                return UploadFileResponse(
+                    full_path,
+                    start=start,
+                    end=end,
+                    status_code=206,
+                    headers=headers,
+                    media_type=media_type,
+                    stat_result=stat_result,
+                    method=method,
+                )
+        return UploadFileResponse(
+            path,
+            status_code=status_code,
+            headers=headers,
+            media_type=media_type,
+            stat_result=variant_stat or stat_result,
+            method=method,
+        )
@@ -1,29 +1,64 @@
 __version__ = "0.1.1"
 
-from .components import *  # noqa: F401,F403
-from .constants import (
-    BarcodeEnum,
-    DisplayModeEnum,
-    LabelEnum,
-    LevelEnum,
-    PlacementEnum,
-    ProgressEnum,
-    SizeEnum,
-    StatusEnum,
-    StepStatusEnum,
-    TabsModeEnum,
-    TriggerEnum,
-)
-from .types import (
-    API,
-    AmisAPI,
-    AmisNode,
-    BaseAmisApiOut,
-    BaseAmisModel,
-    Event,
-    Expression,
-    OptionsNode,
-    SchemaNode,
-    Template,
-    Tpl,
+from typing import TYPE_CHECKING
+
+from fastapi_amis_admin.utils.lazy import lazy_getattr
+
+if TYPE_CHECKING:
+    from .components import *  # noqa: F401,F403
+    from .constants import (
+        BarcodeEnum,
+        DisplayModeEnum,
+        LabelEnum,
+        LevelEnum,
+        PlacementEnum,
+        ProgressEnum,
+        SizeEnum,
+        StatusEnum,
+        StepStatusEnum,
+        TabsModeEnum,
+        TriggerEnum,
+    )
+    from .types import (
+        API,
+        AmisAPI,
+        AmisNode,
+        BaseAmisApiOut,
+        BaseAmisModel,
+        Event,
+        Expression,
+        OptionsNode,
+        SchemaNode,
+        Template,
+        Tpl,
+    )
+
+# The exports are imported on first access; the other names are looked up in `components`, as a star import would.
+__getattr__ = lazy_getattr(
+    __name__,
+    {
+        "BarcodeEnum": ".constants",
+        "DisplayModeEnum": ".constants",
+        "LabelEnum": ".constants",
+        "LevelEnum": ".constants",
+        "PlacementEnum": ".constants",
+        "ProgressEnum": ".constants",
+        "SizeEnum": ".constants",
+        "StatusEnum": ".constants",
+        "StepStatusEnum": ".constants",
+        "TabsModeEnum": ".constants",
+        "TriggerEnum": ".constants",
+        "API": ".types",
+        "AmisAPI": ".types",
+        "AmisNode": ".types",
+        "BaseAmisApiOut": ".types",
+        "BaseAmisModel": ".types",
+        "Event": ".types",
+        "Expression": ".types",
+        "OptionsNode": ".types",
+        "SchemaNode": ".types",
+        "Template": ".types",
+        "Tpl": ".types",
+    },
+    fallback=".components",
 )
@@ -794,6 +794,8 @@ class Form(AmisNode):
     labelWidth: Union[int, str, None] = None  # 表单项标签自定义宽度
     persistDataKeys: Optional[List[str]] = None  # 指指定只有哪些 key 缓存
     closeDialogOnSubmit: Optional[bool] = None  # 提交的时候是否关闭弹窗
+    feedback: SerializeAsAny[Optional["Dialog"]] = None  # A dialog displayed after the form is submitted successfully,
+    # the returned data can be used in this dialog.
 
 
 class InputSubForm(FormItem):
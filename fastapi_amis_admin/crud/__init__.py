@@ -1,5 +1,26 @@
 __version__ = "0.4.0"
 
-from ._sqlalchemy import SqlalchemyCrud, SqlalchemySelector
-from .base import BaseCrud, RouterMixin
-from .schema import BaseApiOut, BaseApiSchema, CrudEnum, ItemListSchema, Paginator
+from typing import TYPE_CHECKING
+
+from fastapi_amis_admin.utils.lazy import lazy_getattr
+
+if TYPE_CHECKING:
+    from ._sqlalchemy import SqlalchemyCrud, SqlalchemySelector
+    from .base import BaseCrud, RouterMixin
+    from .schema import BaseApiOut, BaseApiSchema, CrudEnum, ItemListSchema, Paginator
+
+# The exports are imported on first access, so that importing a submodule does not load the whole crud stack.
+__getattr__ = lazy_getattr(
+    __name__,
+    {
+        "SqlalchemyCrud": "._sqlalchemy",
+        "SqlalchemySelector": "._sqlalchemy",
+        "BaseCrud": ".base",
+        "RouterMixin": ".base",
+        "BaseApiOut": ".schema",
+        "BaseApiSchema": ".schema",
+        "CrudEnum": ".schema",
+        "ItemListSchema": ".schema",
+        "Paginator": ".schema",
+    },
+)
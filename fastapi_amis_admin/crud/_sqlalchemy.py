@@ -1,10 +1,14 @@
+import json
 import re
 from enum import Enum
 from typing import (
     Any,
+    AsyncGenerator,
+    Awaitable,
     Callable,
     Dict,
     Generic,
+    Hashable,
     Iterable,
     List,
     Optional,
@@ -16,9 +20,11 @@ from typing import (
 
 from fastapi import APIRouter, Body, Depends
 from fastapi._compat import field_annotation_is_scalar
+from fastapi.encoders import jsonable_encoder
 from fastapi.types import IncEx
-from sqlalchemy import Column, Table, func
+from sqlalchemy import Column, Table, func, union_all
 from sqlalchemy.engine import Result
+from sqlalchemy.exc import CompileError
 from sqlalchemy.future import select
 from sqlalchemy.orm import InstrumentedAttribute, Session, object_session
 from sqlalchemy.sql import Select
@@ -26,6 +32,7 @@ from sqlalchemy.sql.elements import BinaryExpression, Label, UnaryExpression
 from starlette.requests import Request
 from typing_extensions import Annotated, Literal
 
+from fastapi_amis_admin.utils.functools import SingleFlight
 from fastapi_amis_admin.utils.pydantic import (
     PYDANTIC_V2,
     ModelField,
@@ -60,12 +67,15 @@ from .parser import (
     get_python_type_parse,
     parse_obj_to_schema,
 )
-from .schema import BaseApiOut, ItemListSchema
+from .schema import BaseApiOut, CrudEnum, ItemListSchema, Paginator
 from .utils import (
     IdStrQuery,
     ItemIdListDepend,
     SqlalchemyDatabase,
+    get_dialect,
+    get_dialect_name,
     get_engine_db,
+    in_clauses,
     parser_str_set_list,
 )
 
@@ -251,6 +261,11 @@ class SqlalchemyCrud(
     read_fields: List[SqlaPropertyField] = []
     """Model read fields; used in route_read, note the difference between readonly_fields and read_fields.
     default is None, means not use read route."""
+    bulk_chunk_size: int = 1000
+    """Number of items updated or deleted per chunk by the filter based bulk routes."""
+    delta_field: Optional[SqlaInsAttr] = None
+    """Column set on each insert and update of the items, such as `update_time`. Enables the delta mode of the list route:
+    with the query parameter `since`, only the items changed since that watermark are returned, with a new watermark."""
 
     def __init__(
         self,
@@ -265,6 +280,9 @@ class SqlalchemyCrud(
         SqlalchemySelector.__init__(self, model, fields)
         schema_model: Type[SchemaModelT] = self.schema_model or TableModelParser.get_table_model_schema(model)
         BaseCrud.__init__(self, schema_model, router)
+        if self.delta_field is not None:
+            self.delta_field = self.parser.get_insfield(self.delta_field)
+            assert self.delta_field is not None, "delta_field is not a column of the model"
         # if self.readonly_fields:
         #     logging.warning(
         #         "readonly fields, deprecated, not recommended, will be removed in version 0.4.0."
@@ -392,8 +410,10 @@ class SqlalchemyCrud(
         return self.schema_list.parse_obj(values)
 
     def _fetch_item_scalars(self, session: Session, item_id: Iterable[str]) -> List[TableModelT]:
-        sel = select(self.model).where(self.pk.in_(list(map(get_python_type_parse(self.pk), item_id))))
-        return session.scalars(sel).all()
+        items = []
+        for clause in in_clauses(self.pk, map(get_python_type_parse(self.pk), item_id), get_dialect_name(session)):
+            items.extend(session.scalars(select(self.model).where(clause)).all())
+        return items
 
     async def fetch_items(self, *item_id: str) -> List[TableModelT]:
         """Fetch the database data by id."""
@@ -440,6 +460,97 @@ class SqlalchemyCrud(
         """Delete the database data by id."""
         return await self.db.async_run_sync(self._delete_items, item_id)
 
+    async def iter_item_id_chunks(self, sel: Select, chunk_size: int = None) -> AsyncGenerator[List[Any], None]:
+        """Iterate the primary keys of the items matched by `sel` in chunks.
+        The chunks are fetched with keyset pagination on the primary key, so the items already handled
+        (e.g. deleted, or updated out of the filter) do not shift the following chunks.
+        """
+        chunk_size = chunk_size or self.bulk_chunk_size
+        sel = sel.with_only_columns(self.pk).order_by(None).order_by(self.pk).limit(chunk_size)
+        last_id = None
+        while True:
+            chunk_sel = sel if last_id is None else sel.where(self.pk > last_id)
+            item_id = (await self.db.async_scalars(chunk_sel)).all()
+            if not item_id:
+                break
+            yield item_id
+            if len(item_id) < chunk_size:
+                break
+            last_id = item_id[-1]
+
+    async def update_items_by_filter(self, request: Request, sel: Select, values: Dict[str, Any]) -> int:
+        """Update all the database data matched by `sel`, chunk by chunk. Return the number of updated items."""
+        total = await self.db.async_scalar(sel.with_only_columns(func.count("*")))
+        count = 0
+        async for item_id in self.iter_item_id_chunks(sel):
+            count += len(await self.update_items(request, item_id, values))
+            await self.on_bulk_progress(request, CrudEnum.update, count, total)
+        return count
+
+    async def delete_items_by_filter(self, request: Request, sel: Select) -> int:
+        """Delete all the database data matched by `sel`, chunk by chunk. Return the number of deleted items."""
+        total = await self.db.async_scalar(sel.with_only_columns(func.count("*")))
+        count = 0
+        async for item_id in self.iter_item_id_chunks(sel):
+            count += len(await self.delete_items(request, item_id))
+            await self.on_bulk_progress(request, CrudEnum.delete, count, total)
+        return count
+
+    async def on_bulk_progress(self, request: Request, action: CrudEnum, done: int, total: int) -> None:
+        """Called after each chunk of a filter based bulk action, with the number of items handled so far."""
+        pass
+
+    async def run_bulk_action(
+        self, request: Request, action: CrudEnum, func: Callable[..., Awaitable[int]], *args: Any
+    ) -> BaseApiOut[Any]:
+        """Run `func(request, *args)`, a filter based bulk action, and return the response of its route.
+        The action runs in the request by default."""
+        return BaseApiOut(data=await func(request, *args))
+
+    async def get_deleted_select(self, request: Request, sel: Select) -> Optional[Select]:
+        """Tombstones of the delta mode: a select of the primary key and the deletion time of the deleted items that
+        `sel`, the list select with its filters and permissions, would match if they were not deleted.
+        The hard deleted items leave no trace, so there are none by default."""
+        return None
+
+    async def list_changes(self, request: Request, sel: Select, since: str, limit: int, data: ItemListSchema) -> ItemListSchema:
+        """Delta mode of the list: the items inserted or updated since the watermark `since`, the oldest change first,
+        and the tombstones of the deleted items. An empty `since` returns all the items.
+        - The items changed at the watermark itself are returned again, as a change may be committed later with the same
+            time: the clients merge the items by primary key.
+        - The watermark moves forward by at most `limit` changes at a time; `hasNext` tells to request the next ones at once.
+        """
+        parse = get_python_type_parse(self.delta_field)
+        since = parse(since) if since else None
+        sel = sel.order_by(None)
+        # The tombstones only matter to a client holding the items; an empty `since` loads them all again.
+        deleted = None if since is None else await self.get_deleted_select(request, sel)
+        deleted = None if deleted is None else deleted.order_by(None).subquery()
+        # Fix the new watermark first, over the updates and the deletions together, so that the changes of both kinds
+        # committed meanwhile are returned by the next request.
+        changes = sel.with_only_columns(self.delta_field.label("delta"), maintain_column_froms=True)
+        if since is not None:
+            changes = changes.where(self.delta_field > since)
+        if deleted is not None:
+            delete_pk, delete_time = deleted.c
+            changes = union_all(changes, select(delete_time.label("delta")).where(delete_time > since))
+        changes = select(changes.subquery().c.delta).order_by("delta").limit(limit).subquery()
+        watermark, count = (await self.db.async_execute(select(func.max(changes.c.delta), func.count("*")))).one()
+        data.hasNext = count >= limit
+        watermark = since if watermark is None else watermark
+        if watermark is not None:
+            sel = sel.order_by(self.delta_field, self.pk).where(self.delta_field <= watermark)
+            if since is not None:
+                sel = sel.where(self.delta_field >= since)
+            data = await self.on_list_after(request, await self.db.async_execute(sel), data)
+        data.deleted = []
+        if deleted is not None:
+            # Bounded by the watermark, like the updates: at most `limit` changes, plus those at the watermark itself.
+            deleted_sel = select(delete_pk).where(delete_time >= since, delete_time <= watermark).order_by(delete_time)
+            data.deleted = (await self.db.async_scalars(deleted_sel)).all()
+        data.watermark = jsonable_encoder(watermark)
+        return data
+
     @property
     def schema_name_prefix(self):
         if self.__class__ is SqlalchemyCrud:
@@ -492,9 +603,11 @@ class SqlalchemyCrud(
             item_id: ItemIdListDepend,
             sel: self.AnnotatedSelect,  # type: ignore
         ):
-            item_id = list(map(get_python_type_parse(self.pk), item_id))
-            filtered_id = await self.db.async_scalars(sel.where(self.pk.in_(item_id)).with_only_columns(self.pk))
-            return filtered_id.all()
+            filtered_id = []
+            sel = sel.with_only_columns(self.pk)
+            for clause in in_clauses(self.pk, map(get_python_type_parse(self.pk), item_id), get_dialect_name(self.db)):
+                filtered_id.extend((await self.db.async_scalars(sel.where(clause))).all())
+            return filtered_id
 
         return depend
 
@@ -505,28 +618,81 @@ class SqlalchemyCrud(
             sel: self.AnnotatedSelect,  # type: ignore
             paginator: Annotated[self.paginator, Depends()],  # type: ignore
             filters: Annotated[self.schema_filter, Body()] = None,  # type: ignore
+            since: Optional[str] = None,
         ):
             if not await self.has_list_permission(request, paginator, filters):
                 return self.error_no_router_permission(request)
-            data = ItemListSchema(items=[])
-            data.query = request.query_params
-            if await self.has_filter_permission(request, filters):
-                data.filters = await self.on_filter_pre(request, filters)
-                if data.filters:
-                    sel = sel.filter(*self.calc_filter_clause(data.filters))
-            if paginator.showTotal:
-                data.total = await self.db.async_scalar(sel.with_only_columns(func.count("*")))
-                if data.total == 0:
-                    return BaseApiOut(data=data)
-            orderBy = self._calc_ordering(paginator.orderBy, paginator.orderDir)
-            if orderBy:
-                sel = sel.order_by(*orderBy)
-            sel = sel.limit(paginator.perPage).offset(paginator.offset)
-            result = await self.db.async_execute(sel)
-            return BaseApiOut(data=await self.on_list_after(request, result, data))
+            if since and self.delta_field is not None:
+                try:
+                    get_python_type_parse(self.delta_field)(since)
+                except (ValueError, TypeError):
+                    return self.error_invalid_since(request)
+            key = await self.get_list_request_key(request, sel)
+            if key is None:
+                return BaseApiOut(data=await self.list_items(request, sel, paginator, filters, since))
+            # The identical concurrent requests wait for the same query.
+            data = await self.single_flight.do(key, lambda: self.list_items(request, sel, paginator, filters, since))
+            return BaseApiOut(data=data)
 
         return route
 
+    async def list_items(
+        self,
+        request: Request,
+        sel: Select,
+        paginator: Paginator,
+        filters: Optional[SchemaFilterT] = None,
+        since: Optional[str] = None,
+    ) -> ItemListSchema:
+        """Query a page of the list, or the changes since the watermark `since` in delta mode."""
+        data = ItemListSchema(items=[])
+        data.query = request.query_params
+        if await self.has_filter_permission(request, filters):
+            data.filters = await self.on_filter_pre(request, filters)
+            if data.filters:
+                sel = sel.filter(*self.calc_filter_clause(data.filters))
+        if since is not None and self.delta_field is not None:
+            return await self.list_changes(request, sel, since, paginator.perPage, data)
+        if paginator.showTotal:
+            data.total = await self.db.async_scalar(sel.with_only_columns(func.count("*")))
+            if data.total == 0:
+                return data
+        orderBy = self._calc_ordering(paginator.orderBy, paginator.orderDir)
+        if orderBy:
+            sel = sel.order_by(*orderBy)
+        sel = sel.limit(paginator.perPage).offset(paginator.offset)
+        result = await self.db.async_execute(sel)
+        return await self.on_list_after(request, result, data)
+
+    @cached_property
+    def single_flight(self) -> SingleFlight:
+        return SingleFlight()
+
+    async def get_request_fingerprint(self, request: Request) -> Optional[Hashable]:
+        """Identify what the responses depend on besides the url and body of the request, such as the user permissions.
+        The identical concurrent list requests with the same fingerprint are coalesced into one query.
+        Return None, the default, to never coalesce them."""
+        return None
+
+    async def get_list_request_key(self, request: Request, sel: Select) -> Optional[Hashable]:
+        """Normalized key of the list request: the fingerprint, the route, the query parameters, the json body
+        and the compiled select statement with its parameters, e.g. the select permissions applied to the request."""
+        fingerprint = await self.get_request_fingerprint(request)
+        if fingerprint is None:
+            return None
+        dialect = get_dialect(self.db)
+        try:  # The values are rendered by the dialect of the engine, as they are sent to the database
+            statement = str(sel.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+        except (CompileError, NotImplementedError):  # No literal rendering for some types, e.g. JSON
+            compiled = sel.compile(dialect=dialect)
+            statement = str(compiled), repr(sorted(compiled.params.items()))
+        body = await request.body()
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True) if body else ""
+        except ValueError:
+            pass
+        return "list", fingerprint, request.url.path, tuple(sorted(request.query_params.multi_items())), body, statement
+
     @property
     def route_create(self) -> Callable:
         async def route(
@@ -591,3 +757,47 @@ class SqlalchemyCrud(
             return BaseApiOut(data=len(items))
 
         return route
+
+    async def _filter_select(self, request: Request, sel: Select, filters: Optional[SchemaFilterT]) -> Select:
+        # The bulk actions are refused without effective filters, so that they never run on the whole table.
+        if filters is None:
+            return self.error_no_filters(request)
+        if not await self.has_filter_permission(request, filters):
+            return self.error_no_router_permission(request)
+        filters = await self.on_filter_pre(request, filters)
+        clauses = self.calc_filter_clause(filters) if filters else []
+        if not clauses:
+            return self.error_no_filters(request)
+        return sel.filter(*clauses)
+
+    @property
+    def route_update_by_filter(self) -> Callable:
+        async def route(
+            request: Request,
+            sel: self.AnnotatedSelect,  # type: ignore
+            data: Annotated[self.schema_update, Body()],  # type: ignore
+            filters: Annotated[self.schema_filter, Body()] = None,  # type: ignore
+        ):
+            if not await self.has_update_permission(request, None, data):
+                return self.error_no_router_permission(request)
+            values = await self.on_update_pre(request, data, item_id=None)
+            if not values:
+                return self.error_data_handle(request)
+            sel = await self._filter_select(request, sel, filters)
+            return await self.run_bulk_action(request, CrudEnum.update, self.update_items_by_filter, sel, values)
+
+        return route
+
+    @property
+    def route_delete_by_filter(self) -> Callable:
+        async def route(
+            request: Request,
+            sel: self.AnnotatedSelect,  # type: ignore
+            filters: Annotated[self.schema_filter, Body(embed=True)] = None,  # type: ignore
+        ):
+            if not await self.has_delete_permission(request, None):
+                return self.error_no_router_permission(request)
+            sel = await self._filter_select(request, sel, filters)
+            return await self.run_bulk_action(request, CrudEnum.delete, self.delete_items_by_filter, sel)
+
+        return route
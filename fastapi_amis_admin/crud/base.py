@@ -48,6 +48,8 @@ class BaseCrud(RouterMixin, Generic[SchemaModelT, SchemaListT, SchemaFilterT, Sc
     schema_update: Type[SchemaUpdateT] = None
     pk_name: str = "id"
     list_per_page_max: int = None
+    enable_bulk_by_filter: bool = False
+    """Register the routes updating or deleting all the items matching the filters. They are refused without filters."""
 
     def __init__(self, schema_model: Type[SchemaModelT], router: APIRouter = None):
         self.paginator = Paginator()
@@ -126,6 +128,23 @@ class BaseCrud(RouterMixin, Generic[SchemaModelT, SchemaListT, SchemaFilterT, Sc
             dependencies=depends_delete,
             name=CrudEnum.delete,
         )
+        if self.enable_bulk_by_filter:
+            self.router.add_api_route(
+                "/item/filter/update",
+                self.route_update_by_filter,
+                methods=["POST"],
+                response_model=BaseApiOut[Any],  # The number of items, or the background job running the action
+                dependencies=depends_update,
+                name=f"{CrudEnum.update.value}_by_filter",
+            )
+            self.router.add_api_route(
+                "/item/filter/delete",
+                self.route_delete_by_filter,
+                methods=["POST"],
+                response_model=BaseApiOut[Any],
+                dependencies=depends_delete,
+                name=f"{CrudEnum.delete.value}_by_filter",
+            )
         return self
 
     def _create_schema_list(self) -> Type[SchemaListT]:
@@ -172,6 +191,14 @@ class BaseCrud(RouterMixin, Generic[SchemaModelT, SchemaListT, SchemaFilterT, Sc
     def route_delete(self) -> Callable[..., Any]:
         raise NotImplementedError
 
+    @property
+    def route_update_by_filter(self) -> Callable[..., Any]:
+        raise NotImplementedError
+
+    @property
+    def route_delete_by_filter(self) -> Callable[..., Any]:
+        raise NotImplementedError
+
     async def has_list_permission(
         self,
         request: Request,
@@ -210,6 +237,12 @@ class BaseCrud(RouterMixin, Generic[SchemaModelT, SchemaListT, SchemaFilterT, Sc
     def error_data_handle(self, request: Request):
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "error data handle")
 
+    def error_no_filters(self, request: Request):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Filters are required")
+
+    def error_invalid_since(self, request: Request):
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "Invalid since watermark")
+
     def error_execute_sql(self, request: Request, error: Exception):
         if isinstance(error, IntegrityError):
             raise HTTPException(
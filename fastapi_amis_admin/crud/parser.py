@@ -1,3 +1,4 @@
+import copy
 import datetime
 from functools import lru_cache
 from importlib.metadata import version
@@ -19,6 +20,7 @@ from sqlalchemy.orm import ColumnProperty, DeclarativeMeta, InstrumentedAttribut
 from sqlalchemy.sql import Select
 from sqlalchemy.sql.elements import Label
 
+from fastapi_amis_admin.utils.cache import LRUCache
 from fastapi_amis_admin.utils.pydantic import (
     PYDANTIC_V2,
     ModelField,
@@ -67,9 +69,26 @@ class ModelFieldProxy:
         self.__dict__["_update"][key] = value
 
     def cloned_field(self):
+        """Get a clone of the original ModelField with the updated attributes.
+        The clones are cached by the original field and the update, and each call returns a new copy of the cached clone.
+        """
+        modelfield, update = self.__dict__["_modelfield"], self.__dict__["_update"]
+        try:
+            key = (id(modelfield), tuple(sorted(update.items())))
+            hash(key)
+        except TypeError:
+            return self._clone_field()
+        cached = _cloned_fields.get(key)
+        # The original field is kept in the cache with its clone, so its id is not reused while the key exists.
+        if cached is None or cached[0] is not modelfield:
+            cached = (modelfield, self._clone_field())
+            _cloned_fields.set(key, cached)
+        return _copy_modelfield(cached[1])
+
+    def _clone_field(self):
         modelfield = create_cloned_field(self.__dict__["_modelfield"])
         if PYDANTIC_V2:
-            kwargs = self.__dict__["_update"]
+            kwargs = dict(self.__dict__["_update"])
             name = kwargs.pop("name", modelfield.name)
             alias = kwargs.get("alias", None)
             if alias:
@@ -83,6 +102,16 @@ class ModelFieldProxy:
         return modelfield
 
 
+_cloned_fields: LRUCache[Tuple[ModelField, ModelField]] = LRUCache(maxsize=4096)
+
+
+def _copy_modelfield(modelfield: ModelField) -> ModelField:
+    """Copy a ModelField, so that the callers can modify it (e.g. its annotation or default) without affecting the cache."""
+    modelfield = copy.copy(modelfield)
+    modelfield.field_info = copy.copy(modelfield.field_info)
+    return modelfield
+
+
 class TableModelParser:
     _name_format = "{model_name}__{field_name}"
     _alias_format = "{table_name}__{field_key}"
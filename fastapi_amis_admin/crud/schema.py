@@ -25,6 +25,10 @@ class ItemListSchema(BaseApiSchema, GenericModel, Generic[_T]):
     total: Optional[int] = None  # Data total
     query: Optional[Dict[str, Any]] = None
     filter: Optional[Dict[str, Any]] = None
+    # Delta mode (`?since=`) of the list: new watermark, primary keys of the deleted items, more changes to fetch.
+    watermark: Optional[Any] = None
+    deleted: Optional[List[Any]] = None
+    hasNext: Optional[bool] = None
 
 
 class CrudEnum(str, Enum):
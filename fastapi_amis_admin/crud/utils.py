@@ -1,14 +1,19 @@
 import warnings
-from typing import List, Union
+from typing import Any, Iterable, Iterator, List, Union
 
 from fastapi import Depends, Path, Query
-from sqlalchemy.engine import Engine
+from sqlalchemy import any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Dialect, Engine
 from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy_database import AsyncDatabase, Database
 from typing_extensions import Annotated
 
 SqlalchemyDatabase = Union[Engine, AsyncEngine, Database, AsyncDatabase]
 
+IN_CLAUSE_CHUNK_SIZE = 500
+"""Maximum number of values bound in one `IN (...)` clause. SQLite before 3.32 only allows 999 parameters per statement."""
+
 
 IdStrQuery = Annotated[
     str,
@@ -57,3 +62,35 @@ def get_engine_db(engine: SqlalchemyDatabase) -> Union[Database, AsyncDatabase]:
     if isinstance(engine, AsyncEngine):
         return AsyncDatabase(engine)
     raise TypeError(f"Unknown engine type: {type(engine)}")
+
+
+def get_dialect(bind: Any) -> Dialect:
+    """Get the dialect of an engine, a connection, a session or a `sqlalchemy_database` client."""
+    if isinstance(bind, (Database, AsyncDatabase)):
+        bind = bind.engine
+    elif hasattr(bind, "get_bind"):  # Session
+        bind = bind.get_bind()
+    return bind.dialect
+
+
+def get_dialect_name(bind: Any) -> str:
+    """Get the dialect name of an engine, a connection, a session or a `sqlalchemy_database` client."""
+    return get_dialect(bind).name
+
+
+def in_clauses(column: Any, values: Iterable[Any], dialect_name: str = None, chunk_size: int = None) -> Iterator[Any]:
+    """Build the `column IN (values)` clauses for a large set of values.
+    - PostgreSQL: a single `column = ANY(:values)` clause, the values are bound as one array parameter,
+        so the statement stays small and the same for any number of values.
+    - Other dialects: one expanding `IN` clause per chunk of `chunk_size` values,
+        each of them must be executed as a separate statement and the results merged.
+    """
+    values = list(values)
+    if not values:
+        return
+    if dialect_name == "postgresql":
+        yield column == any_(bindparam(None, values, type_=ARRAY(column.type)))
+        return
+    chunk_size = chunk_size or IN_CLAUSE_CHUNK_SIZE
+    for i in range(0, len(values), chunk_size):
+        yield column.in_(values[i : i + chunk_size])
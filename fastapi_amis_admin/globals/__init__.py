@@ -1,6 +1,6 @@
-from sqlalchemy_database import AsyncDatabase, Database
+from typing import TYPE_CHECKING
 
-from fastapi_amis_admin.admin import AdminSite
+from sqlalchemy_database import AsyncDatabase, Database
 
 from ._db import (
     ASYNC_DB_NAME,
@@ -26,9 +26,12 @@ from .core import (
     set_global,
 )
 
+if TYPE_CHECKING:
+    from fastapi_amis_admin.admin import AdminSite
+
 sync_db: Database
 async_db: AsyncDatabase
-site: AdminSite
+site: "AdminSite"
 
 
 def __getattr__(name: str):
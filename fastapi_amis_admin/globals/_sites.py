@@ -1,16 +1,20 @@
-from fastapi_amis_admin.admin import AdminSite
+from typing import TYPE_CHECKING
+
 from fastapi_amis_admin.globals.core import DEFAULT_ALIAS, exists_global, get_global, set_global
 
+if TYPE_CHECKING:
+    from fastapi_amis_admin.admin import AdminSite
+
 SITE_NAME = "site"
 
 
-def get_site(*, alias: str = DEFAULT_ALIAS) -> AdminSite:
+def get_site(*, alias: str = DEFAULT_ALIAS) -> "AdminSite":
     """Get site"""
     return get_global(SITE_NAME, alias=alias)
 
 
 def set_site(
-    site: AdminSite,
+    site: "AdminSite",
     *,
     alias: str = DEFAULT_ALIAS,
     overwrite: bool = False,
@@ -0,0 +1,356 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from threading import RLock
+from typing import Any, Callable, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar, Union
+
+from starlette.concurrency import run_in_threadpool
+
+_VT = TypeVar("_VT")
+_NOT_FOUND = object()
+
+
+class CacheBackend(Generic[_VT]):
+    """Interface of the caches of the admin site.
+    The values of a shared backend are pickled, and its keys are identified by their `repr`,
+    so both must be stable across the worker processes.
+    """
+
+    maxsize: int = 0  # The maximum number of items, 0 means unbounded
+    ttl: float = 0  # Default time-to-live in seconds, 0 means the items never expire
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[_VT]:
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: _VT, ttl: float = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    async def aget(self, key: Hashable, default: Any = None) -> Optional[_VT]:
+        """`get` for the coroutines; the backends doing blocking I/O run it in the thread pool."""
+        return self.get(key, default)
+
+    async def aset(self, key: Hashable, value: _VT, ttl: float = None) -> None:
+        """`set` for the coroutines; the backends doing blocking I/O run it in the thread pool."""
+        self.set(key, value, ttl)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _NOT_FOUND) is not _NOT_FOUND
+
+
+class LRUCache(CacheBackend[_VT]):
+    """A thread-safe, bounded LRU cache with optional per-item expiration.
+    Args:
+        maxsize: The maximum number of items; the least recently used items are evicted first. 0 means unbounded.
+        ttl: Default time-to-live in seconds. 0 means the items never expire.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, _VT]]" = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[_VT]:
+        with self._lock:
+            item = self._data.get(key, _NOT_FOUND)
+            if item is _NOT_FOUND:
+                return default
+            expires, value = item
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: _VT, ttl: float = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl if ttl else 0, value)
+            self._data.move_to_end(key)
+            while self.maxsize and len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SqliteCacheStore:
+    """A sqlite file shared by the worker processes of a host, holding the shared caches and the invalidation channel
+    of the process local caches. It needs no external service; the file should be on a local disk.
+    A sqlite connection can not be used across a fork, so the forked processes, e.g. the workers of `gunicorn --preload`,
+    open their own connection.
+    """
+
+    _stores: Dict[Path, "SqliteCacheStore"] = {}
+    _stores_lock = threading.Lock()
+    _instances: "weakref.WeakSet[SqliteCacheStore]" = weakref.WeakSet()
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.connect()
+        self._instances.add(self)
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " expires REAL NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (namespace, accessed)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS invalidation (id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " source TEXT NOT NULL, namespace TEXT NOT NULL, key TEXT, created REAL NOT NULL)"
+            )
+
+    def connect(self) -> None:
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "SqliteCacheStore":
+        """Get the store of the file, one connection per process."""
+        path = Path(path).absolute()
+        with cls._stores_lock:
+            store = cls._stores.get(path)
+            if store is None:
+                store = cls._stores[path] = cls(path)
+            return store
+
+    def execute(self, sql: str, parameters: tuple = ()) -> List[tuple]:
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+
+def _hash_key(key: Hashable) -> str:
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+
+class SqliteCache(CacheBackend[_VT]):
+    """A cache shared by the worker processes of a host, stored in a `SqliteCacheStore`.
+    The deletions are seen at once by all the processes. The least recently used items beyond `maxsize` are evicted
+    every `maxsize // 10` writes, so the namespace may briefly exceed `maxsize` by 10%.
+    """
+
+    touch_interval: float = 1  # Seconds between the updates of the access time of an item, to spare the writes
+
+    def __init__(self, store: Union[SqliteCacheStore, str, Path], namespace: str, maxsize: int = 128, ttl: float = 0):
+        self.store = store if isinstance(store, SqliteCacheStore) else SqliteCacheStore.open(store)
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._writes = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[_VT]:
+        key = _hash_key(key)
+        rows = self.store.execute(
+            "SELECT value, expires, accessed FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+        if not rows:
+            return default
+        value, expires, accessed = rows[0]
+        now = time.time()
+        if expires and expires < now:
+            self.store.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+            return default
+        if accessed + self.touch_interval < now:
+            self.store.execute("UPDATE cache SET accessed = ? WHERE namespace = ? AND key = ?", (now, self.namespace, key))
+        return pickle.loads(value)
+
+    def set(self, key: Hashable, value: _VT, ttl: float = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        self.store.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, _hash_key(key), pickle.dumps(value), now + ttl if ttl else 0, now),
+        )
+        self._writes += 1
+        if self.maxsize and self._writes >= max(1, self.maxsize // 10):
+            self._writes = 0
+            self.evict()
+
+    async def aget(self, key: Hashable, default: Any = None) -> Optional[_VT]:
+        return await run_in_threadpool(self.get, key, default)
+
+    async def aset(self, key: Hashable, value: _VT, ttl: float = None) -> None:
+        await run_in_threadpool(self.set, key, value, ttl)
+
+    def evict(self) -> None:
+        """Remove the expired items, and the least recently used items beyond `maxsize`."""
+        self.store.execute("DELETE FROM cache WHERE namespace = ? AND expires AND expires < ?", (self.namespace, time.time()))
+        if self.maxsize:
+            self.store.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key IN (SELECT key FROM cache WHERE namespace = ?"
+                " ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.maxsize),
+            )
+
+    def delete(self, key: Hashable) -> None:
+        self.store.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, _hash_key(key)))
+
+    def clear(self) -> None:
+        self.store.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def __len__(self) -> int:
+        return self.store.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,))[0][0]
+
+
+class InvalidationChannel:
+    """Broadcast the invalidations of the process local caches to the other worker processes, through the
+    `invalidation` table of a `SqliteCacheStore`. Each process polls the channel at most every `poll_interval` seconds,
+    when its caches are read, so the invalidations reach the other processes within that delay.
+    The channel also carries short text messages, e.g. the events of the `EventBroker` of the site, see `send`.
+    The forked processes get their own `source`, so that they receive the invalidations of each other.
+    """
+
+    _instances: "weakref.WeakSet[InvalidationChannel]" = weakref.WeakSet()
+
+    def __init__(self, store: SqliteCacheStore, poll_interval: float = 0.5, retention: float = 3600):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.source = uuid.uuid4().hex  # The invalidations of this channel are already applied locally
+        self._listeners: Dict[str, Callable[[Optional[str]], None]] = {}
+        self._lock = threading.Lock()
+        self._polled = time.monotonic()
+        self._last_id = self.store.execute("SELECT COALESCE(MAX(id), 0) FROM invalidation")[0][0]
+        self._instances.add(self)
+
+    def register(self, namespace: str, listener: Callable[[Optional[str]], None]) -> None:
+        """Call `listener` with the messages of the namespace sent by the other processes, when they are polled."""
+        self._listeners[namespace] = listener
+
+    def publish(self, namespace: str, key: Optional[Hashable] = None) -> None:
+        """Invalidate the key, or all the keys if None, in the caches of the namespace of the other processes."""
+        self.send(namespace, None if key is None else _hash_key(key))
+
+    def send(self, namespace: str, message: Optional[str]) -> None:
+        """Send the message to the listeners of the namespace of the other processes."""
+        now = time.time()
+        self.store.execute(
+            "INSERT INTO invalidation (source, namespace, key, created) VALUES (?, ?, ?, ?)",
+            (self.source, namespace, message, now),
+        )
+        self.store.execute("DELETE FROM invalidation WHERE created < ?", (now - self.retention,))
+
+    def poll_due(self) -> bool:
+        return time.monotonic() - self._polled >= self.poll_interval
+
+    def poll(self) -> None:
+        now = time.monotonic()
+        if now - self._polled < self.poll_interval:
+            return
+        with self._lock:
+            self._polled = now
+            rows = self.store.execute(
+                "SELECT id, source, namespace, key FROM invalidation WHERE id > ? ORDER BY id", (self._last_id,)
+            )
+            if rows:
+                self._last_id = rows[-1][0]
+        for _, source, namespace, message in rows:
+            listener = self._listeners.get(namespace)
+            if listener is not None and source != self.source:
+                listener(message)
+
+
+class BroadcastLRUCache(LRUCache[_VT]):
+    """A process local LRU cache, for the values that can not be shared, whose deletions are broadcast
+    to the same cache of the other worker processes through an `InvalidationChannel`."""
+
+    def __init__(self, channel: InvalidationChannel, namespace: str, maxsize: int = 128, ttl: float = 0):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.channel = channel
+        self.namespace = namespace
+        channel.register(namespace, self.invalidate)
+
+    def get(self, key: Hashable, default: Any = None) -> Optional[_VT]:
+        self.channel.poll()
+        return super().get(key, default)
+
+    async def aget(self, key: Hashable, default: Any = None) -> Optional[_VT]:
+        if self.channel.poll_due():
+            await run_in_threadpool(self.channel.poll)
+        return super().get(key, default)
+
+    def delete(self, key: Hashable) -> None:
+        super().delete(key)
+        self.channel.publish(self.namespace, key)
+
+    def clear(self) -> None:
+        super().clear()
+        self.channel.publish(self.namespace)
+
+    def invalidate(self, key_hash: Optional[str]) -> None:
+        """Apply an invalidation received from another process. The keys are only known by their hash in the channel."""
+        with self._lock:
+            if key_hash is None:
+                self._data.clear()
+            else:
+                for key in [key for key in self._data if _hash_key(key) == key_hash]:
+                    del self._data[key]
+
+
+def _reinit_after_fork() -> None:
+    SqliteCacheStore._stores_lock = threading.Lock()
+    for store in list(SqliteCacheStore._instances):
+        store.connect()
+    for channel in list(InvalidationChannel._instances):
+        channel.source = uuid.uuid4().hex
+        channel._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):  # Not on Windows, which does not fork
+    os.register_at_fork(after_in_child=_reinit_after_fork)
+
+
+class CacheManager:
+    """Create the caches of the admin site, by namespace.
+    - Without `path`, all the caches are process local `LRUCache`s.
+    - With `path`, the caches of picklable values are `SqliteCache`s shared by the worker processes of the host,
+        and the other caches are process local, with their invalidations broadcast to the other processes.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None, poll_interval: float = 0.5):
+        self.store = SqliteCacheStore.open(path) if path else None
+        self.channel = InvalidationChannel(self.store, poll_interval=poll_interval) if self.store else None
+        self.caches: Dict[str, CacheBackend] = {}
+
+    def create(self, namespace: str, maxsize: int = 128, ttl: float = 0, shared: bool = True) -> CacheBackend:
+        """Create the cache of the namespace. The namespace must be the same in all the worker processes.
+        Args:
+            shared: Whether the values are picklable and can be shared by the processes,
+                otherwise they are kept in the process memory.
+        """
+        if self.store is None:
+            cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        elif shared:
+            cache = SqliteCache(self.store, namespace, maxsize=maxsize, ttl=ttl)
+        else:
+            cache = BroadcastLRUCache(self.channel, namespace, maxsize=maxsize, ttl=ttl)
+        self.caches[namespace] = cache
+        return cache
+
+    def clear(self) -> None:
+        """Clear all the caches of the site."""
+        for cache in self.caches.values():
+            cache.clear()
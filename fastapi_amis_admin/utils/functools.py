@@ -1,3 +1,8 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, MutableMapping, Optional, TypeVar
+
+_T = TypeVar("_T")
+
 try:
     from functools import cached_property
 except ImportError:
@@ -46,3 +51,57 @@ except ImportError:
                             )
                             raise TypeError(msg) from None
             return val
+
+
+def get_scope_cache(scope: Optional[MutableMapping[str, Any]]) -> Dict[Hashable, "asyncio.Future[Any]"]:
+    """Get the cache of awaited results bound to an ASGI scope (i.e. to a request)."""
+    if scope is None:
+        return {}
+    return scope.setdefault("faa_scope_cache", {})
+
+
+def set_scope_cached(scope: Optional[MutableMapping[str, Any]], key: Hashable, value: Any) -> None:
+    """Store an already known result in the scope cache."""
+    if scope is None:
+        return
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(value)
+    get_scope_cache(scope)[key] = future
+
+
+async def scope_cached(scope: Optional[MutableMapping[str, Any]], key: Hashable, func: Callable[[], Awaitable[_T]]) -> _T:
+    """Await `func()` at most once per ASGI scope (i.e. per request) for the given key.
+    Concurrent callers with the same key share the same result. If scope is None, `func()` is awaited directly.
+    """
+    if scope is None:
+        return await func()
+    cache = get_scope_cache(scope)
+    future = cache.get(key)
+    if future is None:
+        future = cache[key] = asyncio.ensure_future(func())
+    return await future
+
+
+class SingleFlight:
+    """Coalesce the concurrent calls with the same key: while a call is in flight, the other callers with the same key
+    wait for its result instead of calling again. Unlike a cache, the result is dropped as soon as the call is done.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[_T]]) -> _T:
+        future = self._calls.get(key)
+        if future is None:
+            future = self._calls[key] = asyncio.ensure_future(func())
+
+            def done(_):
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+            future.add_done_callback(done)
+        # A cancelled caller, e.g. a disconnected client, does not cancel the call shared with the others.
+        return await asyncio.shield(future)
@@ -0,0 +1,21 @@
+from typing import Iterable, List
+
+
+def get_accepted_encodings(accept_encoding: str, encodings: Iterable[str]) -> List[str]:
+    """The `encodings` accepted by the `Accept-Encoding` header, by decreasing q-value, then in the order of `encodings`.
+    The encodings with `q=0` are refused, and `*` stands for the encodings not listed."""
+    qvalues = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.split(";")
+        qvalue = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        if name.strip():
+            qvalues[name.strip().lower()] = qvalue
+    accepted = [(qvalues.get(encoding, qvalues.get("*", 0.0)), encoding) for encoding in encodings]
+    return [encoding for qvalue, encoding in sorted(accepted, key=lambda item: -item[0]) if qvalue > 0]
@@ -0,0 +1,36 @@
+import importlib
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+
+def lazy_getattr(package: str, exports: Dict[str, str], fallback: Optional[str] = None) -> Callable[[str], Any]:
+    """Build a module level `__getattr__`, which imports the exported names of a package on first access.
+    Args:
+        package: The name of the package, i.e. `__name__`.
+        exports: The dict of {exported name: relative module name}.
+        fallback: The relative module name to look up the names not in `exports`, as with `from module import *`.
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = exports.get(name)
+        if module_name is not None:
+            value = getattr(importlib.import_module(module_name, package), name)
+        elif name == "__all__":
+            value = list(exports)
+            if fallback:
+                value.extend(_public_names(importlib.import_module(fallback, package)))
+        elif fallback and not name.startswith("_"):
+            try:
+                value = getattr(importlib.import_module(fallback, package), name)
+            except AttributeError:
+                raise AttributeError(f"module {package!r} has no attribute {name!r}") from None
+        else:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        setattr(sys.modules[package], name, value)  # cache the value, the next accesses are plain attributes
+        return value
+
+    return __getattr__
+
+
+def _public_names(module) -> List[str]:
+    return list(getattr(module, "__all__", [name for name in vars(module) if not name.startswith("_")]))
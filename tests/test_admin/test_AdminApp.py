@@ -53,3 +53,40 @@ async def test__get_page_as_app(site: AdminSite):
 
 async def test__get_page_as_tabs(site: AdminSite):
     pass
+
+
+async def test_registry_index(site: AdminSite, admin_cls_list, models):
+    UserAdmin, BlogApp = admin_cls_list
+    site.register_admin(BlogApp)
+    # the nested app is created on demand, then the lookups are served by the shared indexes
+    assert site.get_model_admin(models.User.__tablename__)
+    app = site.get_admin_or_create(BlogApp)
+    assert app._registry is site._registry
+    assert not site._registry.has_pending(site)
+    assert site.get_admin_or_create(UserAdmin, register=False) is app.get_admin_or_create(UserAdmin)
+    assert site.get_model_admin(models.User.__tablename__) is app.get_admin_or_create(UserAdmin)
+    assert site.get_model_admin("not_exists") is None
+    # unregistering invalidates the lookups
+    app.unregister_admin(UserAdmin)
+    assert site.get_model_admin(models.User.__tablename__) is None
+    assert site.get_admin_or_create(UserAdmin, register=False) is None
+    app.register_admin(UserAdmin)
+    assert site.get_model_admin(models.User.__tablename__) is app.get_admin_or_create(UserAdmin)
+
+    # the classes pending in the parent app are not looked up from the nested apps
+    class OtherApp(admin.AdminApp):
+        pass
+
+    site.register_admin(OtherApp)
+    assert site._registry.has_pending(site)
+    assert not site._registry.has_pending(app)
+    site.unregister_admin(OtherApp)
+    # unregistering an app drops the entries of its nested admins
+    app.register_admin(OtherApp)
+    assert site._registry.has_pending(site)
+    site.unregister_admin(BlogApp)
+    assert site.get_model_admin(models.User.__tablename__) is None
+    assert not site._registry.has_pending(site)
+    assert UserAdmin not in site._registry.owners
+    assert OtherApp not in site._registry.owners
+    assert not site._registry.tables.get(models.User.__tablename__)
@@ -1,5 +1,7 @@
+from starlette.requests import Request
+
 from fastapi_amis_admin import admin
-from fastapi_amis_admin.admin import AdminSite
+from fastapi_amis_admin.admin import AdminSite, Settings
 from fastapi_amis_admin.admin.admin import AdminGroup
 
 
@@ -62,3 +64,78 @@ async def test_AdminGroup(site: AdminSite):
     children = await site.get_page_schema_children(None)  # type: ignore
     assert len(children) == 1
     assert len(children[0].children) == 1
+
+
+async def test_AdminGroup_page_schema_cache(site: AdminSite):
+    calls = []
+
+    class CachedGroup(AdminGroup):
+        page_schema_cache_ttl = 60
+
+    class PermLinkAdmin(admin.LinkAdmin):
+        link = "https://docs.amis.work"
+
+        async def has_page_permission(self, request: Request, obj=None, action: str = None) -> bool:
+            calls.append(request.scope["user"])
+            return request.scope["user"] == "admin"
+
+    async def get_permission_cache_key(request: Request):
+        return request.scope["user"]
+
+    site.get_permission_cache_key = get_permission_cache_key
+    group = site.get_admin_or_create(CachedGroup)
+    group.append_child(PermLinkAdmin(site))
+
+    def make_request(user: str) -> Request:
+        return Request({"type": "http", "user": user})
+
+    # memoized per request
+    request = make_request("admin")
+    assert len(await group.get_page_schema_children(request)) == 1
+    assert len(await group.get_page_schema_children(request)) == 1
+    assert calls == ["admin"]
+    # cached per user across requests
+    assert len(await group.get_page_schema_children(make_request("admin"))) == 1
+    assert calls == ["admin"]
+    assert await group.get_page_schema_children(make_request("guest")) == []
+    assert calls == ["admin", "guest"]
+    # explicit invalidation
+    group.clear_page_schema_cache("admin")
+    assert len(await group.get_page_schema_children(make_request("admin"))) == 1
+    assert await group.get_page_schema_children(make_request("guest")) == []
+    assert calls == ["admin", "guest", "admin"]
+    group.clear_page_schema_cache()
+    assert await group.get_page_schema_children(make_request("guest")) == []
+    assert calls == ["admin", "guest", "admin", "guest"]
+
+
+async def test_AdminGroup_page_schema_cache_shared(tmp_path):
+    # Two sites on the same cache file, as in two worker processes
+    sites = [AdminSite(settings=Settings(site_path="", cache_path=str(tmp_path / "cache.sqlite3"))) for _ in range(2)]
+    calls = []
+
+    class CachedGroup(AdminGroup):
+        page_schema_cache_ttl = 60
+
+    class PermLinkAdmin(admin.LinkAdmin):
+        link = "https://docs.amis.work"
+
+        async def has_page_permission(self, request: Request, obj=None, action: str = None) -> bool:
+            calls.append(request.scope["user"])
+            return True
+
+    async def get_permission_cache_key(request: Request):
+        return request.scope["user"]
+
+    groups = []
+    for site in sites:
+        site.get_permission_cache_key = get_permission_cache_key
+        group = site.get_admin_or_create(CachedGroup)
+        group.append_child(PermLinkAdmin(site))
+        groups.append(group)
+    page_schema_list = await groups[0].get_page_schema_children(Request({"type": "http", "user": "admin"}))
+    assert await groups[1].get_page_schema_children(Request({"type": "http", "user": "admin"})) == page_schema_list
+    assert calls == ["admin"]
+    groups[1].clear_page_schema_cache("admin")
+    await groups[0].get_page_schema_children(Request({"type": "http", "user": "admin"}))
+    assert calls == ["admin", "admin"]
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 
 import pytest
@@ -6,7 +7,7 @@ from pydantic import BaseModel
 from starlette.requests import Request
 
 from fastapi_amis_admin import admin
-from fastapi_amis_admin.admin import AdminSite
+from fastapi_amis_admin.admin import AdminSite, jobs
 from fastapi_amis_admin.crud import BaseApiOut
 
 
@@ -78,3 +79,40 @@ async def test_form_admin_route_init(site: AdminSite, async_client: AsyncClient)
     data = {"username": "admin", "password": "admin"}
     res = await async_client.get(ins.router_path + ins.form_path)
     assert res.json()["data"] == data
+
+
+class BackgroundAdmin(TmpAdmin1):
+    background = True
+
+    async def handle(self, request: Request, data: BaseModel, **kwargs) -> BaseApiOut[Any]:
+        for i in range(1, 5):
+            await asyncio.sleep(0)
+            await jobs.report_progress(i, 4, message=f"step {i}")
+        return BaseApiOut(data=data.dict())
+
+
+async def test_form_admin_background(site: AdminSite, async_client: AsyncClient):
+    site.register_admin(BackgroundAdmin)
+    ins = site.get_admin_or_create(BackgroundAdmin)
+    site.register_router()
+    # the form polls the job after the submit
+    res = await async_client.post(ins.router_path + ins.page_path)
+    feedback = res.json()["data"]["body"]["feedback"]
+    assert feedback["body"]["api"] == "get:" + site.router_path + "/jobs/${id}"
+    # the submit returns the job at once
+    data = {"username": "admin", "password": "admin"}
+    res = await async_client.post(ins.router_path + ins.form_path, json=data)
+    job = res.json()["data"]
+    assert job["id"] and not job["finished"]
+    for _ in range(100):
+        res = await async_client.get(f"{site.router_path}/jobs/{job['id']}")
+        job = res.json()["data"]
+        if job["finished"]:
+            break
+        await asyncio.sleep(0.01)
+    assert job["status"] == "success"
+    assert job["progress"] == 100
+    assert job["message"] == "step 4"
+    assert job["result"]["data"] == data
+    res = await async_client.get(f"{site.router_path}/jobs/unknown")
+    assert res.json()["status"] == -1
@@ -1,4 +1,7 @@
+import asyncio
+
 import pytest
+from fastapi import FastAPI
 from httpx import AsyncClient
 from pydantic import Field
 from sqlalchemy.sql import Select
@@ -7,7 +10,9 @@ from starlette.requests import Request
 from fastapi_amis_admin import admin
 from fastapi_amis_admin.admin import AdminSite
 from fastapi_amis_admin.crud.parser import LabelField
+from fastapi_amis_admin.crud.schema import ItemListSchema
 from fastapi_amis_admin.utils.pydantic import model_fields
+from tests.conftest import async_db
 
 
 async def test_register_router(site: AdminSite, models):
@@ -128,3 +133,175 @@ async def test_list_filter_default(site: AdminSite, async_client: AsyncClient, m
     assert "username" in schemas["UserAdminFilter"]["properties"]
     assert "id" in schemas["UserAdminFilter"]["properties"]
     assert "password" in schemas["UserAdminFilter"]["properties"]
+
+
+async def test_page_permission_memoized(site: AdminSite, models):
+    checked = []
+    batches = []
+
+    @site.register_admin
+    class UserAdmin(admin.ModelAdmin):
+        model = models.User
+
+    async def has_page_permission(request, obj=None, action=None):
+        checked.append((obj, action))
+        return action != "delete"
+
+    site.has_page_permission = has_page_permission
+    site.register_router()
+    ins = site.get_admin_or_create(UserAdmin)
+    request = Request({"type": "http"})
+    # the single checks are evaluated once per request
+    assert await ins.has_update_permission(request, None, None)
+    assert await ins.has_update_permission(request, None, None)
+    assert not await ins.has_delete_permission(request, None)
+    assert checked == [(ins, "update"), (ins, "delete")]
+    # the batch check reuses the memoized results
+    perms = await ins.has_page_permissions(request, ["update", "delete", "create"])
+    assert perms == {"update": True, "delete": False, "create": True}
+    assert checked[2:] == [(ins, "create")]
+    assert await ins.has_create_permission(request, None)
+    assert len(checked) == 3
+    # a new request is evaluated again; a batch backend is called once for all the actions
+    site_batch = site.has_page_permissions
+
+    async def has_page_permissions(request, actions, obj=None):
+        batches.append(list(actions))
+        return await site_batch(request, actions, obj=obj)
+
+    site.has_page_permissions = has_page_permissions
+    request = Request({"type": "http", "query_string": b"", "headers": []})
+    await ins.get_page(request)
+    assert len(batches) == 1
+    assert {"list", "update", "delete", "bulk_delete"} <= set(batches[0])
+    assert len(checked) == 3 + len(batches[0])
+
+
+async def test_bulk_actions_by_filter(site: AdminSite, app: FastAPI, models):
+    @site.register_admin
+    class UserAdmin(admin.ModelAdmin):
+        model = models.User
+        bulk_update_fields = [models.User.password]
+        search_fields = [models.User.username]
+        enable_bulk_by_filter = True
+
+    @site.register_admin
+    class ArticleAdmin(admin.ModelAdmin):
+        model = models.Article
+        bulk_update_fields = [models.Article.title]
+
+    site.mount_app(app)
+    ins = site.get_admin_or_create(UserAdmin)
+    article_admin = site.get_admin_or_create(ArticleAdmin)
+    paths = site.fastapi.openapi()["paths"]
+    # the actions are opt-in
+    assert f"{article_admin.router_path}/item/filter/delete" not in paths
+    assert not {"bulk_delete_by_filter", "bulk_update_by_filter"} & set(article_admin.registered_admin_actions)
+    assert f"{ins.router_path}/item/filter/update" in paths
+    assert f"{ins.router_path}/item/filter/delete" in paths
+    request = Request({"type": "http", "query_string": b"", "headers": []})
+    assert {"bulk_delete_by_filter", "bulk_update_by_filter"} <= set(ins.registered_admin_actions)
+    # the filters of the list table are sent instead of the selected ids, mapped by name
+    filter_data = await ins.get_list_filter_data(request)
+    assert "&" not in filter_data
+    assert filter_data["username"] == "[~]$username"
+    delete_action = await ins.get_action(request, "bulk_delete_by_filter")
+    assert delete_action.api.url == f"{ins.router_path}/item/filter/delete"
+    assert delete_action.api.data == {"filters": filter_data}
+    assert delete_action.feedback is not None
+    # the update dialog captures the filters when opened, before the values typed in its form
+    dialog = (await ins.get_action(request, "bulk_update_by_filter")).dialog
+    assert dialog.data == {"__filters": filter_data}
+    assert dialog.body.api.url == f"{ins.router_path}/item/filter/update"
+    assert dialog.body.api.data == {"filters": "${__filters}", "data": {"password": "${password}"}}
+
+    # the actions run as background jobs
+    async with async_db.engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        for name in ("a", "b", "c"):
+            res = await client.post(f"{ins.router_path}/item", json={"username": name, "password": name})
+            assert res.json()["status"] == 0
+        res = await client.post(f"{ins.router_path}/item/filter/delete", json={"filters": {"username": "[*]b,c"}})
+        job_id = res.json()["data"]["id"]
+        for _ in range(100):
+            job = await site.jobs.get(job_id)
+            if job.finished:
+                break
+            await asyncio.sleep(0.01)
+        assert job.status == "success"
+        assert job.result == 2
+        res = await client.post(f"{ins.router_path}/list")
+        assert res.json()["data"]["total"] == 1
+    async with async_db.engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+
+
+async def test_list_and_page_single_flight(site: AdminSite, async_client: AsyncClient, models):
+    calls = []
+
+    @site.register_admin
+    class UserAdmin(admin.ModelAdmin):
+        model = models.User
+
+        async def get_permission_cache_key(self, request: Request):
+            return request.headers.get("user")
+
+        async def get_select(self, request: Request) -> Select:
+            sel = await super().get_select(request)
+            tenant = request.headers.get("tenant")
+            return sel if tenant is None else sel.where(self.model.id == int(tenant))
+
+        async def list_items(self, request: Request, sel: Select, paginator, filters=None, since=None):
+            calls.append(("list", request.headers.get("user")))
+            await asyncio.sleep(0.05)
+            return ItemListSchema(items=[], total=len(calls))
+
+        async def get_page(self, request: Request):
+            calls.append(("page", request.headers.get("user")))
+            await asyncio.sleep(0.05)
+            return await super().get_page(request)
+
+        async def page_parser(self, request: Request, page):
+            pages.append(page)
+            return await super().page_parser(request, page)
+
+    pages = []
+    site.register_router()
+    ins = site.get_admin_or_create(UserAdmin)
+    url = f"{ins.router_path}/list"
+    # the identical concurrent requests of the users with the same permissions are coalesced
+    responses = await asyncio.gather(
+        async_client.post(url, json={"username": "a"}, headers={"user": "1"}),
+        async_client.post(url, json={"username": "a"}, headers={"user": "1"}),
+        async_client.post(url, json={"username": "b"}, headers={"user": "1"}),
+        async_client.post(url, json={"username": "a"}, headers={"user": "2"}),
+    )
+    assert sorted(calls) == [("list", "1"), ("list", "1"), ("list", "2")]
+    assert responses[0].json() == responses[1].json()
+    # the requests with different select statements are not coalesced, even with the same fingerprint
+    calls.clear()
+    await asyncio.gather(
+        async_client.post(url, headers={"user": "1", "tenant": "1"}),
+        async_client.post(url, headers={"user": "1", "tenant": "2"}),
+    )
+    assert calls == [("list", "1"), ("list", "1")]
+
+    # the select statement of the key is rendered by the dialect of the engine, with its bound values
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    request = Request({"type": "http", "method": "POST", "path": url, "query_string": b"", "headers": [(b"user", b"1")]}, receive)
+    sel = await ins.get_select(request)
+    key = await ins.get_list_request_key(request, sel.where(models.User.username == "x'y"))
+    assert "= 'x''y'" in key[-1]
+    calls.clear()
+    await asyncio.gather(*(async_client.post(ins.router_path + ins.page_path, headers={"user": "1"}) for _ in range(3)))
+    assert calls == [("page", "1")]
+    # each request gets its own page to change
+    assert len(set(map(id, pages))) == 3
+    # without a permission key, every request is computed
+    calls.clear()
+    await asyncio.gather(*(async_client.post(url) for _ in range(2)))
+    assert calls == [("list", None), ("list", None)]
@@ -1,13 +1,21 @@
+import hashlib
+import io
 import os
+import time
 from typing import Any, Dict
 
+from fastapi import UploadFile
 from httpx import AsyncClient
 from starlette.requests import Request
 from starlette.templating import Jinja2Templates
+from starlette.testclient import TestClient
 
 from fastapi_amis_admin import admin, amis
-from fastapi_amis_admin.admin import AdminSite
+from fastapi_amis_admin.admin import AdminSite, Settings
+from fastapi_amis_admin.admin.site import FileAdmin
 from fastapi_amis_admin.amis import Page
+from fastapi_amis_admin.crud.schema import CrudEnum
+from tests.conftest import async_db
 
 
 async def test_BaseAdmin(site: AdminSite):
@@ -117,6 +125,64 @@ async def test_PageAdmin(site: AdminSite, async_client: AsyncClient):
     }
 
 
+async def test_PageAdmin_html_cache(site: AdminSite, async_client: AsyncClient):
+    @site.register_admin
+    class TmpAdmin(admin.PageAdmin):
+        page_path = "/test"
+        page_html_alias = True
+        body = "Test Amis Page"
+
+        async def get_page(self, request: Request) -> Page:
+            return Page(title="hello", body=self.body)
+
+        async def get_permission_cache_key(self, request: Request):
+            return request.headers.get("user")
+
+    ins = site.get_admin_or_create(TmpAdmin)
+    site.register_router()
+    url = ins.router_path + ins.page_path
+    res = await async_client.get(url, headers={"Accept-Encoding": "gzip"})
+    etag = res.headers["etag"]
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.text.find(Page(title="hello", body="Test Amis Page").amis_json()) > 0
+    assert len(site.html_cache.cache) == 1
+    # the same page is served from the cache, with the same etag
+    res = await async_client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert res.headers["etag"] == etag
+    assert len(site.html_cache.cache) == 1
+    # not modified
+    res = await async_client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert res.status_code == 304
+    assert not res.content
+    # identity encoding has its own etag
+    res = await async_client.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert res.status_code == 200
+    assert "content-encoding" not in res.headers
+    assert res.headers["etag"] != etag
+    # the encodings refused with q=0 are not used
+    res = await async_client.get(url, headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in res.headers
+    # with a permission key, the page schema is only serialized once for the same inputs
+    ins.body = "Changed"
+    headers = {"Accept-Encoding": "gzip", "user": "1"}
+    res = await async_client.get(url, headers=headers)
+    assert "Changed" in res.text
+    ins.body = "Changed again"
+    res = await async_client.get(url, headers=headers)
+    assert "Changed again" not in res.text
+    assert len(site.html_cache.aliases) == 1
+    # registering the admins again changes the menu
+    site.register_admin(admin.IframeAdmin)
+    assert len(site.html_cache.aliases) == 0
+    res = await async_client.get(url, headers=headers)
+    assert "Changed again" in res.text
+    # without the alias, the html page follows the page schema
+    ins.page_html_alias = False
+    ins.body = "Changed at last"
+    res = await async_client.get(url, headers=headers)
+    assert "Changed at last" in res.text
+
+
 async def test_TemplateAdmin(site: AdminSite, async_client: AsyncClient, tmpdir):
     path = os.path.join(tmpdir, "index.html")
     with open(path, "w") as file:
@@ -140,3 +206,166 @@ async def test_TemplateAdmin(site: AdminSite, async_client: AsyncClient, tmpdir)
     # test jinja2 html
     res = await async_client.get(ins.router_path + ins.page_path)
     assert res.text == "<html>Hello,hello</html>"
+
+
+async def test_FileAdmin_upload(site: AdminSite, async_client: AsyncClient, tmpdir):
+    @site.register_admin
+    class TmpFileAdmin(FileAdmin):
+        router_prefix = "/tmpfile"
+        file_path = "/tmpupload"
+        file_directory = str(tmpdir)
+        file_max_size = 100
+        file_chunk_size = 16
+
+    ins = site.get_admin_or_create(TmpFileAdmin)
+    site.register_router()
+    url = ins.router_path + ins.file_path
+    # the file is streamed to disk in chunks, and its content hash is returned
+    content = b"0123456789" * 10
+    res = await async_client.post(url, files={"file": ("test.txt", content)})
+    data = res.json()["data"]
+    assert data["hash"] == hashlib.sha256(content).hexdigest()
+    with open(os.path.join(tmpdir, data["filename"]), "rb") as f:
+        assert f.read() == content
+    # the upload is rejected as soon as it exceeds the limit
+    files = os.listdir(tmpdir)
+    res = await async_client.post(url, files={"file": ("test.txt", content + b"0")})
+    assert res.json()["status"] == -2
+    assert os.listdir(tmpdir) == files
+    # the size is unknown before streaming, the partial file is removed
+    path = os.path.join(tmpdir, "partial.txt")
+    assert await ins.save_file(UploadFile(io.BytesIO(content + b"0")), path) is None
+    assert not os.path.exists(path)
+
+
+async def test_FileAdmin_chunk_upload(site: AdminSite, async_client: AsyncClient, tmpdir):
+    @site.register_admin
+    class TmpFileAdmin(FileAdmin):
+        router_prefix = "/tmpfile"
+        file_path = "/tmpupload"
+        file_directory = str(tmpdir.join("upload"))
+        file_max_size = 100
+
+    ins = site.get_admin_or_create(TmpFileAdmin)
+    site.register_router()
+    # the state of the uploads is kept under the upload directory, created on first use
+    assert ins.file_chunk_directory == os.path.join(ins.file_directory, ".chunks")
+    assert not os.path.exists(ins.file_chunk_directory)
+    url = ins.router_path + ins.file_path + "/chunk"
+    res = await async_client.post(url + "/start", json={"filename": "dump.txt"})
+    upload_id = res.json()["data"]["uploadId"]
+    assert res.json()["data"]["key"].endswith(".txt")
+    # the chunks can be uploaded in any order, and uploaded again
+    content = b"0123456789" * 5
+    parts = {}
+    for part_number in (2, 1, 3, 2):
+        chunk = content[(part_number - 1) * 20 : part_number * 20]
+        res = await async_client.post(
+            url,
+            data={"uploadId": upload_id, "partNumber": part_number, "partSize": 20},
+            files={"file": ("blob", chunk)},
+        )
+        parts[part_number] = res.json()["data"]["eTag"]
+    # but not served as static files
+    res = await async_client.get(f"{ins.static_path}/.chunks/{upload_id}/data")
+    assert res.status_code == 404
+    # the uploaded chunks are persisted, so an interrupted upload can be resumed
+    res = await async_client.get(f"{url}/{upload_id}")
+    assert [part["partNumber"] for part in res.json()["data"]] == [1, 2, 3]
+    part_list = [{"partNumber": number, "eTag": etag} for number, etag in sorted(parts.items())]
+    res = await async_client.post(url + "/finish", json={"uploadId": upload_id, "partList": part_list})
+    data = res.json()["data"]
+    assert data["hash"] == hashlib.sha256(content).hexdigest()
+    with open(os.path.join(ins.file_directory, data["filename"]), "rb") as f:
+        assert f.read() == content
+    assert not os.listdir(ins.file_chunk_directory)
+    # invalid upload ids are rejected
+    res = await async_client.get(f"{url}/not-an-upload-id")
+    assert res.json()["status"] == -1
+    # the upload is removed when it exceeds the limit
+    upload_id = (await async_client.post(url + "/start", json={"filename": "dump.txt"})).json()["data"]["uploadId"]
+    data = {"uploadId": upload_id, "partNumber": 2, "partSize": 60}
+    res = await async_client.post(url, data=data, files={"file": ("blob", content)})
+    assert res.json()["status"] == -2
+    assert not os.listdir(ins.file_chunk_directory)
+    # the abandoned uploads are removed after the ttl
+    upload_id = (await async_client.post(url + "/start", json={"filename": "dump.txt"})).json()["data"]["uploadId"]
+    expired = time.time() - ins.file_chunk_ttl - 1
+    os.utime(os.path.join(ins.file_chunk_directory, upload_id, "data"), (expired, expired))
+    ins._chunk_swept_at = 0
+    await async_client.post(url + "/start", json={"filename": "dump.txt"})
+    assert upload_id not in os.listdir(ins.file_chunk_directory)
+    assert len(os.listdir(ins.file_chunk_directory)) == 1
+
+
+async def test_AdminSite_lazy_router(site: AdminSite, app, models):
+    @site.register_admin
+    class UserAdmin(admin.ModelAdmin):
+        model = models.User
+
+    site.mount_app(app, lazy=True)
+    ins = site.get_admin_or_create(UserAdmin)
+    # the admin instance is created for the menu, but its schemas and routes are deferred
+    assert ins in site
+    assert ins.schema_list is None
+    assert not any(getattr(route, "path", "").startswith(ins.router.prefix + "/") for route in site.router.routes[:-1])
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        res = await client.post(ins.router_path + ins.page_path)
+        assert res.status_code == 200, res.text
+        assert res.json()["data"]["body"]["type"] == "crud"
+    assert ins.schema_list
+    assert site._lazy_routes[ins.router.prefix] not in site.router.routes
+    assert site.router.url_path_for(CrudEnum.list) == f"{ins.router.prefix}/list"
+    assert f"{ins.router.prefix}/list" in site.fastapi.openapi()["paths"]
+    # building again is a no-op
+    site.build_lazy_routes()
+    assert len([route for route in site.router.routes if getattr(route, "path", "") == f"{ins.router.prefix}/list"]) == 1
+
+
+async def test_AdminSite_lazy_url_path_for(site: AdminSite, app, models):
+    @site.register_admin
+    class UserAdmin(admin.ModelAdmin):
+        model = models.User
+
+    @site.register_admin
+    class ArticleAdmin(admin.ModelAdmin):
+        model = models.Article
+
+        def register_router(self):
+            self.router.add_api_route("/custom", self.route_page, methods=["POST"], name="article_custom")
+            return super().register_router()
+
+    site.mount_app(app, lazy=True)
+    user_route = site._lazy_routes[site.get_admin_or_create(UserAdmin).router.prefix]
+    article_ins = site.get_admin_or_create(ArticleAdmin)
+    article_route = site._lazy_routes[article_ins.router.prefix]
+    routes = list(site.router.routes)
+    # the names of the routes already built are resolved without building the deferred routes
+    site.router.url_path_for(site.router.routes[0].name)
+    assert user_route.routes is None and article_route.routes is None
+    # the deferred routes are built until the name is found, but the site router is left unchanged
+    assert site.router.url_path_for("article_custom") == f"{article_ins.router.prefix}/custom"
+    assert article_route.routes is not None
+    assert site.router.routes == routes
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        res = await client.post(f"{article_ins.router_path}/custom")
+        assert res.status_code == 200, res.text
+    assert article_route not in site.router.routes
+
+
+def test_AdminSite_lazy_warmup(app, models):
+    site = AdminSite(settings=Settings(site_path="/admin"), engine=async_db.engine)
+
+    @site.register_admin
+    class UserAdmin(admin.ModelAdmin):
+        model = models.User
+
+    site.mount_app(app, lazy=True, warmup=True)
+    route = site._lazy_routes[site.get_admin_or_create(UserAdmin).router.prefix]
+    assert route in site.router.routes
+    with TestClient(app):
+        assert site._warmup_task is not None
+        while not site._warmup_task.done():
+            time.sleep(0.01)
+        assert route not in site.router.routes
+    assert site._warmup_task is None
@@ -0,0 +1,117 @@
+import asyncio
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import text
+from starlette.requests import Request
+
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.admin import AdminSite
+from fastapi_amis_admin.admin.events import EventBroker
+from fastapi_amis_admin.crud.schema import CrudEnum
+from fastapi_amis_admin.utils.cache import InvalidationChannel, SqliteCacheStore
+from tests.conftest import async_db
+
+
+async def test_event_broker():
+    broker = EventBroker(maxsize=2)
+    assert broker.publish("topic", 1) == 0
+    subscription = broker.subscribe("topic")
+    assert broker.has_subscribers("topic")
+    assert broker.publish("topic", 1) == 1
+    broker.publish("topic", 2)
+    broker.publish("topic", 3)
+    await asyncio.sleep(0)
+    # the oldest event is dropped when the subscriber is too slow
+    assert [await subscription.get(), await subscription.get()] == [2, 3]
+    subscription.close()
+    assert not broker.has_subscribers("topic")
+    assert broker.publish("topic", 4) == 0
+
+
+async def test_event_broker_channel(tmp_path):
+    # Two brokers on the same file, as in two worker processes
+    path = tmp_path / "cache.sqlite3"
+    broker1 = EventBroker(channel=InvalidationChannel(SqliteCacheStore(path), poll_interval=0))
+    broker2 = EventBroker(channel=InvalidationChannel(SqliteCacheStore(path), poll_interval=0))
+    subscription1, subscription2 = broker1.subscribe("topic"), broker2.subscribe("topic")
+    broker1.publish("topic", {"actions": ["create"]})
+    broker1.close()  # wait for the event to be sent
+    await broker1.poll()
+    await broker2.poll()
+    assert await asyncio.wait_for(subscription2.get(), 1) == {"actions": ["create"]}
+    # the own events are received once
+    assert await asyncio.wait_for(subscription1.get(), 1) == {"actions": ["create"]}
+    assert subscription1.queue.empty()
+
+
+async def test_list_live_refresh(site: AdminSite, app: FastAPI, models):
+    @site.register_admin
+    class UserAdmin(admin.ModelAdmin):
+        model = models.User
+        list_live_refresh = True
+
+    site.mount_app(app)
+    ins = site.get_admin_or_create(UserAdmin)
+    assert any(route.path == f"{ins.router_prefix}/events" for route in ins.router.routes)
+    request = Request({"type": "http", "query_string": b"", "headers": []})
+    page = await ins.get_page(request)
+    script = page.onEvent["init"]["actions"][0]["script"]
+    assert f"{ins.router_path}/events" in script
+    assert page.body.id == f"crud_{ins.unique_id}"
+
+    async with async_db.engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+    subscription = site.broker.subscribe(ins.change_topic)
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        res = await client.post(f"{ins.router_path}/item", json={"username": "live", "password": "live"})
+        assert res.json()["status"] == 0
+    # the change is published once the transaction is committed
+    event = await asyncio.wait_for(subscription.get(), 1)
+    assert event == {"actions": ["create"]}
+    # the changes of a rolled back transaction are dropped
+    async with async_db.session_maker() as session:
+        await session.execute(text("SELECT 1"))
+        await session.run_sync(ins._publish_change_on_commit, CrudEnum.update)
+        await session.rollback()
+        assert "amis_admin_changes" not in session.info
+        await session.execute(text("SELECT 1"))
+        await session.run_sync(ins._publish_change_on_commit, CrudEnum.delete)
+        await session.commit()
+    event = await asyncio.wait_for(subscription.get(), 1)
+    assert event == {"actions": ["delete"]}
+    await asyncio.sleep(0)
+    assert subscription.queue.empty()
+    subscription.close()
+    async with async_db.engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+
+
+async def test_list_live_refresh_channel(site: AdminSite, app: FastAPI, models, tmp_path):
+    # The worker committing the change has no subscriber, the other worker has one
+    path = tmp_path / "cache.sqlite3"
+    site.broker = EventBroker(channel=InvalidationChannel(SqliteCacheStore(path), poll_interval=0))
+    broker = EventBroker(channel=InvalidationChannel(SqliteCacheStore(path), poll_interval=0))
+
+    @site.register_admin
+    class UserAdmin(admin.ModelAdmin):
+        model = models.User
+        list_live_refresh = True
+
+    site.mount_app(app)
+    ins = site.get_admin_or_create(UserAdmin)
+    async with async_db.engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+    subscription = broker.subscribe(ins.change_topic)
+    assert not site.broker.has_subscribers(ins.change_topic)
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        res = await client.post(f"{ins.router_path}/item", json={"username": "live", "password": "live"})
+        assert res.json()["status"] == 0
+    site.broker.close()  # wait for the event to be sent
+    await broker.poll()
+    assert await asyncio.wait_for(subscription.get(), 1) == {"actions": ["create"]}
+    subscription.close()
+    async with async_db.engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
@@ -1,3 +1,5 @@
+from starlette.requests import Request
+
 from fastapi_amis_admin import admin
 from fastapi_amis_admin.admin import AdminSite, FieldPermEnum
 
@@ -141,3 +143,51 @@ async def test_perm_fields_and_exclude(site: AdminSite, models):
     assert "id" in ins.filter_permission_fields
     assert "title" not in ins.filter_permission_fields
     assert "category_id" not in ins.create_permission_fields
+
+
+async def test_list_deny_fields_projection(site: AdminSite, models):
+    @site.register_admin
+    class ArticleAdmin(admin.BaseAuthFieldModelAdmin):
+        model = models.Article
+        list_display = [models.Article.id, models.Article.title, models.Article.description, models.Article.status]
+
+        async def has_field_permission(self, request: Request, field: str, action: str = "") -> bool:
+            return field not in {"description", "status"}
+
+    site.register_router()
+    ins = site.get_admin_or_create(ArticleAdmin)
+    request = Request({"type": "http"})
+    # the denied columns are not queried
+    sel = await ins.get_select(request)
+    keys = ins.parser.get_select_keys(sel)
+    assert "description" not in keys
+    assert "status" not in keys
+    assert "title" in keys
+
+
+async def test_field_permissions_batch_cache(site: AdminSite, models):
+    batches = []
+
+    @site.register_admin
+    class ArticleAdmin(admin.BaseAuthFieldModelAdmin):
+        model = models.Article
+        list_display = [models.Article.id, models.Article.title, models.Article.description, models.Article.status]
+
+        async def get_field_permissions(self, request: Request, fields, action: str = ""):
+            batches.append((request.scope["user"], action))
+            return {field for field in fields if field == "description"}
+
+        async def get_permission_cache_key(self, request: Request):
+            return request.scope["user"]
+
+    site.register_router()
+    ins = site.get_admin_or_create(ArticleAdmin)
+    # one batch call per user and action, shared across requests until the key changes
+    assert await ins.get_deny_fields(Request({"type": "http", "user": 1}), "list") == {"description"}
+    assert await ins.get_deny_fields(Request({"type": "http", "user": 1}), "list") == {"description"}
+    assert await ins.get_deny_fields(Request({"type": "http", "user": 2}), "list") == {"description"}
+    assert batches == [(1, "list"), (2, "list")]
+    # the cache can be disabled with a zero ttl
+    ins.field_permission_cache.ttl = 0
+    await ins.get_deny_fields(Request({"type": "http", "user": 1}), "list")
+    assert batches[-1] == (1, "list") and len(batches) == 3
@@ -0,0 +1,68 @@
+from sqlalchemy import select
+from starlette.requests import Request
+
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.admin import AdminSite
+from fastapi_amis_admin.admin.extensions.schemas import RecentTimeSelectPerm, SelectPerm, SimpleSelectPerm
+
+
+async def test_select_permissions(site: AdminSite, models):
+    checked = []
+
+    @site.register_admin
+    class ArticleAdmin(admin.BaseAuthSelectModelAdmin):
+        model = models.Article
+        select_permissions = [
+            SimpleSelectPerm(name="published", label="Published", values=[1], column="id"),
+            RecentTimeSelectPerm(name="recent", label="Recent"),
+            SimpleSelectPerm(name="denied", label="Denied", values=[2], column="id"),
+        ]
+
+        async def has_select_permission(self, request: Request, name: str) -> bool:
+            checked.append(name)
+            return name != "denied"
+
+        async def get_permission_cache_key(self, request: Request):
+            return request.scope["user"]
+
+    site.register_router()
+    ins = site.get_admin_or_create(ArticleAdmin)
+    request = Request({"type": "http", "user": 1})
+    # the effective rules are evaluated once per request
+    permissions = await ins.get_select_permissions(request)
+    assert [p.name for p in permissions] == ["published", "recent"]
+    await ins.get_select(request)
+    assert checked == ["published", "recent", "denied"]
+    # the where clause of the cacheable rules is cached per user
+    sel = await ins.filter_select(Request({"type": "http", "user": 1}), select(models.Article.id))
+    assert len(ins.select_clause_cache) == 1
+    sql = str(sel.compile(compile_kwargs={"literal_binds": True}))
+    assert "article.id = 1" in sql
+    assert "article.create_time >" in sql
+    assert "article.id = 2" not in sql
+
+
+async def test_select_permissions_cache_joins(site: AdminSite, models):
+    async def category_perm(admin_, request, sel):
+        return sel.join(models.Category, models.Category.id == models.Article.category_id).where(models.Category.name == "news")
+
+    @site.register_admin
+    class ArticleAdmin(admin.BaseAuthSelectModelAdmin):
+        model = models.Article
+        select_permissions = [SelectPerm(name="news", label="News", call=category_perm, cacheable=True)]
+
+    async def get_permission_cache_key(request: Request):
+        return request.scope["user"]
+
+    # the key of the site is used by default
+    site.get_permission_cache_key = get_permission_cache_key
+    site.register_router()
+    ins = site.get_admin_or_create(ArticleAdmin)
+    assert await ins.get_permission_cache_key(Request({"type": "http", "user": 1})) == 1
+    # the join added by the rule is kept when the rule is served from the cache
+    for _ in range(2):
+        sel = await ins.filter_select(Request({"type": "http", "user": 1}), select(models.Article.id))
+        sql = str(sel.compile(compile_kwargs={"literal_binds": True}))
+        assert "JOIN category ON category.id = article.category_id" in sql
+        assert "category.name = 'news'" in sql
+    assert len(ins.select_clause_cache) == 1
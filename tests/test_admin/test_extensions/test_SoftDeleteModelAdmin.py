@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlmodel import Field, SQLModel
+
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.admin import AdminSite
+from tests.conftest import async_db
+
+
+class Note(SQLModel, table=True):
+    __tablename__ = "test_delta_note"
+    id: int = Field(default=None, primary_key=True, nullable=False)
+    title: str = Field(default="", title="Title")
+    update_time: datetime = Field(default_factory=datetime.now, title="Update Time")
+    delete_time: Optional[datetime] = Field(default=None, title="Delete Time")
+
+
+async def test_list_changes_since(site: AdminSite, app: FastAPI):
+    @site.register_admin
+    class NoteAdmin(admin.SoftDeleteModelAdmin):
+        model = Note
+
+    site.mount_app(app)
+    ins = site.get_admin_or_create(NoteAdmin)
+    assert ins.delta_field is Note.update_time
+    async with async_db.engine.begin() as conn:
+        await conn.run_sync(Note.__table__.drop, checkfirst=True)
+        await conn.run_sync(Note.__table__.create)
+        await conn.execute(
+            Note.__table__.insert(),
+            [{"id": i, "title": f"note{i}", "update_time": datetime(2022, 1, i)} for i in range(1, 4)],
+        )
+    url = f"{ins.router_path}/list"
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        # the whole list is not affected
+        data = (await client.post(url)).json()["data"]
+        assert data["total"] == 3 and data["watermark"] is None
+        # an empty watermark returns all the changes, at most perPage at a time
+        data = (await client.post(url, params={"since": "", "perPage": 2})).json()["data"]
+        assert [item["id"] for item in data["items"]] == [1, 2]
+        assert data["hasNext"] is True
+        assert data["watermark"] == "2022-01-02T00:00:00"
+        # the changes at the watermark are returned again
+        data = (await client.post(url, params={"since": data["watermark"], "perPage": 2})).json()["data"]
+        assert [item["id"] for item in data["items"]] == [2, 3]
+        assert data["hasNext"] is False
+        assert data["deleted"] == []
+        watermark = data["watermark"]
+        assert watermark == "2022-01-03T00:00:00"
+        # the soft deleted items are returned as tombstones
+        res = await client.delete(f"{ins.router_path}/item/1")
+        assert res.json()["status"] == 0
+        data = (await client.post(url, params={"since": watermark})).json()["data"]
+        assert [item["id"] for item in data["items"]] == [3]
+        assert data["deleted"] == [1]
+        assert data["watermark"] > watermark
+        watermark = data["watermark"]
+        # the filters apply to the changes and to the tombstones
+        data = (await client.post(url, params={"since": ""}, json={"title": "note2"})).json()["data"]
+        assert [item["id"] for item in data["items"]] == [2]
+        assert data["deleted"] == []  # no tombstones without watermark
+        res = await client.delete(f"{ins.router_path}/item/2")
+        data = (await client.post(url, params={"since": watermark}, json={"title": "note3"})).json()["data"]
+        assert data["deleted"] == []
+        # the tombstones count in the changes limit, and the watermark does not skip the updates
+        res = await client.delete(f"{ins.router_path}/item/3")
+        data = (await client.post(url, params={"since": watermark, "perPage": 1})).json()["data"]
+        assert data["deleted"] == [1, 2] and data["hasNext"] is True  # the tombstone at the watermark comes again
+        data = (await client.post(url, params={"since": data["watermark"], "perPage": 1})).json()["data"]
+        assert data["deleted"] == [2, 3]
+        # a malformed watermark is refused
+        res = await client.post(url, params={"since": "yesterday"})
+        assert res.status_code == 422
+    async with async_db.engine.begin() as conn:
+        await conn.run_sync(Note.__table__.drop)
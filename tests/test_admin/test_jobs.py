@@ -0,0 +1,132 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette.testclient import TestClient
+
+from fastapi_amis_admin.admin import AdminSite, Settings
+from fastapi_amis_admin.admin.jobs import Job, JobManager, JobStatus, MemoryJobStore, SqliteJobStore, report_progress
+from fastapi_amis_admin.crud.schema import BaseApiOut
+
+
+async def wait_finished(manager: JobManager, job_id: str) -> Job:
+    for _ in range(100):
+        job = await manager.get(job_id)
+        if job.finished:
+            return job
+        await asyncio.sleep(0.01)
+    raise TimeoutError(job_id)
+
+
+async def test_job_manager():
+    manager = JobManager(MemoryJobStore(maxsize=10), max_workers=2)
+    running = []
+    max_running = 0
+
+    async def work(i: int):
+        nonlocal max_running
+        running.append(i)
+        max_running = max(max_running, len(running))
+        await report_progress(1, 2)
+        await asyncio.sleep(0.01)
+        running.remove(i)
+        return await manager.run_in_executor(pow, i, 2)
+
+    jobs = [await manager.submit(lambda i=i: work(i), name=f"job{i}") for i in range(5)]
+    results = [await wait_finished(manager, job.id) for job in jobs]
+    assert [job.result for job in results] == [0, 1, 4, 9, 16]
+    assert all(job.status == JobStatus.success and job.progress == 100 for job in results)
+    assert max_running == 2  # bounded by max_workers
+
+    async def fail():
+        raise ValueError("boom")
+
+    job = await wait_finished(manager, (await manager.submit(fail)).id)
+    assert job.status == JobStatus.failed
+    assert job.error == "boom"
+
+    async def refuse():
+        return BaseApiOut(status=-1, msg="refused")
+
+    job = await wait_finished(manager, (await manager.submit(refuse)).id)
+    assert job.status == JobStatus.failed
+    assert job.error == "refused"
+    assert len(await manager.store.list()) == 7
+    await manager.shutdown()
+
+
+async def test_job_manager_cancelled():
+    manager = JobManager(max_workers=1)
+    started = asyncio.Event()
+
+    async def work():
+        started.set()
+        await asyncio.sleep(10)
+
+    running = await manager.submit(work)
+    waiting = await manager.submit(work)  # still waiting for a worker
+    await started.wait()
+    await manager.shutdown()
+    for job_id in (running.id, waiting.id):
+        job = await manager.get(job_id)
+        assert job.status == JobStatus.failed and job.finished
+        assert job.error == "Cancelled"
+
+
+async def test_sqlite_job_store(tmp_path):
+    store = SqliteJobStore(tmp_path / "jobs.sqlite3")
+    await store.save(Job(id="a", status=JobStatus.running, created_at=1))
+    await store.save(Job(id="b", status=JobStatus.success, finished=True, created_at=2, result={"x": 1}))
+    assert [job.id for job in await store.list()] == ["b", "a"]
+    assert (await store.get("b")).result == {"x": 1}
+    assert await store.get("c") is None
+    # the jobs left running by a previous process are marked as failed
+    store = SqliteJobStore(tmp_path / "jobs.sqlite3")
+    job = await store.get("a")
+    assert job.status == JobStatus.failed and job.finished
+
+
+async def test_job_owner(site: AdminSite, async_client: AsyncClient):
+    site.register_router()
+
+    async def work():
+        return 1
+
+    job = await site.jobs.submit(work, owner="alice")
+    await wait_finished(site.jobs, job.id)
+    # the other users cannot read the job
+    res = await async_client.get(f"{site.router_path}/jobs/{job.id}")
+    assert res.json()["status"] == -1
+
+    async def get_job_owner(request):
+        return "alice"
+
+    site.get_job_owner = get_job_owner
+    res = await async_client.get(f"{site.router_path}/jobs/{job.id}")
+    assert res.json()["data"]["result"] == 1
+
+
+def test_jobs_shutdown():
+    events = []
+
+    @asynccontextmanager
+    async def lifespan(app):
+        events.append("startup")
+        yield
+        events.append("shutdown")
+
+    for app in (FastAPI(lifespan=lifespan), FastAPI(on_startup=[lambda: events.append("startup")])):
+        site = AdminSite(settings=Settings(site_path="/admin", database_url_async="sqlite+aiosqlite:///amisadmin.db"))
+        shutdown = site.jobs.shutdown
+
+        async def jobs_shutdown(shutdown=shutdown):
+            events.append("jobs")
+            await shutdown()
+
+        site.jobs.shutdown = jobs_shutdown
+        site.mount_app(app)
+        events.clear()
+        with TestClient(app):
+            assert events == ["startup"]
+        assert "jobs" in events  # the jobs are cancelled on shutdown, before the application resources
@@ -0,0 +1,97 @@
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient
+from sqlalchemy import create_engine
+
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.admin import AdminSite, Settings
+from fastapi_amis_admin.admin.metrics import Histogram, PoolStats
+from tests.conftest import async_db
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(1, 2, 4))
+    assert histogram.quantile(0.5) == 0
+    for value in (0.5, 1, 1.5, 3, 10):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.count == 5
+    assert histogram.mean == 16 / 5
+    assert histogram.quantile(0.5) == 1.5
+    assert histogram.quantile(1) == 4  # beyond the last bucket
+
+
+def test_pool_stats():
+    engine = create_engine("sqlite://")
+    stats = PoolStats(engine, Histogram())
+    stats.pool = None
+    stats.instrument()  # the checkouts are not measured twice
+    with engine.connect():
+        pass
+    assert stats.status()["checkouts"] == 1
+
+
+async def test_metrics(app: FastAPI, models):
+    site = AdminSite(settings=Settings(site_path="", metrics_enabled=True, metrics_token="secret"), engine=async_db.engine)
+
+    @site.register_admin
+    class UserAdmin(admin.ModelAdmin):
+        model = models.User
+
+    site.mount_app(app)
+    ins = site.get_admin_or_create(UserAdmin)
+    metrics_admin = site.get_admin_or_create(admin.MetricsAdmin)
+    assert metrics_admin is not None
+
+    async with async_db.engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        for name in ("a", "b"):
+            res = await client.post(f"{ins.router_path}/item", json={"username": name, "password": name})
+            assert res.json()["status"] == 0
+        res = await client.post(f"{ins.router_path}/list")
+        assert res.json()["data"]["total"] == 2
+        res = await client.get(f"{ins.router_path}{ins.page_path}")
+        assert res.status_code == 200
+
+        snapshot = site.metrics.snapshot()
+        routes = {(route["admin"], route["route"]): route for route in snapshot["routes"]}
+        assert routes[(ins.router_path, "create")]["requests"] == 2
+        assert routes[(ins.router_path, "list")]["requests"] == 1
+        assert routes[(ins.router_path, "list")]["rows_avg"] == 2
+        assert routes[(ins.router_path, "page")]["requests"] == 1
+        pool = snapshot["pools"][0]
+        assert pool["checkouts"] > 0
+
+        res = await client.get(metrics_admin.router_path)
+        assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = res.text
+        assert 'amis_admin_requests_total{admin="/UserAdmin",route="create",status="200"} 2' in text
+        assert 'amis_admin_rows_count{admin="/UserAdmin",route="list"} 1' in text
+        assert 'amis_admin_request_duration_seconds_bucket{admin="/UserAdmin",route="list",le="+Inf"} 1' in text
+        assert "amis_admin_db_pool_checkout_wait_seconds_count" in text
+        # the routes of the metrics are not measured
+        assert f'admin="{metrics_admin.router_path}"' not in text
+
+        res = await client.get(f"{metrics_admin.router_path}/charts/requests")
+        config = res.json()["data"]
+        assert "/UserAdmin.create" in config["xAxis"]["data"]
+        res = await client.get(f"{metrics_admin.router_path}/charts/unknown")
+        assert res.json()["status"] == -1
+
+        # without the page permission, the Prometheus scrapers authenticate with the token
+        async def page_permission_depend(request):
+            raise HTTPException(status_code=403)
+
+        metrics_admin.page_permission_depend = page_permission_depend
+        res = await client.get(metrics_admin.router_path, headers={"Authorization": "Bearer secret"})
+        assert res.text.startswith("# HELP")
+        res = await client.get(metrics_admin.router_path, headers={"Authorization": "Bearer wrong"})
+        assert res.status_code == 403
+    async with async_db.engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+
+
+def test_metrics_disabled(site: AdminSite):
+    assert site.metrics is None
+    assert site.get_admin_or_create(admin.MetricsAdmin, register=False) is None
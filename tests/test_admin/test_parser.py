@@ -329,3 +329,70 @@ def test_field_amis_extra_param():
     filteritem = amis_parser.as_form_item(modelfield2, is_filter=True, set_default=True)
     assert filteritem.type == "select"
     assert filteritem.label == "字段2"
+
+
+def test_parser_cache():
+    parser = AmisParser()
+    calls = []
+
+    def dynamic_item():
+        calls.append(1)
+        return {"type": "input-number"}
+
+    class User(BaseModel):
+        name: str = Field("", title="Name", amis_table_column={"type": "tpl"})
+        age: int = Field(0, title="Age", amis_form_item=dynamic_item)
+
+    name, age = model_fields(User)["name"], model_fields(User)["age"]
+    formitem = parser.as_form_item(name)
+    # the cached template is copied, so modifying the returned item does not affect the next calls
+    formitem.disabled = True
+    formitem2 = parser.as_form_item(name)
+    assert formitem2 is not formitem and formitem2.disabled is None
+    assert formitem2.amis_dict() == parser._as_form_item(name).amis_dict()
+    # the cache key includes the params
+    assert parser.as_form_item(name, is_filter=True).amis_dict() == parser._as_form_item(name, is_filter=True).amis_dict()
+    column = parser.as_table_column(name)
+    column.name = "other"
+    assert parser.as_table_column(name).name == "name"
+    assert parser.as_table_column(name).type == "tpl"
+    # the callable amis extra is evaluated on every call
+    parser.as_form_item(age)
+    parser.as_form_item(age)
+    assert len(calls) == 2
+    parser.clear_cache()
+    assert len(parser._cache) == 0
+
+
+def test_file_chunk_receiver():
+    parser = AmisParser(file_receiver="post:/file/upload", file_chunk_receiver="/file/upload/chunk")
+
+    class User(BaseModel):
+        avatar: str = Field("", title="Avatar", amis_form_item=amis.InputFile())
+
+    formitem = parser.as_form_item(model_fields(User)["avatar"])
+    file_item, link_item = formitem.body
+    assert file_item.receiver == "post:/file/upload"
+    assert file_item.startChunkApi == "post:/file/upload/chunk/start"
+    assert file_item.chunkApi == "post:/file/upload/chunk"
+    assert file_item.finishChunkApi == "post:/file/upload/chunk/finish"
+    assert getattr(link_item, "startChunkApi", None) is None
+
+
+def test_image_thumbnail_column():
+    parser = AmisParser(image_thumbnail=True, image_thumbnail_prefixes=["/admin/upload/"])
+
+    class User(BaseModel):
+        avatar: str = Field("", title="Avatar", amis_table_column="image")
+        name: str = Field("", title="Name")
+
+    column = parser.as_table_column(model_fields(User)["avatar"])
+    # only the uploaded images have a thumbnail, and `thumb` is appended to their query string
+    assert column.src == (
+        "${avatar && (STARTSWITH(avatar, '/admin/upload/')) ? avatar + (CONTAINS(avatar, '?') ? '&' : '?') + 'thumb' : avatar}"
+    )
+    assert column.originalSrc == "${avatar}"
+    assert getattr(parser.as_table_column(model_fields(User)["name"]), "src", None) is None
+    assert getattr(amis_parser.as_table_column(model_fields(User)["avatar"]), "src", None) is None
+    # without the prefixes of the uploaded images, the images are displayed as they are
+    assert getattr(AmisParser(image_thumbnail=True).as_table_column(model_fields(User)["avatar"]), "src", None) is None
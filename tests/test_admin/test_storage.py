@@ -0,0 +1,248 @@
+import errno
+import hashlib
+import multiprocessing
+import os
+from pathlib import Path
+
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+
+from fastapi_amis_admin.admin import AdminSite
+from fastapi_amis_admin.admin.site import FileAdmin
+from fastapi_amis_admin.admin.storage import (
+    HashFileStorage,
+    UploadFileResponse,
+    UploadStaticFiles,
+    generate_thumbnail,
+    get_thumbnail_path,
+    move_file,
+    precompress_file,
+    remove_file,
+)
+
+
+async def test_HashFileStorage(tmpdir):
+    storage = HashFileStorage(tmpdir.join("upload"), temp_directory=tmpdir.join("tmp"))
+    content = b"hello"
+    file_hash = hashlib.sha256(content).hexdigest()
+    names = []
+    for _ in range(2):
+        temp_path = storage.get_temp_path()
+        temp_path.write_bytes(content)
+        names.append(await storage.save(temp_path, "Hello.TXT", file_hash))
+        assert not temp_path.exists()
+    # identical content is stored once, in a sharded directory
+    assert names[0] == names[1] == f"{file_hash[:2]}/{file_hash[2:4]}/{file_hash}.txt"
+    assert storage.get_refcount(names[0]) == 2
+    # the lookup does not add a reference, the attach does
+    assert await storage.lookup(file_hash, "other.txt") == names[0]
+    assert storage.get_refcount(names[0]) == 2
+    assert await storage.attach(names[0]) is True
+    assert await storage.lookup(hashlib.sha256(b"unknown").hexdigest(), "other.txt") is None
+    with pytest.raises(ValueError):
+        await storage.lookup("../../etc/passwd", "other.txt")
+    with pytest.raises(ValueError):
+        await storage.delete("../" + names[0])
+    # the file is deleted with its last reference
+    path = storage.directory / names[0]
+    for _ in range(2):
+        await storage.delete(names[0])
+        assert path.exists()
+    await storage.delete(names[0])
+    assert not path.exists()
+    assert storage.get_refcount(names[0]) == 0
+
+
+def _check_forked_storage(storage: HashFileStorage, parent_connection: int, queue) -> None:
+    storage._add_reference("child")
+    queue.put(id(storage._connection) != parent_connection)
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="fork is not supported")
+def test_HashFileStorage_fork(tmp_path):
+    storage = HashFileStorage(tmp_path / "upload", temp_directory=tmp_path / "tmp")
+    connection = storage._connection
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_check_forked_storage, args=(storage, id(connection), queue))
+    process.start()
+    process.join(10)
+    # the child process opened its own connection to the index
+    assert queue.get(timeout=1) is True
+    assert storage.get_refcount("child") == 1
+    assert storage._connection is connection
+
+
+async def test_FileAdmin_hash_storage(site: AdminSite, async_client: AsyncClient, tmpdir):
+    @site.register_admin
+    class TmpFileAdmin(FileAdmin):
+        router_prefix = "/tmpfile"
+        file_path = "/tmpupload"
+        file_directory = str(tmpdir.join("upload"))
+        file_chunk_directory = str(tmpdir.join("chunks"))
+        storage_class = HashFileStorage
+
+    ins = site.get_admin_or_create(TmpFileAdmin)
+    site.register_router()
+    url = ins.router_path + ins.file_path
+    content = b"0123456789"
+    file_hash = hashlib.sha256(content).hexdigest()
+    # the content is unknown before the first upload
+    res = await async_client.post(url + "/lookup", json={"hash": file_hash, "filename": "a.txt"})
+    assert res.json()["data"] is None
+    first = (await async_client.post(url, files={"file": ("a.txt", content)})).json()["data"]
+    second = (await async_client.post(url, files={"file": ("b.txt", content)})).json()["data"]
+    assert first["filename"] == second["filename"]
+    res = await async_client.post(url + "/lookup", json={"hash": file_hash, "filename": "c.txt"})
+    assert res.json()["data"]["filename"] == first["filename"]
+    assert ins.storage.get_refcount(first["filename"]) == 2
+    res = await async_client.post(url + "/attach", json={"filename": first["filename"]})
+    assert res.json()["data"]["url"] == first["url"]
+    assert ins.storage.get_refcount(first["filename"]) == 3
+    res = await async_client.post(url + "/delete", json={"filename": first["filename"]})
+    assert res.json()["status"] == 0
+    assert ins.storage.get_refcount(first["filename"]) == 2
+    assert [name for name in os.listdir(ins.file_chunk_directory) if name.endswith(".tmp")] == []
+    res = await async_client.get(first["url"])
+    assert res.content == content
+
+    # the routes require the upload permission, the files are served without it
+    async def has_page_permission(request, obj=None, action=None):
+        return action != "upload"
+
+    site.has_page_permission = has_page_permission
+    res = await async_client.post(url + "/lookup", json={"hash": file_hash, "filename": "c.txt"})
+    assert res.status_code == 401
+    res = await async_client.get(first["url"])
+    assert res.content == content
+
+
+def test_move_file_across_filesystems(tmpdir, monkeypatch):
+    src, dst = tmpdir.join("src.txt"), tmpdir.join("dst.txt")
+    src.write_binary(b"hello")
+    replace = os.replace
+
+    def cross_device_replace(a, b):
+        if str(a) == str(src):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return replace(a, b)
+
+    monkeypatch.setattr(os, "replace", cross_device_replace)
+    move_file(str(src), str(dst))
+    assert not src.exists()
+    assert dst.read_binary() == b"hello"
+    assert os.listdir(tmpdir) == ["dst.txt"]
+
+
+async def test_UploadStaticFiles(tmpdir):
+    content = b"id,name\n" + b"1,hello\n" * 200
+    tmpdir.join("data.csv").write_binary(content)
+    precompress_file(str(tmpdir.join("data.csv")))
+    app = Starlette()
+    app.mount("/static", UploadStaticFiles(directory=str(tmpdir), immutable=True))
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        res = await client.get("/static/data.csv", headers={"accept-encoding": "identity"})
+        assert res.content == content
+        assert res.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert res.headers["accept-ranges"] == "bytes"
+        etag = res.headers["etag"]
+        assert etag.startswith('"') and etag.endswith('"')
+        res = await client.get("/static/data.csv", headers={"if-none-match": etag, "accept-encoding": "identity"})
+        assert res.status_code == 304
+        # precompressed variant
+        res = await client.get("/static/data.csv", headers={"accept-encoding": "gzip"})
+        assert res.headers["content-encoding"] == "gzip"
+        assert res.headers["etag"] != etag
+        assert int(res.headers["content-length"]) < len(content)
+        assert res.content == content  # decoded by httpx
+        res = await client.get("/static/data.csv", headers={"accept-encoding": "gzip;q=0, identity"})
+        assert "content-encoding" not in res.headers
+        # byte ranges
+        res = await client.get("/static/data.csv", headers={"range": "bytes=0-6"})
+        assert res.status_code == 206
+        assert res.content == b"id,name"
+        assert res.headers["content-range"] == f"bytes 0-6/{len(content)}"
+        assert "content-encoding" not in res.headers
+        res = await client.get("/static/data.csv", headers={"range": "bytes=-8"})
+        assert res.content == b"1,hello\n"
+        res = await client.get("/static/data.csv", headers={"range": f"bytes={len(content)}-"})
+        assert res.status_code == 416
+        # an invalid range is ignored, the whole file is served
+        res = await client.get("/static/data.csv", headers={"range": "bytes=6-2"})
+        assert res.status_code == 200
+        assert res.content == content
+        res = await client.get("/static/data.csv", headers={"range": "bytes=0-1", "if-range": '"other"'})
+        assert res.status_code == 200
+
+
+async def test_UploadFileResponse_zerocopy(tmpdir):
+    path = tmpdir.join("data.bin")
+    path.write_binary(b"0123456789")
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "extensions": {"http.response.zerocopysend": {}}}
+    response = UploadFileResponse(str(path), start=2, end=5, status_code=206, stat_result=os.stat(path))
+    await response(scope, None, send)
+    assert messages[1]["type"] == "http.response.zerocopysend"
+    assert (messages[1]["offset"], messages[1]["count"]) == (2, 4)
+    messages.clear()
+    scope["extensions"] = {"http.response.pathsend": {}}
+    await UploadFileResponse(str(path), stat_result=os.stat(path))(scope, None, send)
+    assert messages[1] == {"type": "http.response.pathsend", "path": str(path)}
+
+
+async def test_UploadStaticFiles_thumbnail(tmpdir):
+    tmpdir.join("photo.png").write_binary(b"original")
+    app = Starlette()
+    app.mount("/static", UploadStaticFiles(directory=str(tmpdir), immutable=True))
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        # the original is served, and revalidated, until the thumbnail exists
+        res = await client.get("/static/photo.png?thumb")
+        assert res.content == b"original"
+        assert res.headers["cache-control"] == "no-cache"
+        get_thumbnail_path(tmpdir.join("photo.png")).write_bytes(b"thumbnail")
+        res = await client.get("/static/photo.png?thumb")
+        assert res.content == b"thumbnail"
+        assert res.headers["content-type"] == "image/png"
+        assert res.headers["cache-control"] == "public, max-age=31536000, immutable"
+        res = await client.get("/static/photo.png")
+        assert res.content == b"original"
+
+
+def test_generate_thumbnail(tmpdir):
+    Image = pytest.importorskip("PIL.Image")
+    path = str(tmpdir.join("photo.jpg"))
+    Image.new("RGB", (800, 400)).save(path)
+    thumbnail_path = generate_thumbnail(path, (200, 200))
+    with Image.open(thumbnail_path) as thumbnail:
+        assert thumbnail.size == (200, 100)
+    remove_file(path)
+    assert not os.path.exists(thumbnail_path)
+    # the image already small enough is its own thumbnail
+    Image.new("RGB", (100, 50)).save(path)
+    thumbnail_path = generate_thumbnail(path, (200, 200))
+    assert thumbnail_path.read_bytes() == Path(path).read_bytes()
+    remove_file(path)
+    assert not os.path.exists(thumbnail_path)
+
+
+async def test_FileAdmin_thumbnail(site: AdminSite, tmpdir):
+    pytest.importorskip("PIL.Image")
+    site.settings.amis_image_thumbnail = True
+
+    @site.register_admin
+    class TmpFileAdmin(FileAdmin):
+        router_prefix = "/tmpfile"
+        file_path = "/tmpupload"
+        file_directory = str(tmpdir.join("upload"))
+
+    ins = site.get_admin_or_create(TmpFileAdmin)
+    # the image columns only display the thumbnails of the uploaded images
+    assert f"{ins.static_path}/" in site.amis_parser.image_thumbnail_prefixes
+    assert ins.thumbnail_executor
+    await site.on_shutdown()
+    assert "thumbnail_executor" not in ins.__dict__
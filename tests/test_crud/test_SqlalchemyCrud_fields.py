@@ -9,7 +9,7 @@ from starlette.requests import Request
 from starlette.routing import NoMatchFound
 
 from fastapi_amis_admin.crud import SqlalchemyCrud
-from fastapi_amis_admin.crud.parser import LabelField, PropertyField
+from fastapi_amis_admin.crud.parser import LabelField, ModelFieldProxy, PropertyField
 from fastapi_amis_admin.utils.pydantic import model_fields
 from tests.conftest import async_db as db
 from tests.models.schemas import ArticleContentSchema, CategorySchema, TagSchema
@@ -381,3 +381,23 @@ async def test_read_fields_and_schema_read_is_none(app: FastAPI, models):
     assert "/article/item/{item_id}" in paths
     assert "put" in paths["/article/item/{item_id}"]
     assert "get" not in paths["/article/item/{item_id}"]
+
+
+def test_cloned_field_cache(models):
+    modelfield = model_fields(models.User)["username"]
+    update = {"name": "user__username", "alias": "user__username"}
+    first = ModelFieldProxy(modelfield, update=dict(update)).cloned_field()
+    second = ModelFieldProxy(modelfield, update=dict(update)).cloned_field()
+    # Each call returns its own copy of the cached clone
+    assert first is not second
+    assert first is not modelfield
+    assert first.name == second.name == "user__username"
+    assert first.alias == second.alias == "user__username"
+    first.field_info.default = "changed"
+    assert second.field_info.default != "changed"
+    third = ModelFieldProxy(modelfield, update=dict(update)).cloned_field()
+    assert third.field_info.default != "changed"
+    # A different update gets a different clone, and the original field is left untouched
+    other = ModelFieldProxy(modelfield, update={"name": "owner__username"}).cloned_field()
+    assert other.name == "owner__username"
+    assert modelfield.name == "username"
@@ -4,6 +4,7 @@ from httpx import AsyncClient
 from sqlalchemy import func, select
 
 from fastapi_amis_admin.crud import SqlalchemyCrud
+from fastapi_amis_admin.crud import utils as crud_utils
 from fastapi_amis_admin.crud.parser import TableModelParser
 from tests.conftest import async_db as db
 
@@ -11,7 +12,9 @@ from tests.conftest import async_db as db
 @pytest.fixture(autouse=True)
 def app_routes(app: FastAPI, models):
     user_schema = TableModelParser.get_table_model_schema(models.User)
-    user_crud = SqlalchemyCrud(models.User, db.engine).register_crud(schema_read=user_schema)
+    user_crud = SqlalchemyCrud(models.User, db.engine)
+    user_crud.enable_bulk_by_filter = True
+    user_crud.register_crud(schema_read=user_schema)
 
     app.include_router(user_crud.router)
 
@@ -143,6 +146,58 @@ async def test_route_delete(async_client: AsyncClient, fake_users, models):
     assert await db.get(models.User, 4) is None
 
 
+async def test_route_chunked_item_id(async_client: AsyncClient, fake_users, monkeypatch):
+    monkeypatch.setattr(crud_utils, "IN_CLAUSE_CHUNK_SIZE", 2)
+    res = await async_client.get("/User/item/1,2,3,4,5")
+    assert sorted(item["id"] for item in res.json()["data"]) == [1, 2, 3, 4, 5]
+    res = await async_client.delete("/User/item/1,3,5,6")
+    assert res.json()["data"] == 3
+
+
+async def test_route_update_by_filter(async_client: AsyncClient, fake_users, models, monkeypatch):
+    monkeypatch.setattr(SqlalchemyCrud, "bulk_chunk_size", 2)
+    progress = []
+
+    async def on_bulk_progress(self, request, action, done, total):
+        progress.append((action, done, total))
+
+    monkeypatch.setattr(SqlalchemyCrud, "on_bulk_progress", on_bulk_progress)
+    res = await async_client.post(
+        "/User/item/filter/update",
+        json={"filters": {"id": "[>]1"}, "data": {"password": "new_password"}},
+    )
+    assert res.json()["data"] == 4
+    assert progress == [("update", 2, 4), ("update", 4, 4)]
+    db.session.expire_all()
+    passwords = {user.id: user.password for user in await db.session.scalars(select(models.User))}
+    assert passwords == {1: "password_1", 2: "new_password", 3: "new_password", 4: "new_password", 5: "new_password"}
+
+
+async def test_route_delete_by_filter(async_client: AsyncClient, fake_users, models, monkeypatch):
+    monkeypatch.setattr(SqlalchemyCrud, "bulk_chunk_size", 2)
+    res = await async_client.post("/User/item/filter/delete", json={"filters": {"username": "[*]User_1,User_3,User_4"}})
+    assert res.json()["data"] == 3
+    ids = await db.scalars(select(models.User.id).order_by(models.User.id))
+    assert ids.all() == [2, 5]
+    # without filters, the request is refused instead of deleting all the items
+    for body in ({}, {"filters": {}}, {"filters": {"username": None}}):
+        res = await async_client.post("/User/item/filter/delete", json=body)
+        assert res.status_code == 400
+    assert await db.scalar(select(func.count(models.User.id))) == 2
+
+
+async def test_route_bulk_by_filter_denied(async_client: AsyncClient, fake_users, models, monkeypatch):
+    async def has_filter_permission(self, request, filters, **kwargs):
+        return False
+
+    monkeypatch.setattr(SqlalchemyCrud, "has_filter_permission", has_filter_permission)
+    res = await async_client.post("/User/item/filter/delete", json={"filters": {"id": 1}})
+    assert res.status_code == 401
+    res = await async_client.post("/User/item/filter/update", json={"filters": {"id": 1}, "data": {"password": "new"}})
+    assert res.status_code == 401
+    assert await db.scalar(select(func.count(models.User.id))) == 5
+
+
 async def test_route_list(async_client: AsyncClient, fake_users):
     # list
     res = await async_client.post("/User/list")
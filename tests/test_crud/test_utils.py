@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, MetaData, Table, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from fastapi_amis_admin.crud.utils import in_clauses
+
+table = Table("item", MetaData(), Column("id", Integer, primary_key=True))
+
+
+def test_in_clauses():
+    assert list(in_clauses(table.c.id, [])) == []
+    # chunked expanding IN clauses
+    clauses = list(in_clauses(table.c.id, range(5), "sqlite", chunk_size=2))
+    assert len(clauses) == 3
+    sql = str(select(table.c.id).where(clauses[0]).compile(dialect=sqlite.dialect()))
+    assert "IN (__[POSTCOMPILE_id_1])" in sql
+    # a single array parameter on PostgreSQL
+    clauses = list(in_clauses(table.c.id, range(5000), "postgresql", chunk_size=2))
+    assert len(clauses) == 1
+    compiled = select(table.c.id).where(clauses[0]).compile(dialect=postgresql.dialect())
+    assert "= ANY (%(param_1)s::INTEGER[])" in str(compiled)
+    assert compiled.params["param_1"] == list(range(5000))
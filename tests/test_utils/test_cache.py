@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from fastapi_amis_admin.utils.cache import (
+    BroadcastLRUCache,
+    CacheManager,
+    InvalidationChannel,
+    LRUCache,
+    SqliteCache,
+    SqliteCacheStore,
+)
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts the least recently used "b"
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    cache.set("d", 4, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("d", "expired") == "expired"
+
+
+def test_sqlite_cache_shared(tmp_path):
+    # Two stores on the same file, as in two worker processes
+    path = tmp_path / "cache.sqlite3"
+    cache1 = SqliteCache(SqliteCacheStore(path), "users", maxsize=10)
+    cache2 = SqliteCache(SqliteCacheStore(path), "users", maxsize=10)
+    cache1.set(("admin", "list"), frozenset({"id", "name"}))
+    assert cache2.get(("admin", "list")) == frozenset({"id", "name"})
+    assert SqliteCache(cache1.store, "other").get(("admin", "list")) is None  # namespaces are separated
+    cache2.delete(("admin", "list"))
+    assert ("admin", "list") not in cache1
+    cache1.set("ttl", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache2.get("ttl") is None
+    for i in range(20):
+        cache1.set(i, i)
+    assert len(cache1) == 10
+    assert cache2.get(19) == 19 and cache2.get(0) is None
+    cache2.clear()
+    assert len(cache1) == 0
+
+
+def test_broadcast_lru_cache(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    channel1 = InvalidationChannel(SqliteCacheStore(path), poll_interval=0)
+    channel2 = InvalidationChannel(SqliteCacheStore(path), poll_interval=0)
+    cache1 = BroadcastLRUCache(channel1, "clauses")
+    cache2 = BroadcastLRUCache(channel2, "clauses")
+    for cache in (cache1, cache2):
+        cache.set("a", object())
+        cache.set("b", object())
+    # the values are kept in each process, the invalidations are broadcast
+    assert cache1.get("a") is not cache2.get("a")
+    cache1.delete("a")
+    assert "a" not in cache2 and "b" in cache2
+    cache1.set("a", 1)
+    cache2.clear()
+    assert "a" not in cache1 and "b" not in cache1
+    # its own invalidations are not applied again
+    cache2.set("c", 1)
+    assert cache2.get("c") == 1
+
+
+def test_cache_manager(tmp_path):
+    assert isinstance(CacheManager().create("local", shared=False), LRUCache)
+    manager = CacheManager(tmp_path / "cache.sqlite3")
+    assert isinstance(manager.create("shared"), SqliteCache)
+    assert isinstance(manager.create("local", shared=False), BroadcastLRUCache)
+    manager.caches["shared"].set("a", 1)
+    manager.clear()
+    assert "a" not in manager.caches["shared"]
+
+
+async def test_cache_async(tmp_path):
+    manager = CacheManager(tmp_path / "cache.sqlite3", poll_interval=0)
+    shared, local = manager.create("shared"), manager.create("local", shared=False)
+    for cache in (shared, local):
+        await cache.aset("a", 1)
+        assert await cache.aget("a") == 1
+        assert await cache.aget("b", "missing") == "missing"
+    # the invalidations of the other processes are applied by the async reads too
+    other = InvalidationChannel(SqliteCacheStore(tmp_path / "cache.sqlite3"), poll_interval=0)
+    other.publish("local", "a")
+    assert await local.aget("a") is None
+
+
+def _check_forked(manager: CacheManager, parent_source: str, parent_connection: int, queue) -> None:
+    manager.caches["shared"].set("child", os.getpid())
+    reopened = id(manager.store.connection) != parent_connection
+    queue.put((reopened, manager.channel.source != parent_source, manager.caches["shared"].get("parent")))
+
+
+@pytest.mark.skipif(not hasattr(os, "register_at_fork"), reason="fork is not supported")
+def test_cache_fork(tmp_path):
+    manager = CacheManager(tmp_path / "cache.sqlite3")
+    shared = manager.create("shared")
+    shared.set("parent", 1)
+    connection = manager.store.connection
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_check_forked, args=(manager, manager.channel.source, id(connection), queue))
+    process.start()
+    process.join(10)
+    # the child process opened its own connection, and got its own source of invalidations
+    assert queue.get(timeout=1) == (True, True, 1)
+    assert shared.get("child") == process.pid
+    assert manager.store.connection is connection
@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+from fastapi_amis_admin.utils.functools import SingleFlight
+
+
+async def test_single_flight():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(*(single_flight.do(key, lambda key=key: work(key)) for key in ["a", "a", "b", "a"]))
+    assert results == ["a", "a", "b", "a"]
+    assert calls == ["a", "b"]
+    assert len(single_flight) == 0  # the results are not kept
+    assert await single_flight.do("a", lambda: work("a")) == "a"
+    assert calls == ["a", "b", "a"]
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    # the error is raised to all the callers, and a cancelled caller does not cancel the others
+    tasks = [asyncio.ensure_future(single_flight.do("error", fail)) for _ in range(2)]
+    waiter = asyncio.ensure_future(single_flight.do("slow", lambda: work("slow")))
+    other = asyncio.ensure_future(single_flight.do("slow", lambda: work("slow")))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    for task in tasks:
+        with pytest.raises(ValueError):
+            await task
+    assert await other == "slow"
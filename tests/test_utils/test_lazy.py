@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from fastapi_amis_admin import admin, amis, crud
+
+
+def run_python(code: str) -> str:
+    env = {key: value for key, value in os.environ.items() if key != "FAA_GLOBALS"}
+    return subprocess.check_output([sys.executable, "-c", code], stderr=subprocess.DEVNULL, env=env).decode().strip()
+
+
+@pytest.mark.parametrize(
+    "module, heavy_module",
+    [
+        ("fastapi_amis_admin.crud", "fastapi_amis_admin.crud._sqlalchemy"),
+        ("fastapi_amis_admin.amis", "fastapi_amis_admin.amis.components"),
+        ("fastapi_amis_admin.admin", "fastapi_amis_admin.admin.admin"),
+        ("fastapi_amis_admin.globals", "fastapi_amis_admin.admin.admin"),
+    ],
+)
+def test_lazy_import(module, heavy_module):
+    assert run_python(f"import sys, {module}; print({heavy_module!r} in sys.modules)") == "False"
+
+
+def test_lazy_exports():
+    assert crud.SqlalchemyCrud.__name__ == "SqlalchemyCrud"
+    assert admin.AdminSite.__module__ == "fastapi_amis_admin.admin.site"
+    # names from `components`, and the names of `types` which take precedence
+    assert amis.Page.__module__ == "fastapi_amis_admin.amis.components"
+    assert amis.Tpl.__module__ == "fastapi_amis_admin.amis.types"
+    assert "Page" in amis.__all__ and "API" in amis.__all__
+    with pytest.raises(AttributeError):
+        amis.NotExists  # noqa: B018
+    assert run_python("from fastapi_amis_admin.amis import *; print(Page.__name__, InputText.__name__)") == "Page InputText"